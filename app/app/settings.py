@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "core",
     "rest_framework",
     "rest_framework.authtoken",
@@ -96,6 +97,26 @@ DATABASES = {
 }
 
 
+# Cache
+# Version tokens and cached payloads must be shared by every worker
+# process, so deployments running several workers set REDIS_URL. Without
+# it each process keeps its own cache, which only suits a single process.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -145,8 +166,42 @@ AUTH_USER_MODEL = "core.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
 }
 
+API_PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", 50))
+API_MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", 500))
+
 SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
+
+# Task generation
+
+TASK_BATCH_WORKERS = int(os.environ.get("TASK_BATCH_WORKERS", 2))
+TASK_BATCH_STALE_MINUTES = int(
+    os.environ.get("TASK_BATCH_STALE_MINUTES", 30)
+)
+TASK_POOL_WATERMARK = int(os.environ.get("TASK_POOL_WATERMARK", 5))
+TASK_POOL_REFILL_MINUTES = int(os.environ.get("TASK_POOL_REFILL_MINUTES", 5))
+TASK_GENERATED_CACHE_TIMEOUT = int(
+    os.environ.get("TASK_GENERATED_CACHE_TIMEOUT", 60 * 60 * 24)
+)
+TASK_DETAIL_CACHE_TIMEOUT = int(
+    os.environ.get("TASK_DETAIL_CACHE_TIMEOUT", 60 * 60 * 24)
+)
+TASK_RANDOM_CACHE_TIMEOUT = int(
+    os.environ.get("TASK_RANDOM_CACHE_TIMEOUT", 60 * 60)
+)
+TASK_OFFLINE_PACK_TIMEOUT = int(
+    os.environ.get("TASK_OFFLINE_PACK_TIMEOUT", 60 * 60 * 24 * 30)
+)
+TASK_PROGRESS_RECONCILE_DAYS = int(
+    os.environ.get("TASK_PROGRESS_RECONCILE_DAYS", 7)
+)
+
+# Therapist dashboard
+
+THERAPIST_DASHBOARD_CACHE_TIMEOUT = int(
+    os.environ.get("THERAPIST_DASHBOARD_CACHE_TIMEOUT", 60 * 5)
+)
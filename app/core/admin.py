@@ -89,3 +89,9 @@ admin.site.register(models.CustomQuestion)
 
 admin.site.register(models.FourChoice)
 admin.site.register(models.FourQuestion)
+
+admin.site.register(models.LibraryCount)
+admin.site.register(models.GenerationJob)
+admin.site.register(models.LatestTaskResult)
+admin.site.register(models.DailyProgress)
+admin.site.register(models.VersionToken)
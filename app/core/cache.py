@@ -0,0 +1,78 @@
+"""
+Version tokens kept in the cache and process-local snapshots of derived
+data with cache-backed invalidation. Unlike the tokens of
+`core.versions`, which are stored in the database, these may be evicted
+and are only used to key cached data.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_cache_version(key, timeout=None):
+    """Return the version token cached under `key`, creating one if missing"""
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout):
+            version = cache.get(key, version)
+    return version
+
+
+def drop_cache_versions(keys):
+    """
+    Drop the version tokens under `keys` once the current transaction
+    commits, so the next read creates new ones.
+    """
+    keys = list(dict.fromkeys(keys))
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class VersionedSnapshot:
+    """
+    Keep a process-local copy of the data returned by `loader`.
+    The cache only stores a small version token, so checking whether the
+    local copy is still fresh is a single cache read no matter how large
+    the data is. Calling `invalidate()` in any process makes every process
+    sharing the cache backend, which is configured by `REDIS_URL`, rebuild
+    its copy on the next `get()`.
+    """
+
+    def __init__(self, key, loader, timeout=None):
+        self.key = key
+        self.loader = loader
+        self.timeout = timeout
+        self._version = None
+        self._data = None
+
+    def _current_version(self):
+        """Return the shared version token, creating one if missing"""
+        return get_cache_version(self.key, self.timeout)
+
+    def current(self):
+        """
+        Return the version token and the snapshot, reloading the snapshot
+        if it has been invalidated.
+        """
+        version = self._current_version()
+        data, loaded_version = self._data, self._version
+        if data is None or version != loaded_version:
+            data = self.loader()
+            self._data, self._version = data, version
+        return version, data
+
+    def get(self):
+        """Return the snapshot, reloading it if it has been invalidated"""
+        return self.current()[1]
+
+    def invalidate(self):
+        """
+        Mark the snapshot stale in every process sharing the cache once
+        the current transaction commits, so no process reloads it from
+        uncommitted data and keeps it under the new token.
+        """
+        transaction.on_commit(
+            lambda: cache.set(self.key, uuid.uuid4().hex, self.timeout)
+        )
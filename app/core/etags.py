@@ -0,0 +1,58 @@
+"""
+Conditional GET support for API views
+"""
+import hashlib
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.versions import get_version
+
+
+def make_etag(*parts):
+    """Return a strong ETag built from the given parts"""
+    digest = hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+class ConditionalGetMixin:
+    """
+    Tag `retrieve` and `list` responses with a strong ETag built from the
+    stored version token under the key returned by `get_version_key()`,
+    the serializer and the requested url. A request whose `If-None-Match`
+    holds the current ETag is answered with 304 Not Modified before
+    anything is serialized. The token read is kept as `version_token` for
+    the response. Views return `None` from `get_version_key()` to skip
+    conditional handling.
+    """
+
+    def get_version_key(self):
+        """Return the cache key of the version token of the response"""
+        return None
+
+    def conditional(self, respond, request, *args, **kwargs):
+        """Call `respond`, unless the client already has the response"""
+        key = self.get_version_key()
+        if key is None:
+            return respond(request, *args, **kwargs)
+        self.version_token = get_version(key)
+        etag = make_etag(
+            self.version_token,
+            self.get_serializer_class().__name__,
+            request.build_absolute_uri(),
+        )
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        response = respond(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
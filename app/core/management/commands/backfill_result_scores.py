@@ -0,0 +1,92 @@
+"""
+Django command to store the scores of task results written before scores
+were stored
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from core.models import Answer, AnswerFourChoice, TaskResult, User
+from task import progress
+
+
+class Command(BaseCommand):
+    """
+    Django command scoring the task results without a score, in batches
+    of results ordered by id. Every batch reads the answer counts with
+    one query per answer table, stores the scores with one update and
+    adds them to the progress rollups the results were counted in without
+    them, in its own transaction holding the locks of the patients, so
+    the command can be stopped and run again.
+    """
+
+    help = "Store the scores of unscored task results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def _counts(self, ids):
+        """Return the correct and total answer counts of the results"""
+        counts = {pk: [0, 0] for pk in ids}
+        for answer_model in (Answer, AnswerFourChoice):
+            rows = (
+                answer_model.objects.filter(
+                    assigned_to_question__assigned_to__in=ids
+                )
+                .values_list("assigned_to_question__assigned_to")
+                .annotate(
+                    correct=Count("id", filter=Q(is_correct=True)),
+                    total=Count("id"),
+                )
+            )
+            for pk, correct, total in rows:
+                counts[pk][0] += correct
+                counts[pk][1] += total
+        return counts
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        last = 0
+        scored = 0
+        while True:
+            ids = list(
+                TaskResult.objects.filter(
+                    id__gt=last, total_count__isnull=True
+                )
+                .order_by("id")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                results = list(
+                    TaskResult.objects.filter(id__in=ids)
+                    .select_related("task")
+                    .only(
+                        "answered_by",
+                        "date_created",
+                        "task__type",
+                        "task__difficulty",
+                    )
+                )
+                patient_ids = {result.answered_by_id for result in results}
+                list(
+                    User.objects.select_for_update()
+                    .filter(pk__in=patient_ids)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)
+                )
+                counts = self._counts(ids)
+                for result in results:
+                    correct, total = counts[result.id]
+                    result.correct_count = correct
+                    result.total_count = total
+                    result.accuracy = correct / total if total else None
+                TaskResult.objects.bulk_update(
+                    results, ["correct_count", "total_count", "accuracy"]
+                )
+                progress.results_scored(results)
+            last = ids[-1]
+            scored += len(ids)
+            self.stdout.write(f"Scored {scored} results")
+        self.stdout.write(self.style.SUCCESS(f"Scored {scored} results"))
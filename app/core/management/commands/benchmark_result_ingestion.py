@@ -0,0 +1,119 @@
+"""
+Django command to benchmark task result ingestion
+"""
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import (
+    Answer,
+    QuestionConnectImageAnswer,
+    Task,
+    TaskResult,
+    User,
+)
+from task.serializers import TaskDetailResultSerializer
+
+
+def legacy_create(validated_data):
+    """Write a result one row at a time, the way it was written before"""
+    TaskResult.objects.filter(
+        answered_by=validated_data["answered_by"],
+        task=validated_data["task"],
+    ).delete()
+    answers = validated_data.pop("answers", [])
+    result = TaskResult.objects.create(**validated_data)
+    for answers_data in answers:
+        answer = answers_data.pop("answer", [])
+        question = QuestionConnectImageAnswer.objects.create(
+            assigned_to=result, **answers_data
+        )
+        for answer_data in answer:
+            Answer.objects.create(assigned_to_question=question, **answer_data)
+    return result
+
+
+class Command(BaseCommand):
+    """
+    Django command submitting connect pairs results with 1, 10 and 100
+    questions and reporting the results written per second, row by row
+    and with the bulk pipeline.
+    Everything is rolled back when the command finishes.
+    """
+
+    help = "Benchmark task result ingestion"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--questions", type=int, nargs="+", default=[1, 10, 100]
+        )
+        parser.add_argument("--answers", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def _payload(self, task, questions, answers):
+        """Return result data with `questions` questions"""
+        return {
+            "task": task.id,
+            "answers": [
+                {
+                    "answer": [
+                        {"data1": f"word{i}-{j}", "data2": f"pair{i}-{j}"}
+                        for j in range(answers)
+                    ]
+                }
+                for i in range(questions)
+            ],
+        }
+
+    def _rate(self, write, payload, user, repeat):
+        """Return the number of results written per second"""
+        context = {"request": SimpleNamespace(user=user)}
+        start = time.perf_counter()
+        for _ in range(repeat):
+            serializer = TaskDetailResultSerializer(
+                data=payload, context=context
+            )
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                write(serializer, user)
+        return repeat / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+
+        def bulk(serializer, user):
+            serializer.save(answered_by=user, date_created=timezone.now())
+
+        def legacy(serializer, user):
+            legacy_create(
+                {
+                    **serializer.validated_data,
+                    "answered_by": user,
+                    "date_created": timezone.now(),
+                }
+            )
+
+        with transaction.atomic():
+            user = User.objects.create(email="benchmark@example.com")
+            task = Task.objects.create(
+                name="Benchmark",
+                type=Task.Type.connect_pairs_text_text,
+                difficulty=Task.Difficulty.EASY,
+                created_by=user,
+            )
+            self.stdout.write(
+                f"{'questions':<12}{'legacy/s':>12}{'bulk/s':>12}"
+            )
+            for questions in options["questions"]:
+                payload = self._payload(task, questions, options["answers"])
+                rates = [
+                    self._rate(write, payload, user, options["repeat"])
+                    for write in (legacy, bulk)
+                ]
+                self.stdout.write(
+                    f"{questions:<12}{rates[0]:>12.1f}{rates[1]:>12.1f}"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,137 @@
+"""
+Django command to benchmark task listing against a large task table
+"""
+import statistics
+import time
+from itertools import combinations
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Task, User
+from task import filters, library
+
+
+def legacy_queryset(names):
+    """Build a task listing the way it was built before `task.filters`"""
+    tasks = Task.objects.filter(is_pooled=False)
+    if not names:
+        return tasks.order_by("-id").distinct()
+    queryset = tasks.none()
+    if "default" in names:
+        queryset = queryset | tasks.filter(
+            created_by=library.DEFAULT_LIBRARY_OWNER
+        )
+    if "custom" in names:
+        queryset = queryset | tasks.filter(is_custom=1)
+    if "generated" in names:
+        queryset = queryset | tasks.exclude(
+            created_by=library.DEFAULT_LIBRARY_OWNER
+        ).filter(is_custom=0)
+    return queryset.order_by("-id").distinct()
+
+
+def predicate_queryset(names):
+    """Build a task listing with a single compiled predicate"""
+    return (
+        Task.objects.filter(is_pooled=False)
+        .filter(filters.task_filter(names))
+        .order_by("-id")
+    )
+
+
+class Command(BaseCommand):
+    """
+    Django command filling the task table with generated rows and timing
+    the first page of every combination of listing filters.
+    Everything is rolled back when the command finishes.
+    """
+
+    help = "Benchmark task listing latency against a large task table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=1_000_000)
+        parser.add_argument("--owners", type=int, default=100)
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def _populate(self, tasks, owners):
+        """
+        Insert `tasks` tasks spread over the default library owner and
+        `owners` therapists, a third of the therapist tasks being custom.
+        """
+        users = User.objects.bulk_create(
+            User(email=f"benchmark{i}@example.com", is_therapist=True)
+            for i in range(owners)
+        )
+        owner_ids = [library.DEFAULT_LIBRARY_OWNER] + [
+            user.id for user in users
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO core_task
+                    (name, type, difficulty, created_by_id, is_custom,
+                     is_pooled)
+                SELECT
+                    'Benchmark ' || i,
+                    %s,
+                    %s,
+                    (%s::bigint[])[1 + i %% %s],
+                    i %% %s <> 0 AND i %% 3 = 0,
+                    false
+                FROM generate_series(1, %s) AS i
+                """,
+                [
+                    Task.Type.connect_pairs_text_image,
+                    Task.Difficulty.EASY,
+                    owner_ids,
+                    len(owner_ids),
+                    len(owner_ids),
+                    tasks,
+                ],
+            )
+            cursor.execute("ANALYZE core_task")
+
+    def _time(self, queryset, page_size, repeat):
+        """
+        Return the median time in milliseconds to count the tasks and
+        fetch the first page, as a paginated listing does.
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset.count()
+            list(queryset[:page_size])
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if not User.objects.filter(id=library.DEFAULT_LIBRARY_OWNER).exists():
+            self.stderr.write("The default library owner does not exist")
+            return
+        with transaction.atomic():
+            self.stdout.write(f"Inserting {options['tasks']} tasks...")
+            self._populate(options["tasks"], options["owners"])
+            self.stdout.write(
+                f"{'filters':<26}{'legacy ms':>12}{'predicate ms':>14}"
+            )
+            names = list(filters.TASK_FILTERS)
+            for size in range(len(names) + 1):
+                for selected in combinations(names, size):
+                    legacy = self._time(
+                        legacy_queryset(selected),
+                        options["page_size"],
+                        options["repeat"],
+                    )
+                    predicate = self._time(
+                        predicate_queryset(selected),
+                        options["page_size"],
+                        options["repeat"],
+                    )
+                    label = ",".join(selected) or "(none)"
+                    self.stdout.write(
+                        f"{label:<26}{legacy:>12.2f}{predicate:>14.2f}"
+                    )
+            transaction.set_rollback(True)
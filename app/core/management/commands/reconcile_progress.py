@@ -0,0 +1,25 @@
+"""
+Django command to rebuild the progress rollups from the task results
+"""
+from django.core.management.base import BaseCommand
+
+from task import progress
+
+
+class Command(BaseCommand):
+    """
+    Django command rebuilding the progress rollups of the last `--days`
+    days, or of every day, as the nightly job does for its last days.
+    """
+
+    help = "Rebuild the progress rollups from the task results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        count = progress.reconcile(options["days"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt the progress of {count} patients")
+        )
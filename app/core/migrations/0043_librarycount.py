@@ -0,0 +1,59 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_library(apps, schema_editor):
+    """Fill the counters from the existing basic choices"""
+    BasicChoice = apps.get_model("core", "BasicChoice")
+    LibraryCount = apps.get_model("core", "LibraryCount")
+    totals = BasicChoice.objects.values("created_by").annotate(
+        total=models.Count("id")
+    )
+    per_tag = BasicChoice.tags.through.objects.values(
+        "basicchoice__created_by", "tag"
+    ).annotate(total=models.Count("id"))
+    LibraryCount.objects.bulk_create(
+        [
+            LibraryCount(created_by_id=row["created_by"], count=row["total"])
+            for row in totals
+        ]
+        + [
+            LibraryCount(
+                created_by_id=row["basicchoice__created_by"],
+                tag_id=row["tag"],
+                count=row["total"],
+            )
+            for row in per_tag
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0042_delete_question'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('tag', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.tag')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='librarycount',
+            constraint=models.UniqueConstraint(fields=('created_by', 'tag'), name='unique_library_count_tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='librarycount',
+            constraint=models.UniqueConstraint(condition=models.Q(('tag__isnull', True)), fields=('created_by',), name='unique_library_count_total'),
+        ),
+        migrations.RunPython(count_library, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0044_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='is_pooled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_pooled', True)), fields=['type', 'difficulty'], name='task_pool_idx'),
+        ),
+    ]
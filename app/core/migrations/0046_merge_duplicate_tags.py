@@ -0,0 +1,64 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """
+    Merge tags sharing a user and a name into the oldest one, moving
+    their links and recounting the library counters of the kept tag.
+    """
+    Tag = apps.get_model("core", "Tag")
+    LibraryCount = apps.get_model("core", "LibraryCount")
+    relations = [
+        apps.get_model("core", model).tags
+        for model in ("Task", "BasicChoice", "CustomChoice")
+    ]
+    duplicates = (
+        Tag.objects.values("user", "name")
+        .annotate(keep=models.Min("id"), total=models.Count("id"))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        keep = row["keep"]
+        merged = list(
+            Tag.objects.filter(user=row["user"], name=row["name"])
+            .exclude(id=keep)
+            .values_list("id", flat=True)
+        )
+        for relation in relations:
+            through = relation.through
+            source = relation.field.m2m_field_name()
+            for tag_id in merged:
+                linked = through.objects.filter(tag_id=keep).values(source)
+                through.objects.filter(
+                    tag_id=tag_id, **{f"{source}__in": linked}
+                ).delete()
+                through.objects.filter(tag_id=tag_id).update(tag_id=keep)
+
+        LibraryCount.objects.filter(tag_id__in=[keep, *merged]).delete()
+        per_creator = (
+            relations[1].through.objects.filter(tag_id=keep)
+            .values("basicchoice__created_by")
+            .annotate(total=models.Count("id"))
+        )
+        LibraryCount.objects.bulk_create(
+            LibraryCount(
+                created_by_id=count["basicchoice__created_by"],
+                tag_id=keep,
+                count=count["total"],
+            )
+            for count in per_creator
+        )
+        Tag.objects.filter(id__in=merged).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0045_task_is_pooled'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0047_tag_unique_tag_user_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_pooled', False)), fields=['created_by', 'is_custom', '-id'], name='task_owner_custom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_pooled', False)), fields=['is_custom', '-id'], name='task_custom_idx'),
+        ),
+    ]
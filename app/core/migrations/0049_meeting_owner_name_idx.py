@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0048_task_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['created_by', '-name', '-id'], name='meeting_owner_name_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+FILL_SEARCH_VECTORS = """
+UPDATE core_task SET search_vector =
+    setweight(to_tsvector('simple', name), 'A')
+    || setweight(to_tsvector('simple', coalesce((
+        SELECT string_agg(tag.name, ' ')
+        FROM core_task_tags link JOIN core_tag tag ON tag.id = link.tag_id
+        WHERE link.task_id = core_task.id
+    ), '')), 'B');
+UPDATE core_basicchoice SET search_vector =
+    setweight(to_tsvector('simple', data1), 'A')
+    || setweight(to_tsvector('simple', coalesce((
+        SELECT string_agg(tag.name, ' ')
+        FROM core_basicchoice_tags link
+        JOIN core_tag tag ON tag.id = link.tag_id
+        WHERE link.basicchoice_id = core_basicchoice.id
+    ), '')), 'B');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0049_meeting_owner_name_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='basicchoice',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(FILL_SEARCH_VECTORS, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='basicchoice',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='basic_choice_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_idx'),
+        ),
+    ]
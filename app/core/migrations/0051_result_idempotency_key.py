@@ -0,0 +1,22 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0050_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskresult',
+            name='idempotency_key',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='taskresult',
+            constraint=models.UniqueConstraint(fields=('answered_by', 'idempotency_key'), name='unique_result_idempotency_key'),
+        ),
+    ]
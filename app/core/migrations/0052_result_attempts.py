@@ -0,0 +1,68 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+NUMBER_ATTEMPTS = """
+UPDATE core_taskresult SET attempt_no = numbered.attempt_no
+FROM (
+    SELECT id, row_number() OVER (
+        PARTITION BY answered_by_id, task_id ORDER BY date_created, id
+    ) AS attempt_no
+    FROM core_taskresult
+) numbered
+WHERE numbered.id = core_taskresult.id;
+"""
+
+POINT_LATEST = """
+INSERT INTO core_latesttaskresult (answered_by_id, task_id, result_id)
+SELECT DISTINCT ON (answered_by_id, task_id) answered_by_id, task_id, id
+FROM core_taskresult
+ORDER BY answered_by_id, task_id, attempt_no DESC;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0051_result_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestTaskResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskresult',
+            name='attempt_no',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunSQL(NUMBER_ATTEMPTS, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='taskresult',
+            constraint=models.UniqueConstraint(fields=('answered_by', 'task', 'attempt_no'), name='unique_result_attempt'),
+        ),
+        migrations.AddField(
+            model_name='latesttaskresult',
+            name='answered_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='latesttaskresult',
+            name='result',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='latest', to='core.taskresult'),
+        ),
+        migrations.AddField(
+            model_name='latesttaskresult',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.task'),
+        ),
+        migrations.AddConstraint(
+            model_name='latesttaskresult',
+            constraint=models.UniqueConstraint(fields=('answered_by', 'task'), name='unique_latest_result'),
+        ),
+        migrations.RunSQL(POINT_LATEST, migrations.RunSQL.noop),
+    ]
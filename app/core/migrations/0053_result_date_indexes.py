@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-17 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0052_result_attempts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskresult',
+            index=models.Index(fields=['answered_by', 'date_created'], name='result_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskresult',
+            index=models.Index(fields=['task', 'date_created'], name='result_task_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.13 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0053_result_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskresult',
+            name='accuracy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='taskresult',
+            name='correct_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='taskresult',
+            name='total_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.1.13 on 2026-10-17 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FILL_DAILY_PROGRESS = """
+INSERT INTO core_dailyprogress (
+    patient_id, day, task_type, difficulty,
+    result_count, correct_count, total_count
+)
+SELECT result.answered_by_id, result.date_created::date, task.type,
+    task.difficulty, count(*), coalesce(sum(result.correct_count), 0),
+    coalesce(sum(result.total_count), 0)
+FROM core_taskresult result JOIN core_task task ON task.id = result.task_id
+GROUP BY 1, 2, 3, 4;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0054_result_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('task_type', models.CharField(choices=[('Four_Choices_Image-Texts', 'Four Choices Image'), ('Four_Choices_Text-Images', 'Four Choices Text'), ('Connect_Pairs_Text-Image', 'Connect Pairs Text Image'), ('Connect_Pairs_Text-Text', 'Connect Pairs Text Text')], max_length=50)),
+                ('difficulty', models.CharField(choices=[('Easy', 'Easy'), ('Hard', 'Hard')], max_length=20)),
+                ('result_count', models.IntegerField(default=0)),
+                ('correct_count', models.IntegerField(default=0)),
+                ('total_count', models.IntegerField(default=0)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyprogress',
+            constraint=models.UniqueConstraint(fields=('patient', 'day', 'task_type', 'difficulty'), name='unique_daily_progress'),
+        ),
+        migrations.RunSQL(FILL_DAILY_PROGRESS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-17 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0055_daily_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('token', models.CharField(max_length=32)),
+            ],
+        ),
+    ]
@@ -6,6 +6,8 @@ import os
 
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -147,6 +149,28 @@ class Task(models.Model):
     )
     tags = models.ManyToManyField("Tag")
     is_custom = models.BooleanField(default=False)
+    is_pooled = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="task_search_idx"),
+            models.Index(
+                fields=["type", "difficulty"],
+                condition=models.Q(is_pooled=True),
+                name="task_pool_idx",
+            ),
+            models.Index(
+                fields=["created_by", "is_custom", "-id"],
+                condition=models.Q(is_pooled=False),
+                name="task_owner_custom_idx",
+            ),
+            models.Index(
+                fields=["is_custom", "-id"],
+                condition=models.Q(is_pooled=False),
+                name="task_custom_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -185,6 +209,12 @@ class BasicChoice(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="basic_choice_search_idx"),
+        ]
 
     def __str__(self):
         return self.data1
@@ -230,10 +260,83 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="unique_tag_user_name",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class LibraryCount(models.Model):
+    """
+    Model for storing the number of basic choices per creator and tag.
+    The row without a tag holds the total number of choices of the creator.
+    """
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, null=True,
+                            blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["created_by", "tag"],
+                name="unique_library_count_tag",
+            ),
+            models.UniqueConstraint(
+                fields=["created_by"],
+                condition=models.Q(tag__isnull=True),
+                name="unique_library_count_total",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.created_by_id}/{self.tag_id}: {self.count}"
+
+
+class GenerationJob(models.Model):
+    """Model for storing batch task generation jobs"""
+
+    class Status(models.TextChoices):
+        PENDING = "Pending"
+        RUNNING = "Running"
+        DONE = "Done"
+        FAILED = "Failed"
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="generation_jobs",
+    )
+    template = models.JSONField()
+    patients = models.JSONField()
+    results = models.JSONField(default=list, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    error = models.TextField(blank=True)
+    # Base url of the image links of the generated choices
+    base_url = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Generation job {self.id} ({self.status})"
+
+
 class TaskResult(models.Model):
     """Model for storing Task results"""
 
@@ -243,11 +346,106 @@ class TaskResult(models.Model):
     )
     task = models.ForeignKey(Task, on_delete=models.CASCADE)
     date_created = models.DateTimeField(auto_now=False)
+    # Number of the attempt of the user at the task, starting at 1
+    attempt_no = models.PositiveIntegerField(default=1, editable=False)
+    # Score of the answers, stored when the result is written. Null counts
+    # mark results not scored yet, and accuracy is null without answers.
+    correct_count = models.PositiveIntegerField(null=True, editable=False)
+    total_count = models.PositiveIntegerField(null=True, editable=False)
+    accuracy = models.FloatField(null=True, editable=False)
+    # Key generated by the client for results synced from offline use
+    idempotency_key = models.UUIDField(null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["answered_by", "idempotency_key"],
+                name="unique_result_idempotency_key",
+            ),
+            models.UniqueConstraint(
+                fields=["answered_by", "task", "attempt_no"],
+                name="unique_result_attempt",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["answered_by", "date_created"],
+                name="result_user_date_idx",
+            ),
+            models.Index(
+                fields=["task", "date_created"],
+                name="result_task_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return "Result task" + str(self.task.id)
 
 
+class LatestTaskResult(models.Model):
+    """Model pointing at the latest result of a user for a task"""
+
+    answered_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    result = models.OneToOneField(
+        TaskResult,
+        related_name="latest",
+        on_delete=models.CASCADE,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["answered_by", "task"],
+                name="unique_latest_result",
+            ),
+        ]
+
+
+class DailyProgress(models.Model):
+    """
+    Model for storing the results of a patient per day, task type and
+    difficulty, with the sums of their answer counts.
+    """
+
+    patient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    day = models.DateField()
+    task_type = models.CharField(max_length=50, choices=Task.Type.choices)
+    difficulty = models.CharField(
+        max_length=20, choices=Task.Difficulty.choices
+    )
+    result_count = models.IntegerField(default=0)
+    correct_count = models.IntegerField(default=0)
+    total_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["patient", "day", "task_type", "difficulty"],
+                name="unique_daily_progress",
+            ),
+        ]
+
+
+class VersionToken(models.Model):
+    """
+    Model for storing the version token of data served from caches,
+    changed in the transaction changing the data
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    token = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.key}: {self.token}"
+
+
 class QuestionConnectImageAnswer(models.Model):
     """Model for storing question answers"""
 
@@ -316,16 +514,24 @@ class Meeting(models.Model):
     start_time = models.DateTimeField(auto_now=False, auto_now_add=False)
     end_time = models.DateTimeField(auto_now=False, auto_now_add=False)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_by", "-name", "-id"],
+                name="meeting_owner_name_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
-@receiver(
-    pre_save, sender=TaskResult, dispatch_uid="post_save_taskresult_streak_handler"
-)
-def post_save_taskresult_streak_handler(sender, instance: TaskResult, **kargs):
+def update_day_streak(user):
+    """
+    Count a result posted now in the day streak of the user and save the
+    user. Results written in bulk skip signals, so their writers call it.
+    """
     print("Result uploaded")
-    user = instance.answered_by
     last_result = user.last_result_posted
     if not last_result:
         print("No Result Found")
@@ -341,3 +547,10 @@ def post_save_taskresult_streak_handler(sender, instance: TaskResult, **kargs):
         print("Found result, but not today or yesterday")
         user.day_streak = 1
     user.save()
+
+
+@receiver(
+    pre_save, sender=TaskResult, dispatch_uid="post_save_taskresult_streak_handler"
+)
+def post_save_taskresult_streak_handler(sender, instance: TaskResult, **kargs):
+    update_day_streak(instance.answered_by)
@@ -0,0 +1,140 @@
+"""
+Pagination for list APIs
+"""
+import datetime
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Encode datetimes and times with their microseconds, which
+    `DjangoJSONEncoder` truncates, so rows sharing a millisecond are not
+    skipped by the keyset predicate of the next page
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _flip(field):
+    """Reverse the direction of an ordering field"""
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on every ordering field of the queryset.
+    The queryset ordering is completed with the primary key, so it is
+    stable, and the cursor holds the values of all ordering fields of the
+    last row. A page is then fetched with a keyset predicate on those
+    fields instead of an OFFSET, so every page costs the same.
+    """
+
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = ("-id",)
+
+    def get_ordering(self, request, queryset, view):
+        """Return the queryset ordering completed with the primary key"""
+        ordering = tuple(queryset.query.order_by) or self.ordering
+        if not {"id", "pk"} & {field.lstrip("-") for field in ordering}:
+            ordering += ("-id",)
+        return ordering
+
+    def decode_cursor(self, request):
+        """Decode the cursor and the ordering field values it holds"""
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            position = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(
+            self.ordering
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def _after(self, ordering, position):
+        """
+        Return the predicate of the rows after `position` in `ordering`,
+        comparing the ordering fields lexicographically.
+        """
+        after = None
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            term = equal & Q(**{f"{name}__{lookup}": value})
+            after = term if after is None else after | term
+            equal &= Q(**{name: value})
+        return after
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = (
+            [_flip(field) for field in self.ordering]
+            if reverse else list(self.ordering)
+        )
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._after(ordering, self.cursor.position)
+            )
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Return the JSON encoded ordering field values of a row"""
+        position = []
+        for field in ordering:
+            name = field.lstrip("-")
+            value = (
+                instance[name] if isinstance(instance, dict)
+                else getattr(instance, name)
+            )
+            position.append(value.pk if isinstance(value, Model) else value)
+        return json.dumps(position, cls=CursorEncoder)
+
+    def _link(self, instance, reverse):
+        """Return the link of the page next to a row"""
+        position = self._get_position_from_instance(instance, self.ordering)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=reverse, position=position)
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
@@ -1,11 +1,14 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from django.conf import settings
 from django_apscheduler.jobstores import DjangoJobStore, register_events
 from django.utils import timezone
 from django.utils.timezone import timedelta
 import sys
 
 from core.models import User
+from task import batch, pool, progress
 
 
 def check_daystreak():
@@ -34,6 +37,31 @@ def start():
         jobstore="default",
         replace_existing=True,
     )
+    scheduler.add_job(
+        pool.refill,
+        trigger=IntervalTrigger(minutes=settings.TASK_POOL_REFILL_MINUTES),
+        id="refill_task_pool",
+        name="refill_task_pool",
+        jobstore="default",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        progress.reconcile,
+        trigger=CronTrigger(hour="01", minute="00"),
+        kwargs={"days": settings.TASK_PROGRESS_RECONCILE_DAYS},
+        id="reconcile_progress",
+        name="reconcile_progress",
+        jobstore="default",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        batch.recover,
+        trigger=IntervalTrigger(minutes=settings.TASK_BATCH_STALE_MINUTES),
+        id="recover_generation_jobs",
+        name="recover_generation_jobs",
+        jobstore="default",
+        replace_existing=True,
+    )
     register_events(scheduler)
     scheduler.start()
     print("Scheduler started...", file=sys.stdout)
@@ -0,0 +1,155 @@
+"""
+Sparse fieldsets and expansion control for API views.
+`?fields=` lists the fields to render and `?expand=` the expandable
+nested fields to include, both as comma separated paths where a dot
+selects inside a nested serializer, e.g. `?fields=id,name,questions.id`.
+Fields left out are never serialized, and views drop the prefetches of
+the relations they would have read.
+"""
+import hashlib
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer
+
+SPARSE_PARAMS = ("fields", "expand")
+
+
+def parse_paths(value):
+    """
+    Parse comma separated dotted paths into a tree mapping each name to
+    the tree of its sub paths, or to `None` when it is selected whole.
+    Return `None` when there is no value.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for path in filter(None, (path.strip() for path in value.split(","))):
+        name, _, rest = path.partition(".")
+        if rest and tree.get(name, ()) is not None:
+            tree.setdefault(name, []).append(rest)
+        else:
+            tree[name] = None
+    return {
+        name: None if rest is None else parse_paths(",".join(rest))
+        for name, rest in tree.items()
+    }
+
+
+def relation_paths(serializer, prefix=""):
+    """
+    Return the ORM lookups, such as `questions__choices`, of every
+    relation rendered by the serializer and its nested serializers.
+    """
+    serializer = getattr(serializer, "child", serializer)
+    paths = set()
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        if isinstance(field, (BaseSerializer, RelatedField, ManyRelatedField)):
+            path = prefix + field.source.replace(".", "__")
+            paths.add(path)
+            if isinstance(field, BaseSerializer):
+                paths |= relation_paths(field, f"{path}__")
+    return paths
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin taking `fields` and `expand` trees, as returned by
+    `parse_paths`. When `fields` is given only the listed fields are kept.
+    Otherwise the fields named in `Meta.expandable_fields` are only kept
+    when `expand` is not given or names them. The trees are applied to
+    nested serializers in the same way.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None or expand is not None:
+            self.restrict(fields, expand)
+
+    def restrict(self, fields=None, expand=None):
+        """Drop the fields not selected by the `fields` and `expand` trees"""
+        expandable = getattr(self.Meta, "expandable_fields", ())
+        for name in list(self.fields):
+            if fields is not None:
+                keep = name in fields
+            else:
+                keep = (
+                    name not in expandable or expand is None or name in expand
+                )
+            if not keep:
+                self.fields.pop(name)
+                continue
+            child = getattr(self.fields[name], "child", self.fields[name])
+            if isinstance(child, SparseFieldsMixin):
+                child.restrict(
+                    fields.get(name) if fields is not None else None,
+                    expand.get(name) if expand is not None else None,
+                )
+
+
+class SparseFieldsViewMixin:
+    """
+    View mixin passing the `fields` and `expand` query parameters of safe
+    requests to serializers using `SparseFieldsMixin`.
+    """
+
+    def sparse_kwargs(self, serializer_class):
+        """
+        Return the `fields` and `expand` arguments of `serializer_class`
+        for the request.
+        """
+        request = getattr(self, "request", None)
+        if (
+            request is None
+            or request.method not in SAFE_METHODS
+            or not issubclass(serializer_class, SparseFieldsMixin)
+        ):
+            return {}
+        return {
+            name: parse_paths(request.query_params.get(name))
+            for name in SPARSE_PARAMS
+        }
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs = {
+            **self.sparse_kwargs(self.get_serializer_class()),
+            **kwargs,
+        }
+        return super().get_serializer(*args, **kwargs)
+
+    def sparse_key(self):
+        """
+        Return a digest of the sparse fieldset parameters of the request,
+        or an empty string when there are none.
+        """
+        params = [
+            (name, self.request.query_params.get(name))
+            for name in SPARSE_PARAMS
+        ]
+        if all(value is None for _, value in params):
+            return ""
+        return hashlib.sha1(repr(params).encode()).hexdigest()
+
+    def sparse_lookups(self, plan, serializer=None):
+        """
+        Return the lookups of the prefetch `plan`, each cut down to the
+        relations `serializer`, by default the serializer of the request,
+        still renders.
+        """
+        if serializer is None:
+            serializer = self.get_serializer()
+        rendered = relation_paths(serializer)
+        lookups = []
+        for lookup in plan:
+            parts = lookup.split("__")
+            while parts and "__".join(parts) not in rendered:
+                parts.pop()
+            if parts:
+                lookups.append("__".join(parts))
+        return list(dict.fromkeys(lookups))
+
+    def sparse_prefetch(self, queryset, plan):
+        """Prefetch the lookups of `plan` still rendered for the request"""
+        return queryset.prefetch_related(*self.sparse_lookups(plan))
@@ -5,9 +5,20 @@ from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.models import (
+    Answer,
+    AnswerFourChoice,
+    DailyProgress,
+    QuestionConnectImageAnswer,
+    Task,
+    TaskResult,
+)
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -32,3 +43,89 @@ class CommandTests(SimpleTestCase):
         call_command("wait_for_db")
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class BackfillResultScoresTests(TestCase):
+    """Test storing the scores of unscored results"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "patient@example.com", "testpass123"
+        )
+        self.task = Task.objects.create(
+            name="Task",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+
+    def create_result(self, *answers):
+        """Create an unscored result with answers of the given models"""
+        result = TaskResult.objects.create(
+            answered_by=self.user,
+            task=self.task,
+            date_created=timezone.now(),
+            attempt_no=TaskResult.objects.count() + 1,
+        )
+        question = QuestionConnectImageAnswer.objects.create(
+            assigned_to=result
+        )
+        for answer_model, is_correct in answers:
+            if answer_model is Answer:
+                Answer.objects.create(
+                    assigned_to_question=question,
+                    data1="a",
+                    data2="b",
+                    is_correct=is_correct,
+                )
+            else:
+                AnswerFourChoice.objects.create(
+                    assigned_to_question=question,
+                    question_data="q",
+                    correct_option="a",
+                    incorrect_option1="b",
+                    incorrect_option2="c",
+                    incorrect_option3="d",
+                    chosen_option="a",
+                    is_correct=is_correct,
+                )
+        return result
+
+    def test_backfill_scores_in_batches(self):
+        """Test every unscored result is scored across batches"""
+        connect = self.create_result((Answer, True), (Answer, False))
+        four = self.create_result(
+            (AnswerFourChoice, True), (AnswerFourChoice, True)
+        )
+        empty = self.create_result()
+
+        call_command("backfill_result_scores", batch_size=2)
+
+        scores = {
+            result.id: (
+                result.correct_count, result.total_count, result.accuracy
+            )
+            for result in TaskResult.objects.all()
+        }
+        self.assertEqual(
+            scores,
+            {
+                connect.id: (1, 2, 0.5),
+                four.id: (2, 2, 1.0),
+                empty.id: (0, 0, None),
+            },
+        )
+
+    def test_backfill_updates_progress(self):
+        """Test rollups built before the backfill count the new scores"""
+        self.create_result((Answer, True), (Answer, False))
+        self.create_result((AnswerFourChoice, True), (AnswerFourChoice, True))
+        call_command("reconcile_progress")
+
+        call_command("backfill_result_scores", batch_size=1)
+
+        rollup = DailyProgress.objects.get(patient=self.user)
+        self.assertEqual(
+            (rollup.result_count, rollup.correct_count, rollup.total_count),
+            (2, 3, 4),
+        )
@@ -0,0 +1,120 @@
+"""
+Tests for keyset pagination of list APIs
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Meeting, Task, TaskResult
+
+MEETINGS_URL = reverse("meeting:meeting-list")
+RESULTS_URL = reverse("task:taskresult-list")
+
+
+class KeysetPaginationTests(TestCase):
+    """Test paginating a list API with cursors"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_therapist_user(
+            "therapist@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.meetings = [
+            Meeting.objects.create(
+                name=name,
+                created_by=self.user,
+                start_time=start,
+                end_time=start,
+            )
+            for name in ["b", "a", "b", "c", "a", "b", "c"]
+        ]
+        self.expected = [
+            meeting.id for meeting in sorted(
+                self.meetings,
+                key=lambda meeting: (meeting.name, meeting.id),
+                reverse=True,
+            )
+        ]
+
+    def walk(self, url, link):
+        """Follow `link` from `url` and return the ids of every page"""
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([meeting["id"] for meeting in res.data["results"]])
+            url = res.data[link]
+        return pages
+
+    def test_pages_follow_ordering_with_ties(self):
+        """Test pages cover every row once in a stable order"""
+        pages = self.walk(f"{MEETINGS_URL}?page_size=2", "next")
+
+        self.assertEqual(len(pages), 4)
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_previous_links_walk_back(self):
+        """Test previous links return the same pages in reverse"""
+        url = f"{MEETINGS_URL}?page_size=3"
+        for _ in range(2):
+            url = self.client.get(url).data["next"]
+
+        pages = self.walk(url, "previous")
+
+        self.assertEqual(
+            pages, [self.expected[6:], self.expected[3:6], self.expected[:3]]
+        )
+
+    def test_page_does_not_use_offset(self):
+        """Test a later page is fetched with a keyset predicate"""
+        url = self.client.get(f"{MEETINGS_URL}?page_size=2").data["next"]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertNotIn("OFFSET", queries.captured_queries[0]["sql"])
+
+    def test_invalid_cursor(self):
+        """Test an invalid cursor is rejected"""
+        res = self.client.get(MEETINGS_URL, {"cursor": "invalid"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pages_keep_microseconds(self):
+        """Test rows sharing a millisecond are all paged"""
+        patient = get_user_model().objects.create_user(
+            "patient@example.com", "testpass123"
+        )
+        task = Task.objects.create(
+            name="Task",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+        created = datetime(2026, 1, 1, 12, 0, 0, 123000)
+        results = [
+            TaskResult.objects.create(
+                answered_by=patient,
+                task=task,
+                attempt_no=attempt_no,
+                date_created=created + timedelta(microseconds=attempt_no),
+            )
+            for attempt_no in range(1, 4)
+        ]
+        self.client.force_authenticate(patient)
+
+        pages = self.walk(f"{RESULTS_URL}?page_size=1", "next")
+
+        self.assertEqual(
+            sum(pages, []), [result.id for result in reversed(results)]
+        )
@@ -0,0 +1,35 @@
+"""
+Tests for sparse fieldsets
+"""
+from django.test import SimpleTestCase
+
+from core.sparse import parse_paths
+
+
+class ParsePathsTests(SimpleTestCase):
+    """Test parsing the `fields` and `expand` query parameters"""
+
+    def test_no_value(self):
+        """Test a missing parameter selects nothing in particular"""
+        self.assertIsNone(parse_paths(None))
+
+    def test_empty_value(self):
+        """Test an empty parameter selects no field"""
+        self.assertEqual(parse_paths(""), {})
+
+    def test_nested_paths(self):
+        """Test dotted paths build a tree of nested fields"""
+        tree = parse_paths("id, questions.choices.data1,questions.id")
+
+        self.assertEqual(
+            tree,
+            {
+                "id": None,
+                "questions": {"choices": {"data1": None}, "id": None},
+            },
+        )
+
+    def test_whole_field_wins(self):
+        """Test selecting a whole field overrides its sub paths"""
+        self.assertEqual(parse_paths("tags.name,tags"), {"tags": None})
+        self.assertEqual(parse_paths("tags,tags.name"), {"tags": None})
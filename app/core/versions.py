@@ -0,0 +1,55 @@
+"""
+Version tokens persisted in the database.
+A token is replaced in the transaction changing the data behind it, so
+every process reads the same token, which is never older than the
+committed data. Tokens shared by every write, such as those of whole
+listings, are instead replaced once the transaction commits, so writes
+do not queue on their row. Keys whose data never changed share the
+initial token.
+"""
+import uuid
+
+from django.db import transaction
+
+from core.models import VersionToken
+
+INITIAL_VERSION = "0"
+
+
+def get_versions(keys):
+    """Return a dict of the version tokens stored under the keys"""
+    keys = list(keys)
+    found = dict(
+        VersionToken.objects.filter(key__in=keys).values_list("key", "token")
+    )
+    return {key: found.get(key, INITIAL_VERSION) for key in keys}
+
+
+def get_version(key):
+    """Return the version token stored under `key`"""
+    return get_versions([key])[key]
+
+
+def bump_versions(keys):
+    """
+    Replace the version tokens under `keys` in the current transaction.
+    Keys are written in order, so concurrent bumps never deadlock.
+    """
+    keys = sorted(set(keys))
+    if keys:
+        VersionToken.objects.bulk_create(
+            [VersionToken(key=key, token=uuid.uuid4().hex) for key in keys],
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["token"],
+        )
+
+
+def bump_versions_on_commit(keys):
+    """
+    Replace the version tokens under `keys` once the current transaction
+    commits, outside of it. For tokens bumped by most writes, whose row
+    would otherwise be locked until the writing transaction ends.
+    """
+    keys = list(keys)
+    transaction.on_commit(lambda: bump_versions(keys))
@@ -1,6 +1,7 @@
 """Serializers for meeting API"""
 from rest_framework import serializers
 from core.models import Meeting, User
+from core.sparse import SparseFieldsMixin
 from django.core.exceptions import ObjectDoesNotExist
 
 
@@ -18,7 +19,7 @@ class CustomSlugRelatedField(serializers.SlugRelatedField):
             self.fail("invalid")
 
 
-class MeetingSerializer(serializers.ModelSerializer):
+class MeetingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for meetings"""
 
     assigned_patient = CustomSlugRelatedField(
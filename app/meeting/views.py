@@ -6,10 +6,11 @@ from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from core.models import Meeting
+from core.sparse import SparseFieldsViewMixin
 from meeting import serializers
 
 
-class MeetingViewSet(viewsets.ModelViewSet):
+class MeetingViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """
     View for managing Meetings.
     """
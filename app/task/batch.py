@@ -0,0 +1,145 @@
+"""
+Batch generation of tasks for whole caseloads.
+A job generates one task per patient from a shared template. Jobs run on
+a worker pool outside of the request. Each job generates all of its tasks
+in memory and writes them with a fixed number of bulk inserts.
+The pool only lives in the memory of a worker process, so jobs left
+pending or running by a process that stopped are recovered by a periodic
+job, which runs them again or fails them after too many attempts.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import GenerationJob, User
+from task import generation
+from task.bulk import link
+from user import versions
+
+MAX_ATTEMPTS = 3
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.TASK_BATCH_WORKERS,
+    thread_name_prefix="task-batch",
+)
+
+
+@transaction.atomic
+def generate_batch(job, build_url):
+    """
+    Generate, write and assign one task per patient of the job.
+    Returns the `{"patient": id, "task": id}` pairs that were created.
+    """
+    patients = job.patients
+    tasks = generation.create_generated_tasks(
+        job.template, len(patients), job.created_by, build_url,
+        is_custom=True,
+    )
+    link(
+        User.assigned_tasks,
+        [(patient, task.id) for patient, task in zip(patients, tasks)],
+    )
+    versions.profiles_changed(patients)
+    versions.patients_changed(patients)
+    return [
+        {"patient": patient, "task": task.id}
+        for patient, task in zip(patients, tasks)
+    ]
+
+
+def run_job(job_id):
+    """
+    Run a pending generation job and record its outcome on the job.
+    The job is claimed by moving it to running, so a job submitted twice
+    runs once, and its row stays locked while its tasks are generated.
+    """
+    jobs = GenerationJob.objects.filter(id=job_id)
+    claimed = jobs.filter(status=GenerationJob.Status.PENDING).update(
+        status=GenerationJob.Status.RUNNING,
+        attempts=F("attempts") + 1,
+        date_started=timezone.now(),
+    )
+    if not claimed:
+        return
+    try:
+        with transaction.atomic():
+            job = (
+                GenerationJob.objects.select_for_update(of=("self",))
+                .select_related("created_by")
+                .get(id=job_id)
+            )
+            results = generate_batch(
+                job, lambda path: urljoin(job.base_url, path)
+            )
+            jobs.update(
+                status=GenerationJob.Status.DONE,
+                results=results,
+                date_finished=timezone.now(),
+            )
+    except Exception as error:
+        jobs.update(
+            status=GenerationJob.Status.FAILED,
+            error=str(error),
+            date_finished=timezone.now(),
+        )
+
+
+def _run_in_worker(job_id):
+    """Run a job on a worker thread and release its database connection"""
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def submit(job_id):
+    """Run the job on the worker pool once the current transaction commits"""
+    transaction.on_commit(lambda: executor.submit(_run_in_worker, job_id))
+
+
+def recover():
+    """
+    Run again the jobs left pending or running by a stopped process, and
+    fail those that already ran `MAX_ATTEMPTS` times. Jobs are stale once
+    they were created, or started, `TASK_BATCH_STALE_MINUTES` ago. Running
+    jobs whose row is still locked are being generated and are skipped.
+    Returns the number of jobs recovered.
+    """
+    now = timezone.now()
+    stale = now - timedelta(minutes=settings.TASK_BATCH_STALE_MINUTES)
+    with transaction.atomic():
+        job_ids = list(
+            GenerationJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(
+                    status=GenerationJob.Status.PENDING,
+                    date_created__lt=stale,
+                )
+                | Q(
+                    status=GenerationJob.Status.RUNNING,
+                    date_started__lt=stale,
+                )
+            )
+            .values_list("id", flat=True)
+        )
+        jobs = GenerationJob.objects.filter(id__in=job_ids)
+        jobs.filter(
+            status=GenerationJob.Status.RUNNING, attempts__gte=MAX_ATTEMPTS
+        ).update(
+            status=GenerationJob.Status.FAILED,
+            error="The job was interrupted too many times",
+            date_finished=now,
+        )
+        jobs.filter(status=GenerationJob.Status.RUNNING).update(
+            status=GenerationJob.Status.PENDING
+        )
+        for job_id in jobs.filter(
+            status=GenerationJob.Status.PENDING
+        ).values_list("id", flat=True):
+            submit(job_id)
+    return len(job_ids)
@@ -0,0 +1,313 @@
+"""
+Bulk write pipeline for task questions and task results
+"""
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import (
+    LatestTaskResult,
+    QuestionConnectImageAnswer,
+    Tag,
+    TaskResult,
+    User,
+    update_day_streak,
+)
+from task import progress
+from user import versions
+
+
+def resolve_tags(user, names):
+    """
+    Return a map of tag name to tag id for the given user.
+    Missing tags are created with one bulk insert that skips existing
+    tags, including tags created concurrently, and all of the tags are
+    then read back with one select.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    Tag.objects.bulk_create(
+        [Tag(user=user, name=name) for name in names],
+        ignore_conflicts=True,
+    )
+    return dict(
+        Tag.objects.filter(user=user, name__in=names).values_list(
+            "name", "id"
+        )
+    )
+
+
+class TagResolver:
+    """
+    Resolve the tag names of a user to tag ids, creating missing tags.
+    Names are memoized, so each name is resolved at most once no matter
+    how many serializers and choices of a request carry it.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._ids = {}
+
+    def resolve(self, names):
+        """Return the ids of the tags with the given names"""
+        names = list(dict.fromkeys(names))
+        missing = [name for name in names if name not in self._ids]
+        if missing:
+            self._ids.update(resolve_tags(self.user, missing))
+        return [self._ids[name] for name in names]
+
+    def resolve_data(self, tags):
+        """Return the ids of validated tag data with a `name`"""
+        return self.resolve(tag["name"] for tag in tags)
+
+
+def tag_resolver(request):
+    """Return the tag resolver of the request, creating it on first use"""
+    resolver = getattr(request, "_tag_resolver", None)
+    if resolver is None or resolver.user != request.user:
+        resolver = request._tag_resolver = TagResolver(request.user)
+    return resolver
+
+
+def link(relation, rows):
+    """
+    Bulk insert `(source id, target id)` rows into the through table of
+    a many to many relation.
+    """
+    through = relation.through
+    source = relation.field.m2m_field_name() + "_id"
+    target = relation.field.m2m_reverse_field_name() + "_id"
+    through.objects.bulk_create(
+        [through(**{source: s, target: t}) for s, t in rows]
+    )
+
+
+class QuestionWriter:
+    """
+    Collect the questions and choices of one or more tasks in memory and
+    write them with a fixed number of `bulk_create` calls, no matter how
+    many questions there are.
+    Each choice is a dict of choice field values. It may also carry `tags`
+    (validated tag data with a `name`) and `tag_ids` (ids of existing tags).
+    Tag names are resolved by `resolver`, shared with the rest of the
+    request if given.
+    """
+
+    def __init__(self, question_model, choice_model, user, resolver=None,
+                 **choice_defaults):
+        self.question_model = question_model
+        self.choice_model = choice_model
+        self.user = user
+        self.resolver = resolver or TagResolver(user)
+        self.choice_defaults = choice_defaults
+        self._questions = []
+
+    def add_question(self, task, choices):
+        """Queue a question of the task with the given choices"""
+        self._questions.append((task, [dict(choice) for choice in choices]))
+
+    @transaction.atomic
+    def write(self):
+        """Write all queued questions and return them"""
+        questions = self.question_model.objects.bulk_create(
+            [self.question_model(assigned_to=task)
+             for task, _ in self._questions]
+        )
+
+        choices = []
+        choice_tags = []
+        question_choices = []
+        for question, (task, choices_data) in zip(questions, self._questions):
+            for data in choices_data:
+                names = [tag["name"] for tag in data.pop("tags", [])]
+                tag_ids = list(data.pop("tag_ids", []))
+                choices.append(
+                    self.choice_model(
+                        assigned_to=task, **self.choice_defaults, **data
+                    )
+                )
+                choice_tags.append((names, tag_ids))
+                question_choices.append(question)
+        self.choice_model.objects.bulk_create(choices)
+
+        names = list(dict.fromkeys(
+            name for tag_names, _ in choice_tags for name in tag_names
+        ))
+        tags = dict(zip(names, self.resolver.resolve(names)))
+        tag_rows = [
+            (choice.id, tag_id)
+            for choice, (tag_names, tag_ids) in zip(choices, choice_tags)
+            for tag_id in dict.fromkeys(
+                tag_ids + [tags[name] for name in tag_names]
+            )
+        ]
+        if tag_rows:
+            link(self.choice_model.tags, tag_rows)
+
+        link(
+            self.question_model.choices,
+            [(question.id, choice.id)
+             for question, choice in zip(question_choices, choices)],
+        )
+        return questions
+
+
+@transaction.atomic
+def write_answers(entries):
+    """
+    Write the answered questions of results with one `bulk_create` for
+    the questions and one per answer model, no matter how many results
+    and questions there are.
+    `entries` are `(result, questions, answer_model, answer_field)`
+    tuples, `questions` being validated question data holding the answer
+    data under `answer_field`. The question ids returned by the first
+    insert link the answers.
+    """
+    questions = []
+    answers = []
+    for result, result_questions, answer_model, answer_field in entries:
+        for data in result_questions:
+            data = dict(data)
+            answers.append((answer_model, data.pop(answer_field, [])))
+            questions.append(
+                QuestionConnectImageAnswer(assigned_to=result, **data)
+            )
+    rows = QuestionConnectImageAnswer.objects.bulk_create(questions)
+    by_model = {}
+    for question, (answer_model, question_answers) in zip(rows, answers):
+        by_model.setdefault(answer_model, []).extend(
+            answer_model(assigned_to_question=question, **data)
+            for data in question_answers
+        )
+    for answer_model, objs in by_model.items():
+        answer_model.objects.bulk_create(objs)
+    return rows
+
+
+def score(result, questions, answer_field):
+    """
+    Set the correct and total answer counts and the accuracy of an
+    unsaved result from its validated question data, holding the answer
+    data under `answer_field`.
+    """
+    answers = [
+        answer for data in questions for answer in data.get(answer_field, [])
+    ]
+    result.total_count = len(answers)
+    result.correct_count = sum(
+        answer.get("is_correct", True) for answer in answers
+    )
+    result.accuracy = (
+        result.correct_count / result.total_count
+        if result.total_count else None
+    )
+    return result
+
+
+def lock_user(user):
+    """
+    Lock the row of the user until the transaction ends, so that
+    concurrent writes of results of the user take turns.
+    """
+    User.objects.select_for_update().get(pk=user.pk)
+
+
+def append_results(user, results):
+    """
+    Insert unsaved results of the user as new attempts and return them.
+    Every result is numbered after the last attempt of the user at its
+    task, and the latest result pointers of the tasks are moved to the
+    new results with one upsert. Nothing is updated or deleted in the
+    result tables. The day streak and progress rollups of the user are
+    updated and the dashboard of their therapist invalidated. The caller
+    must hold `lock_user`.
+    """
+    last = dict(
+        TaskResult.objects.filter(
+            answered_by=user,
+            task_id__in={result.task_id for result in results},
+        )
+        .values("task_id")
+        .annotate(last=Max("attempt_no"))
+        .values_list("task_id", "last")
+    )
+    for result in results:
+        result.attempt_no = last[result.task_id] = (
+            last.get(result.task_id, 0) + 1
+        )
+    update_day_streak(user)
+    rows = TaskResult.objects.bulk_create(results)
+    progress.results_added(rows)
+    versions.dashboards_changed([user.assigned_to_id])
+    latest = {row.task_id: row for row in rows}
+    LatestTaskResult.objects.bulk_create(
+        [
+            LatestTaskResult(answered_by=user, task_id=task_id, result=row)
+            for task_id, row in latest.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["answered_by", "task"],
+        update_fields=["result"],
+    )
+    return rows
+
+
+@transaction.atomic
+def write_results(user, results):
+    """
+    Write synced results of the user and return the id of every result
+    and whether it was created, in order.
+    `results` is validated result data holding an `idempotency_key`, and
+    the `answer_model` and `answer_field` of its answers. A result whose
+    key is already stored, or repeated in `results`, is not written
+    again. The user row is locked so that concurrent syncs of the same
+    user wait for each other's keys, and all of the new results are
+    appended together.
+    """
+    lock_user(user)
+    keys = [data["idempotency_key"] for data in results]
+    stored = dict(
+        TaskResult.objects.filter(
+            answered_by=user, idempotency_key__in=keys
+        ).values_list("idempotency_key", "id")
+    )
+    new = {}
+    for data in results:
+        if data["idempotency_key"] not in stored:
+            new.setdefault(data["idempotency_key"], data)
+    if new:
+        rows = append_results(
+            user,
+            [
+                score(
+                    TaskResult(
+                        answered_by=user,
+                        task=data["task"],
+                        date_created=data.get("date_created")
+                        or timezone.now(),
+                        idempotency_key=key,
+                    ),
+                    data["answers"],
+                    data["answer_field"],
+                )
+                for key, data in new.items()
+            ],
+        )
+        write_answers(
+            (
+                row,
+                data["answers"],
+                data["answer_model"],
+                data["answer_field"],
+            )
+            for row, data in zip(rows, new.values())
+        )
+        created = {row.idempotency_key: row.id for row in rows}
+    else:
+        created = {}
+    ids = {**stored, **created}
+    written = []
+    for key in keys:
+        written.append((ids[key], created.pop(key, None) is not None))
+    return written
@@ -0,0 +1,46 @@
+"""
+Cache of rendered task detail payloads.
+Payloads are stored per task and serializer variant under the version
+token of the task, which is stored in the database. A change to the task
+replaces its token in the same transaction, so every process rebuilds
+every variant on the next read and a payload rendered from data read
+before the change is never served.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+HITS_KEY = "task:detail:hits"
+MISSES_KEY = "task:detail:misses"
+
+
+def _count(key):
+    """Increment a hit or miss counter"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def payload_key(task_id, variant, version):
+    """Return the cache key of the payload of a task variant at a version"""
+    return f"task:detail:{variant}:{task_id}:{version}"
+
+
+def get_payload(key):
+    """Return the cached payload under `key`, or `None`"""
+    payload = cache.get(key)
+    _count(MISSES_KEY if payload is None else HITS_KEY)
+    return payload
+
+
+def set_payload(key, payload):
+    """Cache a rendered payload under `key`"""
+    cache.set(key, payload, settings.TASK_DETAIL_CACHE_TIMEOUT)
+
+
+def stats():
+    """Return the hit and miss counters of the cache"""
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+    }
@@ -0,0 +1,177 @@
+"""
+Generation of exercise questions from the default library
+"""
+import hashlib
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import (
+    CustomChoice,
+    CustomQuestion,
+    FourChoice,
+    FourQuestion,
+    Task,
+)
+from task import library, sampler, search, versions
+from task.bulk import QuestionWriter, TagResolver, link
+
+
+def _connect_pairs_text_image(basic_choices, build_url):
+    """
+    Return the choices of a connect pairs question with a text and an
+    image per sampled library choice.
+    """
+    return [
+        {
+            "data1": basic_choice.data1,
+            "data2": build_url(sampler.image_path(basic_choice.image)),
+            "tag_ids": basic_choice.tags,
+        }
+        for basic_choice in basic_choices
+    ]
+
+
+def _four_choices_image_text(basic_choices, build_url):
+    """
+    Return the choice of a four choices question with an image and text
+    options.
+    """
+    random_choices = list(basic_choices)
+    first_choice = random_choices.pop()
+    return [{
+        "question_data": build_url(sampler.image_path(first_choice.image)),
+        "correct_option": first_choice.data1,
+        "incorrect_option1": random_choices.pop().data1,
+        "incorrect_option2": random_choices.pop().data1,
+        "incorrect_option3": random_choices.pop().data1,
+    }]
+
+
+def _four_choices_text_image(basic_choices, build_url):
+    """
+    Return the choice of a four choices question with a text and image
+    options.
+    """
+    random_choices = list(basic_choices)
+    first_choice = random_choices.pop()
+    return [{
+        "question_data": first_choice.data1,
+        "correct_option": build_url(sampler.image_path(first_choice.image)),
+        "incorrect_option1": build_url(
+            sampler.image_path(random_choices.pop().image)
+        ),
+        "incorrect_option2": build_url(
+            sampler.image_path(random_choices.pop().image)
+        ),
+        "incorrect_option3": build_url(
+            sampler.image_path(random_choices.pop().image)
+        ),
+    }]
+
+
+QUESTION_BUILDERS = {
+    Task.Type.connect_pairs_text_image: _connect_pairs_text_image,
+    Task.Type.four_choices_image: _four_choices_image_text,
+    Task.Type.four_choices_text: _four_choices_text_image,
+}
+
+
+def _sample(task_type, seed, tags):
+    """
+    Draw the library choices of a task, grouped by question.
+    Seeded draws are reproducible for the same library version and are
+    cached under `(type, seed, tags, library version)`.
+    """
+    count = library.GENERATED_QUESTION_COUNT
+    size = library.CHOICES_PER_QUESTION[task_type]
+    tags = sorted(set(tags))
+    if seed is None:
+        return sampler.sample_groups(count, size, tags=tags)
+
+    version, _ = sampler.snapshot.current()
+    theme = hashlib.sha1("\n".join(tags).encode()).hexdigest()
+    key = f"task:generated:{task_type}:{seed}:{theme}:{version}"
+    groups = cache.get(key)
+    if groups is None:
+        rng = random.Random(f"{task_type}:{seed}")
+        groups = sampler.sample_groups(count, size, rng=rng, tags=tags)
+        cache.set(key, groups, settings.TASK_GENERATED_CACHE_TIMEOUT)
+    return groups
+
+
+def generate_questions(task_type, build_url, seed=None, tags=()):
+    """
+    Generate the questions of a task of the given type.
+    Returns one list of choice field values per question. All choices are
+    drawn from the library in one pass, only from choices carrying all
+    of the `tags` names if given. `build_url` turns an image path into an
+    absolute url. The same `seed` always generates the same questions
+    from the same library.
+    Raises `ValueError` if the type cannot be generated or the library
+    is too small.
+    """
+    if task_type not in QUESTION_BUILDERS:
+        raise ValueError(f"Task type {task_type} cannot be generated")
+    build = QUESTION_BUILDERS[task_type]
+    return [
+        build(group, build_url) for group in _sample(task_type, seed, tags)
+    ]
+
+
+def question_writer(task_type, user, resolver=None):
+    """Return a bulk writer for questions of the given task type"""
+    if task_type.startswith("Four_Choices"):
+        return QuestionWriter(FourQuestion, FourChoice, user, resolver)
+    return QuestionWriter(
+        CustomQuestion, CustomChoice, user, resolver, created_by=user
+    )
+
+
+@transaction.atomic
+def create_generated_tasks(template, count, user, build_url, **task_fields):
+    """
+    Generate `count` tasks from a template and write them in bulk.
+    `template` holds the `name`, `type`, `difficulty` and optionally the
+    `tags` of the tasks and the `choice_tags` the choices are drawn from.
+    Extra `task_fields` are set on every task.
+    Returns the created tasks.
+    """
+    questions = [
+        generate_questions(
+            template["type"],
+            build_url,
+            tags=template.get("choice_tags", ()),
+        )
+        for _ in range(count)
+    ]
+    tasks = Task.objects.bulk_create(
+        [
+            Task(
+                name=template["name"],
+                type=template["type"],
+                difficulty=template["difficulty"],
+                created_by=user,
+                **task_fields,
+            )
+            for _ in range(count)
+        ]
+    )
+
+    resolver = TagResolver(user)
+    tag_ids = resolver.resolve_data(template.get("tags", []))
+    link(
+        Task.tags,
+        [(task.id, tag_id) for task in tasks for tag_id in tag_ids],
+    )
+
+    writer = question_writer(template["type"], user, resolver)
+    for task, task_questions in zip(tasks, questions):
+        for choices in task_questions:
+            writer.add_question(task, choices)
+    writer.write()
+    search.update_vectors(Task, [task.id for task in tasks])
+    versions.tasks_changed([task.id for task in tasks])
+    return tasks
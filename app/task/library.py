@@ -0,0 +1,115 @@
+"""
+Size of the choice library.
+The number of basic choices per creator and per tag is kept in
+`LibraryCount` rows maintained by signals, so checking whether a task can
+be generated is a single indexed lookup instead of a scan of the library.
+"""
+from collections import Counter
+
+from django.db.models import F
+
+from core.models import BasicChoice, LibraryCount, Task
+
+DEFAULT_LIBRARY_OWNER = 1
+GENERATED_QUESTION_COUNT = 10
+CHOICES_PER_QUESTION = {
+    Task.Type.connect_pairs_text_image: 3,
+    Task.Type.four_choices_image: 4,
+    Task.Type.four_choices_text: 4,
+}
+
+
+def required_choices(task_type):
+    """
+    Return the number of library choices needed to generate a task of the
+    given type, or `None` if the type cannot be generated.
+    """
+    per_question = CHOICES_PER_QUESTION.get(task_type)
+    if per_question is None:
+        return None
+    return GENERATED_QUESTION_COUNT * per_question
+
+
+def available_choices(created_by=None, tag=None):
+    """Return the number of choices of the creator, optionally by tag"""
+    if created_by is None:
+        created_by = DEFAULT_LIBRARY_OWNER
+    count = (
+        LibraryCount.objects.filter(created_by=created_by, tag=tag)
+        .values_list("count", flat=True)
+        .first()
+    )
+    return count or 0
+
+
+def can_generate(task_type, created_by=None, tag=None):
+    """Return whether there is enough data to generate the task type"""
+    required = required_choices(task_type)
+    if required is None:
+        return False
+    return available_choices(created_by, tag) >= required
+
+
+def _adjust(pairs, delta):
+    """
+    Add `delta` times the number of occurrences of each
+    `(created_by id, tag id)` pair to its counter.
+    """
+    for (created_by_id, tag_id), times in Counter(pairs).items():
+        counters = LibraryCount.objects.filter(
+            created_by_id=created_by_id, tag_id=tag_id
+        )
+        if delta > 0:
+            LibraryCount.objects.get_or_create(
+                created_by_id=created_by_id, tag_id=tag_id
+            )
+        counters.update(count=F("count") + delta * times)
+
+
+def choice_created(choice):
+    """Count a new basic choice"""
+    _adjust([(choice.created_by_id, None)], 1)
+
+
+def choice_deleted(choice):
+    """Uncount a basic choice and its tags, before it is deleted"""
+    tag_ids = choice.tags.values_list("id", flat=True)
+    _adjust(
+        [(choice.created_by_id, None)]
+        + [(choice.created_by_id, tag_id) for tag_id in tag_ids],
+        -1,
+    )
+
+
+def _tag_pairs(instance, reverse, pk_set):
+    """
+    Return the `(created_by id, tag id)` pairs of the existing links
+    between basic choices and tags touched by an m2m change.
+    """
+    links = BasicChoice.tags.through.objects.all()
+    if reverse:
+        links = links.filter(tag=instance)
+        if pk_set is not None:
+            links = links.filter(basicchoice__in=pk_set)
+    else:
+        links = links.filter(basicchoice=instance)
+        if pk_set is not None:
+            links = links.filter(tag__in=pk_set)
+    return list(links.values_list("basicchoice__created_by", "tag"))
+
+
+def tags_changed(instance, action, reverse, pk_set):
+    """Update the tag counters for a change of `BasicChoice.tags`"""
+    if action == "post_add":
+        if reverse:
+            pairs = [
+                (created_by_id, instance.pk)
+                for created_by_id in BasicChoice.objects.filter(
+                    pk__in=pk_set
+                ).values_list("created_by", flat=True)
+            ]
+        else:
+            pairs = [(instance.created_by_id, pk) for pk in pk_set]
+        _adjust(pairs, 1)
+    elif action in ("pre_remove", "pre_clear"):
+        _adjust(_tag_pairs(instance, reverse, pk_set), -1)
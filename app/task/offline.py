@@ -0,0 +1,150 @@
+"""
+Offline practice packs.
+A pack is a ZIP archive holding the assigned tasks of a patient as JSON
+and every choice image they reference. It is written as a stream: tasks
+are read through a server-side cursor and every archive entry is yielded
+as soon as it is written, so memory stays flat however big the pack is.
+Every pack has a version, under which the version tokens of its tasks are
+cached. A pack built `since` an earlier version only holds the tasks that
+changed, were added, or are not known to have been sent.
+"""
+import json
+import posixpath
+import uuid
+import zipfile
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import BasicChoice
+from task import versions
+
+CHOICE_IMAGE_DIR = "uploads/choices/"
+CHUNK_SIZE = 64 * 1024
+CURSOR_CHUNK_SIZE = 100
+
+
+def _pack_key(user_id, version):
+    """Return the cache key of the task versions sent in a pack"""
+    return f"task:offline_pack:{user_id}:{version}"
+
+
+def plan(user, since=None):
+    """
+    Plan a pack of the tasks assigned to the user.
+    Returns the version of the new pack, the ids of every assigned task,
+    the ids of the tasks to send and whether the pack is incremental,
+    which it is when the pack `since` is still known.
+    """
+    task_ids = list(user.assigned_tasks.values_list("id", flat=True))
+    current = versions.task_versions(task_ids)
+    previous = cache.get(_pack_key(user.id, since)) if since else None
+    changed = [
+        task_id for task_id in task_ids
+        if previous is None or previous.get(task_id) != current[task_id]
+    ]
+    version = uuid.uuid4().hex
+    cache.set(
+        _pack_key(user.id, version),
+        current,
+        settings.TASK_OFFLINE_PACK_TIMEOUT,
+    )
+    return version, task_ids, changed, previous is not None
+
+
+def image_name(value):
+    """
+    Return the storage name of the choice image a url points to, or
+    `None` if it is not a choice image url.
+    """
+    if not isinstance(value, str):
+        return None
+    path = urlparse(value).path
+    if not path.startswith(settings.MEDIA_URL):
+        return None
+    name = unquote(path[len(settings.MEDIA_URL):])
+    if posixpath.normpath(name) != name or not name.startswith(
+        CHOICE_IMAGE_DIR
+    ):
+        return None
+    return name
+
+
+def _image_urls(data):
+    """Yield every choice image url inside serialized data"""
+    if isinstance(data, dict):
+        data = list(data.values())
+    if isinstance(data, list):
+        for value in data:
+            yield from _image_urls(value)
+    elif image_name(data) is not None:
+        yield data
+
+
+class _Sink:
+    """Write-only buffer the archive is written to and drained from"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Return and forget everything written so far"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream(tasks, serialize, manifest):
+    """
+    Yield the bytes of a pack archive.
+    `tasks` is an iterator of tasks, `serialize` renders one of them and
+    `manifest` is the dict written last as `manifest.json`, completed with
+    the archive path of every image url.
+    """
+    sink = _Sink()
+    storage = BasicChoice.data2.field.storage
+    images = {}
+    sent = set()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for task in tasks:
+            data = serialize(task)
+            archive.writestr(
+                f"tasks/{task.id}.json",
+                json.dumps(data, cls=DjangoJSONEncoder),
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+            yield sink.drain()
+            for url in _image_urls(data):
+                name = image_name(url)
+                if name not in sent:
+                    try:
+                        source = storage.open(name, "rb")
+                    except (OSError, SuspiciousFileOperation):
+                        continue
+                    sent.add(name)
+                    with source, archive.open(
+                        f"images/{name}", "w", force_zip64=True
+                    ) as target:
+                        for chunk in iter(
+                            lambda: source.read(CHUNK_SIZE), b""
+                        ):
+                            target.write(chunk)
+                            yield sink.drain()
+                    yield sink.drain()
+                images[url] = f"images/{name}"
+        archive.writestr(
+            "manifest.json",
+            json.dumps({**manifest, "images": images}),
+            compress_type=zipfile.ZIP_DEFLATED,
+        )
+    yield sink.drain()
@@ -0,0 +1,70 @@
+"""
+Random selection of default library tasks.
+The ids of the default tasks are kept in a process-local snapshot,
+indexed by every combination of type and difficulty filters, so picking
+a random task is a dictionary lookup and one random index instead of
+sorting the task table.
+"""
+import random
+from itertools import product
+
+from django.conf import settings
+
+from core.cache import VersionedSnapshot
+from core.models import Task, TaskResult
+from task import library
+
+RECENT_LIMIT = 100
+
+
+def _load_default_tasks():
+    """
+    Map every `(type, difficulty)` filter, where `None` matches any value,
+    to the tuple of ids of the default tasks it selects.
+    """
+    rows = (
+        Task.objects.filter(
+            created_by=library.DEFAULT_LIBRARY_OWNER, is_pooled=False
+        )
+        .order_by("id")
+        .values_list("id", "type", "difficulty")
+    )
+    index = {}
+    for pk, task_type, difficulty in rows:
+        for key in product((task_type, None), (difficulty, None)):
+            index.setdefault(key, []).append(pk)
+    return {key: tuple(ids) for key, ids in index.items()}
+
+
+snapshot = VersionedSnapshot(
+    "task:random:default_tasks",
+    _load_default_tasks,
+    settings.TASK_RANDOM_CACHE_TIMEOUT,
+)
+
+
+def recent_task_ids(user, count):
+    """Return the ids of the tasks of the last `count` results of the user"""
+    return set(
+        TaskResult.objects.filter(answered_by=user)
+        .order_by("-date_created")
+        .values_list("task", flat=True)[:count]
+    )
+
+
+def pick(task_type=None, difficulty=None, exclude=(), rng=random):
+    """
+    Return the id of a random default task of the type and difficulty,
+    skipping the ids in `exclude`, or `None` if there is none.
+    """
+    ids = snapshot.get().get((task_type, difficulty), ())
+    exclude = set(exclude)
+    if len(ids) > 2 * len(exclude):
+        # Less than half of the ids are excluded, so a draw is accepted
+        # within two tries on average.
+        while True:
+            pk = rng.choice(ids)
+            if pk not in exclude:
+                return pk
+    ids = [pk for pk in ids if pk not in exclude]
+    return rng.choice(ids) if ids else None
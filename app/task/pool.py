@@ -0,0 +1,113 @@
+"""
+Pool of pre-generated tasks.
+Generated tasks are prepared in the background for every type and
+difficulty, owned by the default library owner and hidden from listings.
+Their image links are stored as paths, as no request tells the host they
+are served from. Creating a generated task then only claims a pooled
+task, relabels it and makes its image links absolute for the request.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Concat
+
+from core.models import CustomChoice, FourChoice, Task, User
+from task import generation, library
+
+# Key of the advisory lock held while the pool is refilled
+REFILL_LOCK = 0x7461736B706F6F6C
+
+# Choice model and image link fields of every generated type
+IMAGE_FIELDS = {
+    Task.Type.connect_pairs_text_image: (CustomChoice, ["data2"]),
+    Task.Type.four_choices_image: (FourChoice, ["question_data"]),
+    Task.Type.four_choices_text: (
+        FourChoice,
+        [
+            "correct_option",
+            "incorrect_option1",
+            "incorrect_option2",
+            "incorrect_option3",
+        ],
+    ),
+}
+
+
+def claim(task_type, difficulty, base_url, **fields):
+    """
+    Claim a pooled task of the given type and difficulty and relabel it
+    with `fields`. Image links of its choices are made absolute against
+    `base_url`, and custom choices pass to the new owner of the task, in
+    one update. Concurrent claims never get the same task.
+    Returns the claimed task, or `None` if the pool is empty.
+    """
+    with transaction.atomic():
+        task = (
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(is_pooled=True, type=task_type, difficulty=difficulty)
+            .order_by("id")
+            .first()
+        )
+        if task is None:
+            return None
+        task.is_pooled = False
+        for attr, value in fields.items():
+            setattr(task, attr, value)
+        task.save(update_fields=["is_pooled", *fields])
+        model, image_fields = IMAGE_FIELDS[task_type]
+        updates = {
+            field: Concat(Value(base_url.rstrip("/")), F(field))
+            for field in image_fields
+        }
+        if model is CustomChoice:
+            updates["created_by"] = task.created_by_id
+        model.objects.filter(assigned_to=task).update(**updates)
+    return task
+
+
+def _try_lock_refill():
+    """
+    Take the refill lock until the transaction ends, returning whether it
+    was free
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [REFILL_LOCK])
+        return cursor.fetchone()[0]
+
+
+@transaction.atomic
+def refill():
+    """
+    Top up the pool of every generated type and difficulty to
+    `TASK_POOL_WATERMARK` tasks. Every worker process schedules the
+    refill, so a run is skipped while another one holds the refill lock.
+    """
+    owner = User.objects.filter(id=library.DEFAULT_LIBRARY_OWNER).first()
+    if owner is None or not _try_lock_refill():
+        return
+    pooled = (
+        Task.objects.filter(is_pooled=True)
+        .values("type", "difficulty")
+        .annotate(count=Count("id"))
+    )
+    sizes = {(row["type"], row["difficulty"]): row["count"] for row in pooled}
+    for task_type in generation.QUESTION_BUILDERS:
+        if not library.can_generate(task_type):
+            continue
+        for difficulty in Task.Difficulty.values:
+            missing = settings.TASK_POOL_WATERMARK - sizes.get(
+                (task_type, difficulty), 0
+            )
+            if missing <= 0:
+                continue
+            generation.create_generated_tasks(
+                {
+                    "name": task_type,
+                    "type": task_type,
+                    "difficulty": difficulty,
+                },
+                missing,
+                owner,
+                lambda path: path,
+                is_pooled=True,
+            )
@@ -0,0 +1,205 @@
+"""
+Progress of patients over time.
+The results of every patient are rolled up per day, task type and
+difficulty in `DailyProgress` rows, counting the results and summing
+their correct and total answer counts. Rollups are updated in the
+transaction writing, deleting or scoring results and rebuilt nightly
+from the results to correct any drift, so a progress summary is read
+with one indexed query however many results there are.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from core.models import DailyProgress, TaskResult, User
+from task.filters import stored_datetime
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+
+
+def day_of(moment):
+    """Return the local day of a datetime"""
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return moment.date()
+
+
+def _adjust(results, sign, count_results=True):
+    """
+    Add `sign` times each result to the rollup of its day and task, or
+    only its answer counts without `count_results`.
+    """
+    sums = {}
+    for result in results:
+        key = (
+            result.answered_by_id,
+            day_of(result.date_created),
+            result.task.type,
+            result.task.difficulty,
+        )
+        counts = sums.setdefault(key, [0, 0, 0])
+        counts[0] += 1 if count_results else 0
+        counts[1] += result.correct_count or 0
+        counts[2] += result.total_count or 0
+    rollups = {
+        key: {
+            "patient_id": key[0],
+            "day": key[1],
+            "task_type": key[2],
+            "difficulty": key[3],
+        }
+        for key in sums
+    }
+    if sign > 0:
+        DailyProgress.objects.bulk_create(
+            [DailyProgress(**fields) for fields in rollups.values()],
+            ignore_conflicts=True,
+        )
+    for key, (result_count, correct_count, total_count) in sums.items():
+        DailyProgress.objects.filter(**rollups[key]).update(
+            result_count=F("result_count") + sign * result_count,
+            correct_count=F("correct_count") + sign * correct_count,
+            total_count=F("total_count") + sign * total_count,
+        )
+
+
+def results_added(results):
+    """
+    Count new results in their rollups. The caller must hold the lock of
+    the patient, as result writers do.
+    """
+    _adjust(results, 1)
+
+
+def results_scored(results):
+    """
+    Add the answer counts of results scored after they were counted to
+    their rollups. The caller must hold the locks of the patients.
+    """
+    _adjust(results, 1, count_results=False)
+
+
+def result_deleted(result):
+    """Uncount a deleted result from its rollup"""
+    _adjust([result], -1)
+
+
+def reconcile(days=None):
+    """
+    Rebuild the rollups of the last `days` days, or of every day, from the
+    results, and return the number of patients rebuilt. Every patient is
+    rebuilt in its own transaction holding its lock, so results written
+    meanwhile are neither lost nor counted twice.
+    """
+    results = TaskResult.objects.all()
+    rollups = DailyProgress.objects.all()
+    if days is not None:
+        since = day_of(timezone.now()) - timedelta(days=days - 1)
+        results = results.filter(
+            date_created__gte=stored_datetime(
+                datetime.combine(since, time.min)
+            )
+        )
+        rollups = rollups.filter(day__gte=since)
+    patient_ids = set(
+        results.values_list("answered_by", flat=True).distinct()
+    ) | set(rollups.values_list("patient", flat=True).distinct())
+    for patient_id in sorted(patient_ids):
+        with transaction.atomic():
+            if not User.objects.select_for_update().filter(
+                pk=patient_id
+            ).exists():
+                continue
+            rows = (
+                results.filter(answered_by_id=patient_id)
+                .annotate(result_day=TruncDate("date_created"))
+                .values("result_day", "task__type", "task__difficulty")
+                .annotate(
+                    results=Count("id"),
+                    correct=Coalesce(Sum("correct_count"), 0),
+                    total=Coalesce(Sum("total_count"), 0),
+                )
+            )
+            rollups.filter(patient_id=patient_id).delete()
+            DailyProgress.objects.bulk_create(
+                [
+                    DailyProgress(
+                        patient_id=patient_id,
+                        day=row["result_day"],
+                        task_type=row["task__type"],
+                        difficulty=row["task__difficulty"],
+                        result_count=row["results"],
+                        correct_count=row["correct"],
+                        total_count=row["total"],
+                    )
+                    for row in rows
+                ]
+            )
+    return len(patient_ids)
+
+
+def _totals(rows, **fields):
+    """Return the summed counts and the accuracy of rollup rows"""
+    correct_count = sum(row["correct_count"] for row in rows)
+    total_count = sum(row["total_count"] for row in rows)
+    return {
+        **fields,
+        "result_count": sum(row["result_count"] for row in rows),
+        "correct_count": correct_count,
+        "total_count": total_count,
+        "accuracy": correct_count / total_count if total_count else None,
+    }
+
+
+def _grouped(rows, field):
+    """Return the totals of rollup rows grouped by a field, in order"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[field], []).append(row)
+    return [
+        _totals(group, **{field: value})
+        for value, group in sorted(groups.items())
+    ]
+
+
+def summary(patient_id, date_from, date_to):
+    """
+    Return the progress of the patient between two days, inclusive: the
+    totals, the totals of every day, including days without results for
+    activity heatmaps, of every task type and of every difficulty, and
+    the rollup rows themselves.
+    """
+    rows = list(
+        DailyProgress.objects.filter(
+            patient_id=patient_id, day__range=(date_from, date_to)
+        )
+        .order_by("day", "task_type", "difficulty")
+        .values(
+            "day",
+            "task_type",
+            "difficulty",
+            "result_count",
+            "correct_count",
+            "total_count",
+        )
+    )
+    by_day = {
+        date_from + timedelta(days=offset): []
+        for offset in range((date_to - date_from).days + 1)
+    }
+    for row in rows:
+        by_day[row["day"]].append(row)
+    return {
+        "patient": patient_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "totals": _totals(rows),
+        "days": [_totals(group, day=day) for day, group in by_day.items()],
+        "task_types": _grouped(rows, "task_type"),
+        "difficulties": _grouped(rows, "difficulty"),
+        "rows": [_totals([row], **row) for row in rows],
+    }
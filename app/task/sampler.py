@@ -0,0 +1,114 @@
+"""
+Sampler for generated exercises.
+Generated tasks are built from the default choice library. The library is
+kept as a compact in-memory snapshot so that a task can draw all of its
+choices in one pass without loading `BasicChoice` rows from the database.
+"""
+import random
+from collections import namedtuple
+
+from core.cache import VersionedSnapshot
+from core.models import BasicChoice
+from task import library
+
+LibraryChoice = namedtuple(
+    "LibraryChoice", ["id", "data1", "image", "tags", "tag_names"]
+)
+
+
+def _load_library():
+    """
+    Load the default library as a tuple of `LibraryChoice` rows.
+    `image` holds the storage name of the image, and `tags` and
+    `tag_names` the ids and names of the tags of the choice, read by the
+    same query.
+    """
+    tags = {}
+    tag_rows = BasicChoice.tags.through.objects.filter(
+        basicchoice__created_by=library.DEFAULT_LIBRARY_OWNER
+    ).values_list("basicchoice_id", "tag_id", "tag__name")
+    for choice_id, tag_id, name in tag_rows:
+        tags.setdefault(choice_id, []).append((tag_id, name))
+
+    rows = (
+        BasicChoice.objects.filter(
+            created_by=library.DEFAULT_LIBRARY_OWNER
+        )
+        .order_by("id")
+        .values_list("id", "data1", "data2")
+    )
+    choices = []
+    for pk, data1, image in rows:
+        choice_tags = tags.get(pk, ())
+        choices.append(
+            LibraryChoice(
+                pk,
+                data1,
+                image,
+                tuple(tag_id for tag_id, _ in choice_tags),
+                tuple(name for _, name in choice_tags),
+            )
+        )
+    return tuple(choices)
+
+
+def _load_tag_index():
+    """
+    Build an inverted index of the default library snapshot.
+    Maps every tag name to a `{choice id: LibraryChoice}` dict of the
+    choices carrying a tag with that name, in library order.
+    """
+    index = {}
+    for choice in snapshot.get():
+        for name in choice.tag_names:
+            index.setdefault(name, {})[choice.id] = choice
+    return index
+
+
+snapshot = VersionedSnapshot("task:sampler:library", _load_library)
+tag_index = VersionedSnapshot(snapshot.key, _load_tag_index)
+
+
+def tagged(tags):
+    """
+    Return the library choices carrying every one of the tag names,
+    intersecting the inverted index in memory.
+    """
+    index = tag_index.get()
+    postings = sorted(
+        (index.get(name, {}) for name in set(tags)), key=len
+    )
+    smallest, others = postings[0], postings[1:]
+    return [
+        choice for choice_id, choice in smallest.items()
+        if all(choice_id in posting for posting in others)
+    ]
+
+
+def sample(count, exclude=(), rng=random, tags=()):
+    """
+    Draw `count` distinct choices from the default library.
+    Choices whose id is in `exclude` are never drawn, and with `tags`
+    only choices carrying all of the tag names are drawn. Pass a seeded
+    `random.Random` as `rng` to make the draw reproducible.
+    Raises `ValueError` if there are not enough choices to draw from.
+    """
+    choices = tagged(tags) if tags else snapshot.get()
+    if exclude:
+        exclude = set(exclude)
+        choices = [choice for choice in choices if choice.id not in exclude]
+    return rng.sample(choices, count)
+
+
+def sample_groups(groups, size, exclude=(), rng=random, tags=()):
+    """
+    Draw `groups` lists of `size` choices each in one sampling pass.
+    No choice appears in more than one group.
+    """
+    choices = sample(groups * size, exclude, rng, tags)
+    return [choices[i:i + size] for i in range(0, len(choices), size)]
+
+
+def image_path(image):
+    """Return the url path of a library image storage name"""
+    return BasicChoice.data2.field.storage.url(image)
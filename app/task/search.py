@@ -0,0 +1,93 @@
+"""
+Full-text search over tasks and the choice library.
+Tasks and basic choices keep a `search_vector` column, indexed with GIN,
+holding their text with weight A and the names of their tags with weight
+B. The vectors are refreshed with one UPDATE by signals and by the bulk
+writers, whenever the text or the tags change. Both searches and prefix
+autocompletion are answered from the GIN index.
+"""
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from core.models import BasicChoice, Tag, Task
+
+SEARCH_CONFIG = "simple"
+AUTOCOMPLETE_LIMIT = 10
+
+# The searched text field of each model and the relation from tags to it
+SEARCH_FIELDS = {
+    Task: ("name", "task"),
+    BasicChoice: ("data1", "basicchoice"),
+}
+
+
+def _vector(model):
+    """Return the expression of the search vector of rows of `model`"""
+    field, tag_relation = SEARCH_FIELDS[model]
+    tag_names = (
+        Tag.objects.filter(**{tag_relation: OuterRef("pk")})
+        .values(tag_relation)
+        .annotate(names=StringAgg("name", " "))
+        .values("names")
+    )
+    return SearchVector(
+        field, weight="A", config=SEARCH_CONFIG
+    ) + SearchVector(
+        Coalesce(Subquery(tag_names), Value(""), output_field=TextField()),
+        weight="B",
+        config=SEARCH_CONFIG,
+    )
+
+
+def update_vectors(model, ids):
+    """Refresh the search vectors of the rows of `model` with the ids"""
+    ids = [pk for pk in ids if pk is not None]
+    if ids:
+        model.objects.filter(pk__in=ids).update(search_vector=_vector(model))
+
+
+def search(queryset, text):
+    """
+    Filter `queryset` to the rows matching the web search syntax `text`,
+    ordered by rank.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-id")
+    )
+
+
+def prefix_query(text):
+    """
+    Return a query matching the words of `text`, the last one as a
+    prefix, or `None` if `text` holds no word.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = [f"'{word}'" for word in words[:-1]] + [f"'{words[-1]}':*"]
+    return SearchQuery(
+        " & ".join(terms), config=SEARCH_CONFIG, search_type="raw"
+    )
+
+
+def autocomplete(queryset, text, limit=AUTOCOMPLETE_LIMIT):
+    """Return the best `limit` rows whose words start with `text`"""
+    query = prefix_query(text)
+    if query is None:
+        return queryset.none()
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-id")[:limit]
+    )
@@ -1,8 +1,7 @@
 """
 Serializers for Task APIs
 """
-import random
-
+from django.db import transaction
 from rest_framework import serializers
 from core.models import (
     Task,
@@ -17,11 +16,77 @@ from core.models import (
     FourChoice,
     FourQuestion,
     AnswerFourChoice,
+    GenerationJob,
 )
+from core.sparse import SparseFieldsMixin
 from user.serializers import UserSerializer
+from task import generation, library, pool, sampler
+from task.bulk import (
+    QuestionWriter,
+    append_results,
+    lock_user,
+    score,
+    tag_resolver,
+    write_answers,
+)
+
+
+def available_choices(choice_tags=()):
+    """
+    Return the number of library choices generation can draw from, only
+    counting the choices carrying all of the `choice_tags` names if given.
+    """
+    if choice_tags:
+        return len(sampler.tagged(choice_tags))
+    return library.available_choices()
+
+
+def validate_can_generate(task_type, choice_tags=()):
+    """
+    Raise a validation error if the library does not hold enough choices
+    to generate a task of the given type, only counting the choices
+    carrying all of the `choice_tags` if given.
+    """
+    required = library.required_choices(task_type)
+    if required is None or available_choices(choice_tags) < required:
+        raise serializers.ValidationError(
+            "There is not enough data to create exercise"
+        )
+
+
+def generate_task_questions(task_type, build_url, seed=None,
+                            choice_tags=()):
+    """
+    Generate the questions of a task of the given type, raising a
+    validation error if the library does not hold enough choices.
+    """
+    try:
+        return generation.generate_questions(
+            task_type, build_url, seed, choice_tags
+        )
+    except ValueError:
+        raise serializers.ValidationError(
+            "There is not enough data to create exercise"
+        )
+
 
+def claim_pooled_task(validated_data, request):
+    """
+    Claim a pre-generated task with the type and difficulty of the
+    validated data and relabel it with the remaining fields. Its image
+    links are made absolute for the request.
+    Returns `None` if there is no such task in the pool.
+    """
+    fields = dict(validated_data)
+    return pool.claim(
+        fields.pop("type"),
+        fields.pop("difficulty"),
+        request.build_absolute_uri("/"),
+        **fields,
+    )
 
-class TagSerializer(serializers.ModelSerializer):
+
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for tags"""
 
     class Meta:
@@ -29,8 +94,43 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "user"]
         read_only_fields = ["id", "user"]
 
+    def validate_name(self, name):
+        """Check that a renamed tag does not clash with another tag"""
+        if (
+            isinstance(self.instance, Tag)
+            and Tag.objects.filter(user=self.instance.user, name=name)
+            .exclude(id=self.instance.id)
+            .exists()
+        ):
+            raise serializers.ValidationError(
+                "A tag with this name already exists"
+            )
+        return name
+
+
+class TaggedSerializerMixin:
+    """
+    Attach tags to instances through the tag resolver of the request, so
+    every tag name of a request is resolved at most once and the tags of
+    an instance are linked with one bulk insert.
+    """
+
+    def _add_tags(self, tags, instance):
+        """Add the tags of validated tag data to the instance"""
+        tag_ids = tag_resolver(self.context["request"]).resolve_data(tags)
+        if tag_ids:
+            instance.tags.add(*tag_ids)
+
+    def _set_tags(self, tags, instance):
+        """Replace the tags of the instance with validated tag data"""
+        instance.tags.set(
+            tag_resolver(self.context["request"]).resolve_data(tags)
+        )
 
-class BasicChoiceSerializer(serializers.ModelSerializer):
+
+class BasicChoiceSerializer(
+    SparseFieldsMixin, TaggedSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for Basic Choices"""
 
     tags = TagSerializer(many=True, required=False)
@@ -39,23 +139,9 @@ class BasicChoiceSerializer(serializers.ModelSerializer):
         model = BasicChoice
         fields = ["id", "data1", "data2", "tags", "created_by"]
         read_only_fields = ["id", "created_by"]
+        expandable_fields = ["tags"]
         extra_kwargs = {"image": {"required": "True"}}
 
-    def _get_or_create_tags(self, tags, basic_choice):
-        """
-        Helper function for creating tags for a `BasicChoice`.
-        If a tag with the given name and user does not exist in the database,
-        it will be created.
-        Then, the tag will be added to the given `BasicChoice`.
-        """
-        auth_user = self.context["request"].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            basic_choice.tags.add(tag_obj)
-
     def create(self, validated_data):
         """
         Create a new `BasicChoice` instance.
@@ -64,7 +150,7 @@ class BasicChoiceSerializer(serializers.ModelSerializer):
         """
         tags = validated_data.pop("tags", [])
         choice = BasicChoice.objects.create(**validated_data)
-        self._get_or_create_tags(tags, choice)
+        self._add_tags(tags, choice)
         return choice
 
     def update(self, instance, validated_data):
@@ -76,8 +162,7 @@ class BasicChoiceSerializer(serializers.ModelSerializer):
         tags = validated_data.pop("tags", None)
 
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._set_tags(tags, instance)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -120,26 +205,25 @@ class FourChoiceSerializer(BasicChoiceSerializer):
         """
         Create and return a new `FourChoice` instance, given the validated
         data.
-        This method uses the `_get_or_create_tags()` method to populate the
+        This method uses the `_add_tags()` method to populate the
         `tags` field of the FourChoice instance.
         """
         tags = validated_data.pop("tags", [])
         choice = FourChoice.objects.create(**validated_data)
-        self._get_or_create_tags(tags, choice)
+        self._add_tags(tags, choice)
         return choice
 
     def update(self, instance, validated_data):
         """
         Update and return an existing FourChoice instance, given the validated
         data.
-        This method uses the `_get_or_create_tags()` method to populate the
+        This method uses the `_set_tags()` method to populate the
         `tags` field of the FourChoice instance.
         """
         tags = validated_data.pop("tags", None)
 
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._set_tags(tags, instance)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -148,7 +232,7 @@ class FourChoiceSerializer(BasicChoiceSerializer):
         return instance
 
 
-class CustomQuestionSerializer(serializers.ModelSerializer):
+class CustomQuestionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Custom Questions"""
 
     choices = CustomChoiceSerializer(many=True, required=True)
@@ -176,7 +260,7 @@ class CustomQuestionSerializer(serializers.ModelSerializer):
         return question
 
 
-class FourQuestionSerializer(serializers.ModelSerializer):
+class FourQuestionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Four Questions"""
 
     choices = FourChoiceSerializer(many=True, required=True)
@@ -202,7 +286,9 @@ class FourQuestionSerializer(serializers.ModelSerializer):
         return question
 
 
-class ConnectPairsTaskDetailSerializer(serializers.ModelSerializer):
+class ConnectPairsTaskDetailSerializer(
+    SparseFieldsMixin, TaggedSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer for connect pairs tasks.
     Handles the serialization of connect pairs tasks and their associated
@@ -213,105 +299,103 @@ class ConnectPairsTaskDetailSerializer(serializers.ModelSerializer):
         many=True, required=False, source="custom_questions"
     )
     tags = TagSerializer(many=True, required=False)
+    seed = serializers.IntegerField(
+        write_only=True, required=False, min_value=0
+    )
+    choice_tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        write_only=True,
+        required=False,
+    )
 
     class Meta:
         model = Task
         fields = ["id", "name", "type", "difficulty", "created_by", "tags",
-                  "questions"]
+                  "questions", "seed", "choice_tags"]
         read_only_fields = ["id", "created_by"]
+        expandable_fields = ["tags", "questions"]
 
-    def _get_or_create_tags(self, tags, task):
+    def _question_writer(self):
         """
-        Helper function to retrieve or create tags for a given task.
-        Adds the retrieved/created tags to the task.
+        Helper function returning a bulk writer for connect pairs questions.
         """
-        auth_user = self.context["request"].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            task.tags.add(tag_obj)
+        request = self.context["request"]
+        return QuestionWriter(
+            CustomQuestion,
+            CustomChoice,
+            request.user,
+            tag_resolver(request),
+            created_by=request.user,
+        )
 
     def _create_questions(self, task, questions):
         """
-        Helper function to create four choice questions for a given task.
+        Helper function to create connect pairs questions for a given task.
         Adds the created questions to the task.
         """
-        auth_user = self.context["request"].user
+        writer = self._question_writer()
         for question in questions:
-            choices = question.pop("choices", [])
-            question_obj = CustomQuestion.objects.create(assigned_to=task)
-            for choice in choices:
-                tags = choice.pop("tags", [])
-                choice_obj = CustomChoice.objects.create(
-                    created_by=auth_user,
-                    assigned_to=task,
-                    **choice,
-                )
-                for tag in tags:
-                    tag_obj, created = Tag.objects.get_or_create(
-                        user=auth_user,
-                        **tag,
-                    )
-                    choice_obj.tags.add(tag_obj)
-                question_obj.choices.add(choice_obj)
-
-    def _get_choices_text_image(self, question, task):
-        """
-        Helper function to generate four choices questions with an image and
-        text choices.
-        Adds the generated choices to the provided question.
-        """
-        choices = list(
-            BasicChoice.objects.exclude(assigned_to=task).filter(created_by=1)
-        )
-        random_choices = random.sample(choices, 3)
-        request = self.context.get("request")
-        for basic_choice in random_choices:
-            tags = basic_choice.tags.all()
-            choice = CustomChoice.objects.create(
-                data1=basic_choice.data1,
-                data2=request.build_absolute_uri(basic_choice.data2.url),
-                assigned_to=task,
-                created_by=self.context["request"].user,
-            )
-            for tag in tags:
-                choice.tags.add(tag)
-            question.choices.add(choice)
+            writer.add_question(task, question.get("choices", []))
+        writer.write()
 
-    def _generate_questions(self, task, type):
+    def _generate_questions(self, task, type, seed=None, choice_tags=()):
         """
-        Helper function to generate four choices questions for a given task.
-        Generates the questions based on the provided type.
+        Helper function to generate connect pairs questions for a given task.
+        All choices of the task are drawn from the library in one pass,
+        only from choices carrying all of the `choice_tags` if given.
+        The same `seed` always generates the same questions.
         """
-        for _ in range(10):
-            question = CustomQuestion.objects.create(assigned_to=task)
-            self._get_choices_text_image(question, task)
+        request = self.context.get("request")
+        writer = self._question_writer()
+        for choices in generate_task_questions(
+            Task.Type.connect_pairs_text_image,
+            request.build_absolute_uri,
+            seed,
+            choice_tags,
+        ):
+            writer.add_question(task, choices)
+        writer.write()
 
+    @transaction.atomic
     def create(self, validated_data):
         """
-        Create a four choices task.
-        Generates four choices questions if no questions are provided
-        in the validated data.
+        Create a connect pairs task.
+        Claims a pre-generated task, or generates connect pairs questions,
+        if no questions are provided in the validated data. Seeded and
+        themed tasks are always generated, as pooled tasks are neither.
+        The library is checked before the task is written, and everything
+        is rolled back if generation fails.
         Adds the generated/provided questions and tags to the task.
         """
         questions = validated_data.pop("custom_questions", [])
         tags = validated_data.pop("tags", [])
-        task = Task.objects.create(**validated_data)
+        seed = validated_data.pop("seed", None)
+        choice_tags = validated_data.pop("choice_tags", [])
         if questions == []:
-            if len(list(BasicChoice.objects.exclude(assigned_to=task))) < 30:
-                raise serializers.ValidationError(
-                    "There is not enough data to create exercise"
-                )
-            if validated_data.get("type") == "Connect_Pairs_Text-Text":
+            task_type = validated_data.get("type")
+            if task_type == "Connect_Pairs_Text-Text":
                 raise serializers.ValidationError(
                     "Question field is mandatory for this task type"
                 )
-            self._generate_questions(task, task.type)
+            task = None
+            if (
+                seed is None
+                and not choice_tags
+                and task_type == Task.Type.connect_pairs_text_image
+            ):
+                task = claim_pooled_task(
+                    validated_data, self.context.get("request")
+                )
+            if task is None:
+                validate_can_generate(
+                    Task.Type.connect_pairs_text_image, choice_tags
+                )
+                task = Task.objects.create(**validated_data)
+                self._generate_questions(task, task.type, seed, choice_tags)
         else:
+            task = Task.objects.create(**validated_data)
             self._create_questions(task, questions)
-        self._get_or_create_tags(tags, task)
+        self._add_tags(tags, task)
         return task
 
     def update(self, instance, validated_data):
@@ -321,9 +405,10 @@ class ConnectPairsTaskDetailSerializer(serializers.ModelSerializer):
         """
         tags = validated_data.pop("tags", None)
         questions = validated_data.pop("custom_questions", None)
+        validated_data.pop("seed", None)
+        validated_data.pop("choice_tags", None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._set_tags(tags, instance)
 
         if questions is not None:
             CustomQuestion.objects.all().filter(assigned_to=instance.id).delete()
@@ -336,7 +421,9 @@ class ConnectPairsTaskDetailSerializer(serializers.ModelSerializer):
         return instance
 
 
-class FourChoicesTaskDetailSerializer(serializers.ModelSerializer):
+class FourChoicesTaskDetailSerializer(
+    SparseFieldsMixin, TaggedSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer for four choices tasks.
     Handles the serialization of four choices tasks and their associated
@@ -347,130 +434,105 @@ class FourChoicesTaskDetailSerializer(serializers.ModelSerializer):
         many=True, required=False, source="fourchoice_questions"
     )
     tags = TagSerializer(many=True, required=False)
+    seed = serializers.IntegerField(
+        write_only=True, required=False, min_value=0
+    )
+    choice_tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        write_only=True,
+        required=False,
+    )
 
     class Meta:
         model = Task
         fields = ["id", "name", "type", "difficulty", "created_by", "tags",
-                  "questions"]
+                  "questions", "seed", "choice_tags"]
         read_only_fields = ["id", "created_by"]
+        expandable_fields = ["tags", "questions"]
 
-    def _get_or_create_tags(self, tags, task):
+    def _question_writer(self):
         """
-        Helper function to retrieve or create tags for a given task.
-        Adds the retrieved/created tags to the task.
+        Helper function returning a bulk writer for four choice questions.
         """
-        auth_user = self.context["request"].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            task.tags.add(tag_obj)
+        request = self.context["request"]
+        return QuestionWriter(
+            FourQuestion, FourChoice, request.user, tag_resolver(request)
+        )
 
     def _create_questions(self, task, questions):
         """
         Helper function to create four choice questions for a given task.
         Adds the created questions to the task.
         """
-        auth_user = self.context["request"].user
+        writer = self._question_writer()
         for question in questions:
-            choices = question.pop("choices", [])
-            question_obj = FourQuestion.objects.create(assigned_to=task)
-            for choice in choices:
-                tags = choice.pop("tags", [])
-                choice_obj = FourChoice.objects.create(
-                    assigned_to=task,
-                    **choice,
-                )
-                for tag in tags:
-                    tag_obj, created = Tag.objects.get_or_create(
-                        user=auth_user,
-                        **tag,
-                    )
-                    choice_obj.tags.add(tag_obj)
-                question_obj.choices.add(choice_obj)
-
-    def _get_choices_image_text(self, question, task):
-        """
-        Helper function to generate four choices questions with an image and
-        text choices.
-        Adds the generated choices to the provided question.
-        """
-        choices = list(
-            BasicChoice.objects.exclude(assigned_to=task).filter(created_by=1)
-        )
-        random_choices = random.sample(choices, 4)
-        first_choice = random_choices.pop()
-        request = self.context.get("request")
-        choice = FourChoice.objects.create(
-            question_data=request.build_absolute_uri(first_choice.data2.url),
-            correct_option=first_choice.data1,
-            incorrect_option1=random_choices.pop().data1,
-            incorrect_option2=random_choices.pop().data1,
-            incorrect_option3=random_choices.pop().data1,
-            assigned_to=task,
-        )
-        question.choices.add(choice)
+            writer.add_question(task, question.get("choices", []))
+        writer.write()
 
-    def _get_choices_text_image(self, question, task):
+    def _generation_type(self, type):
         """
-        Helper function to generate four choices questions with a text and
-        image choices.
-        Adds the generated choices to the provided question.
+        Helper function returning the four choices layout generated for
+        the given task type.
         """
-        choices = list(
-            BasicChoice.objects.exclude(assigned_to=task).filter(created_by=1)
-        )
-        random_choices = random.sample(choices, 4)
-        first_choice = random_choices.pop()
-        request = self.context.get("request")
-        choice = FourChoice.objects.create(
-            question_data=first_choice.data1,
-            correct_option=request.build_absolute_uri(first_choice.data2.url),
-            incorrect_option1=request.build_absolute_uri(
-                random_choices.pop().data2.url
-            ),
-            incorrect_option2=request.build_absolute_uri(
-                random_choices.pop().data2.url
-            ),
-            incorrect_option3=request.build_absolute_uri(
-                random_choices.pop().data2.url
-            ),
-            assigned_to=task,
-        )
-        question.choices.add(choice)
+        if type == Task.Type.four_choices_image:
+            return Task.Type.four_choices_image
+        return Task.Type.four_choices_text
 
-    def _generate_questions(self, task, type):
+    def _generate_questions(self, task, type, seed=None, choice_tags=()):
         """
         Helper function to generate four choices questions for a given task.
         Generates the questions based on the provided type.
+        All choices of the task are drawn from the library in one pass,
+        only from choices carrying all of the `choice_tags` if given.
+        The same `seed` always generates the same questions.
         """
-        for _ in range(10):
-            question = FourQuestion.objects.create(assigned_to=task)
-            if type == "Four_Choices_Image-Texts":
-                self._get_choices_image_text(question, task)
-            else:
-                self._get_choices_text_image(question, task)
+        request = self.context.get("request")
+        writer = self._question_writer()
+        for choices in generate_task_questions(
+            self._generation_type(type),
+            request.build_absolute_uri,
+            seed,
+            choice_tags,
+        ):
+            writer.add_question(task, choices)
+        writer.write()
 
+    @transaction.atomic
     def create(self, validated_data):
         """
         Create a four choices task.
-        Generates four choices questions if no questions are provided
-        in the validated data.
+        Claims a pre-generated task, or generates four choices questions,
+        if no questions are provided in the validated data. Seeded and
+        themed tasks are always generated, as pooled tasks are neither.
+        The library is checked before the task is written, and everything
+        is rolled back if generation fails.
         Adds the generated/provided questions and tags to the task.
         """
         questions = validated_data.pop("fourchoice_questions", [])
         tags = validated_data.pop("tags", [])
-        task = Task.objects.create(**validated_data)
+        seed = validated_data.pop("seed", None)
+        choice_tags = validated_data.pop("choice_tags", [])
         if questions == []:
-            if len(list(BasicChoice.objects.exclude(assigned_to=task))) < 40:
-                raise serializers.ValidationError(
-                    "There is not enough data to create exercise"
+            task_type = validated_data.get("type")
+            task = None
+            if (
+                seed is None
+                and not choice_tags
+                and task_type == self._generation_type(task_type)
+            ):
+                task = claim_pooled_task(
+                    validated_data, self.context.get("request")
+                )
+            if task is None:
+                validate_can_generate(
+                    self._generation_type(task_type), choice_tags
                 )
-            self._generate_questions(task, task.type)
+                task = Task.objects.create(**validated_data)
+                self._generate_questions(task, task.type, seed, choice_tags)
         else:
+            task = Task.objects.create(**validated_data)
             self._create_questions(task, questions)
-        self._get_or_create_tags(tags, task)
+        self._add_tags(tags, task)
         return task
 
     def update(self, instance, validated_data):
@@ -480,9 +542,10 @@ class FourChoicesTaskDetailSerializer(serializers.ModelSerializer):
         """
         tags = validated_data.pop("tags", None)
         questions = validated_data.pop("fourchoice_questions", None)
+        validated_data.pop("seed", None)
+        validated_data.pop("choice_tags", None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._set_tags(tags, instance)
 
         if questions is not None:
             FourQuestion.objects.all().filter(assigned_to=instance.id).delete()
@@ -495,6 +558,15 @@ class FourChoicesTaskDetailSerializer(serializers.ModelSerializer):
         return instance
 
 
+# Detail serializer of each task type
+TYPE_SERIALIZERS = {
+    Task.Type.connect_pairs_text_text: ConnectPairsTaskDetailSerializer,
+    Task.Type.connect_pairs_text_image: ConnectPairsTaskDetailSerializer,
+    Task.Type.four_choices_image: FourChoicesTaskDetailSerializer,
+    Task.Type.four_choices_text: FourChoicesTaskDetailSerializer,
+}
+
+
 class TaskSerializer(ConnectPairsTaskDetailSerializer):
     """Serializer for Task detail view"""
 
@@ -511,7 +583,7 @@ class RandomTaskSerializer(ConnectPairsTaskDetailSerializer):
                             "tags"]
 
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Answer model"""
 
     class Meta:
@@ -520,7 +592,9 @@ class AnswerSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class AnswerFourChoiceSerializer(serializers.ModelSerializer):
+class AnswerFourChoiceSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     """Serializer for AnswerFourChoice model"""
 
     class Meta:
@@ -537,7 +611,9 @@ class AnswerFourChoiceSerializer(serializers.ModelSerializer):
         ]
 
 
-class QuestionConnectImageAnswerSerializer(serializers.ModelSerializer):
+class QuestionConnectImageAnswerSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     """Serializer for QuestionConnectImageAnswer model"""
 
     answer = AnswerSerializer(required=True, many=True)
@@ -573,91 +649,134 @@ class QuestionFourChoiceAnswerSerializer(QuestionConnectImageAnswerSerializer):
                                             **answer_data)
 
 
-class TaskDetailResultSerializer(serializers.ModelSerializer):
+class TaskDetailResultSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     """Serializer for task results"""
 
     answers = QuestionConnectImageAnswerSerializer(required=True, many=True)
 
+    # Model of the answers and the key of their data in question data
+    answer_model = Answer
+    answer_field = "answer"
+
     class Meta:
         model = TaskResult
-        fields = ["id", "answered_by", "task", "date_created", "answers"]
-        read_only_fields = ["id", "answered_by", "date_created"]
+        fields = [
+            "id",
+            "answered_by",
+            "task",
+            "attempt_no",
+            "date_created",
+            "correct_count",
+            "total_count",
+            "accuracy",
+            "answers",
+        ]
+        read_only_fields = [
+            "id",
+            "answered_by",
+            "attempt_no",
+            "date_created",
+            "correct_count",
+            "total_count",
+            "accuracy",
+        ]
+        extra_kwargs = {
+            "task": {"queryset": Task.objects.filter(is_pooled=False)}
+        }
+        expandable_fields = ["answers"]
 
+    @transaction.atomic
     def create(self, validated_data):
-        """Create a result"""
-        if (
-            TaskResult.objects.filter(
-                answered_by=self.context["request"].user,
-                task=validated_data.get("task"),
-            )
-            is not None
-        ):
-            TaskResult.objects.filter(
-                answered_by=self.context["request"].user,
-                task=validated_data.get("task"),
-            ).delete()
-
+        """
+        Create a result as the next attempt of the user at the task,
+        keeping the earlier attempts. The result is written with a fixed
+        number of inserts and nothing is written if any of them fails.
+        """
         answers = validated_data.pop("answers", [])
-        result = TaskResult.objects.create(**validated_data)
-
-        for answers_data in answers:
-            answer = answers_data.pop("answer", [])
-            question = QuestionConnectImageAnswer.objects.create(
-                assigned_to=result, **answers_data
-            )
-            for answer_data in answer:
-                Answer.objects.create(assigned_to_question=question,
-                                      **answer_data)
+        user = validated_data["answered_by"]
+        lock_user(user)
+        result = score(
+            TaskResult(**validated_data), answers, self.answer_field
+        )
+        (result,) = append_results(user, [result])
+        write_answers(
+            [(result, answers, self.answer_model, self.answer_field)]
+        )
         return result
 
 
-class TaskDetailFourChoiceResultSerializer(serializers.ModelSerializer):
+class TaskDetailFourChoiceResultSerializer(TaskDetailResultSerializer):
     """Serializer for task results with four choice answers"""
 
     answers = QuestionFourChoiceAnswerSerializer(required=True, many=True)
 
-    class Meta:
-        model = TaskResult
-        fields = ["id", "answered_by", "task", "date_created", "answers"]
-        read_only_fields = ["id", "answered_by", "date_created"]
-
-    def create(self, validated_data):
-        """Create a result"""
-        if (
-            TaskResult.objects.filter(
-                answered_by=self.context["request"].user,
-                task=validated_data.get("task"),
-            )
-            is not None
-        ):
-            TaskResult.objects.filter(
-                answered_by=self.context["request"].user,
-                task=validated_data.get("task"),
-            ).delete()
-
-        answers = validated_data.pop("answers", [])
-        result = TaskResult.objects.create(**validated_data)
-
-        for answers_data in answers:
-            answer = answers_data.pop("answer_fourchoice", [])
-            question = QuestionConnectImageAnswer.objects.create(
-                assigned_to=result, **answers_data
-            )
-            for answer_data in answer:
-                AnswerFourChoice.objects.create(
-                    assigned_to_question=question, **answer_data
-                )
-        return result
+    answer_model = AnswerFourChoice
+    answer_field = "answer_fourchoice"
 
 
 class TaskResultSerializer(TaskDetailResultSerializer):
     """Serializer for task results"""
 
     class Meta(TaskDetailResultSerializer.Meta):
-        fields = ["id", "answered_by", "task", "date_created"]
+        fields = [
+            "id",
+            "answered_by",
+            "task",
+            "attempt_no",
+            "date_created",
+            "correct_count",
+            "total_count",
+            "accuracy",
+        ]
+
+
+# Result serializer of each task type, by default TaskDetailResultSerializer
+RESULT_SERIALIZERS = {
+    Task.Type.four_choices_image: TaskDetailFourChoiceResultSerializer,
+    Task.Type.four_choices_text: TaskDetailFourChoiceResultSerializer,
+}
 
 
-class AssignTaskSerializer(serializers.ModelSerializer):
+class TaskResultSyncSerializer(serializers.Serializer):
+    """
+    Serializer for a result synced from offline use.
+    The task is looked up in the `tasks` map of the context and the
+    answers are validated by the result serializer of its type.
+    """
+
+    idempotency_key = serializers.UUIDField()
+    task = serializers.IntegerField()
+    date_created = serializers.DateTimeField(required=False)
+    answers = serializers.ListField()
+
+    def validate_task(self, value):
+        task = self.context["tasks"].get(value)
+        if task is None:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return task
+
+    def validate(self, attrs):
+        serializer_class = RESULT_SERIALIZERS.get(
+            attrs["task"].type, TaskDetailResultSerializer
+        )
+        field = serializer_class().fields["answers"]
+        try:
+            answers = field.run_validation(attrs["answers"])
+        except serializers.ValidationError as error:
+            raise serializers.ValidationError({"answers": error.detail})
+        return {
+            **attrs,
+            "answers": answers,
+            "answer_model": serializer_class.answer_model,
+            "answer_field": serializer_class.answer_field,
+        }
+
+
+class AssignTaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for assigning tasks to users"""
 
     users = serializers.SlugRelatedField(
@@ -671,6 +790,7 @@ class AssignTaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ["user_set", "users"]
+        expandable_fields = ["user_set"]
 
     def update(self, instance, validated_data):
         users = validated_data.pop("users", None)
@@ -681,3 +801,74 @@ class AssignTaskSerializer(serializers.ModelSerializer):
                 instance.user_set.add(user)
             instance.save()
         return instance
+
+
+class GenerateBatchSerializer(serializers.Serializer):
+    """Serializer for generating a task for each of many patients"""
+
+    name = serializers.CharField(max_length=255)
+    type = serializers.ChoiceField(
+        choices=list(generation.QUESTION_BUILDERS)
+    )
+    difficulty = serializers.ChoiceField(choices=Task.Difficulty.choices)
+    tags = TagSerializer(many=True, required=False)
+    choice_tags = serializers.ListField(
+        child=serializers.CharField(max_length=255), required=False
+    )
+    patients = serializers.SlugRelatedField(
+        many=True,
+        slug_field="email",
+        queryset=User.objects.filter(is_therapist=False),
+        allow_empty=False,
+    )
+
+    def validate_patients(self, patients):
+        """Check that every patient is linked to the therapist"""
+        auth_user = self.context["request"].user
+        not_linked = [
+            patient.email for patient in patients
+            if patient.assigned_to_id != auth_user.id
+            or not patient.assignment_active
+        ]
+        if not_linked:
+            raise serializers.ValidationError(
+                f"Patients are not linked: {', '.join(not_linked)}"
+            )
+        return patients
+
+    def validate(self, attrs):
+        """Check that the library can generate the task type"""
+        validate_can_generate(attrs["type"], attrs.get("choice_tags", ()))
+        return attrs
+
+    def create(self, validated_data):
+        """Create a pending generation job"""
+        patients = validated_data.pop("patients")
+        base_url = validated_data.pop("base_url", "")
+        validated_data["tags"] = [
+            dict(tag) for tag in validated_data.get("tags", [])
+        ]
+        return GenerationJob.objects.create(
+            created_by=self.context["request"].user,
+            base_url=base_url,
+            template=validated_data,
+            patients=list(dict.fromkeys(patient.id for patient in patients)),
+        )
+
+
+class GenerationJobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for batch generation jobs"""
+
+    class Meta:
+        model = GenerationJob
+        fields = [
+            "id",
+            "status",
+            "template",
+            "patients",
+            "results",
+            "error",
+            "date_created",
+            "date_finished",
+        ]
+        read_only_fields = fields
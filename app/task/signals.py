@@ -0,0 +1,291 @@
+"""
+Signal handlers keeping the Task API caches and derived rows in sync with
+the database
+"""
+from django.db.models.signals import (
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from core.models import (
+    BasicChoice,
+    CustomChoice,
+    CustomQuestion,
+    FourChoice,
+    FourQuestion,
+    LatestTaskResult,
+    Tag,
+    Task,
+    TaskResult,
+)
+from task import library, picker, progress, sampler, search, versions
+
+# The model whose search vectors hold the tag names of each tag relation
+SEARCH_TAG_LINKS = {
+    Task.tags.through: Task,
+    BasicChoice.tags.through: BasicChoice,
+}
+
+# For each many to many relation inside a task detail payload: the
+# attribute holding the task id on the forward side, and the model, task
+# field and relation name used to find the tasks from the reverse side.
+TASK_RELATIONS = {
+    Task.tags.through: ("pk", Task, "id", "tags"),
+    CustomQuestion.choices.through: (
+        "assigned_to_id", CustomQuestion, "assigned_to", "choices"
+    ),
+    FourQuestion.choices.through: (
+        "assigned_to_id", FourQuestion, "assigned_to", "choices"
+    ),
+    CustomChoice.tags.through: (
+        "assigned_to_id", CustomChoice, "assigned_to", "tags"
+    ),
+}
+
+
+def _in_default_library(instance):
+    """Return whether a basic choice or a tag is of the default library"""
+    if isinstance(instance, Tag):
+        return instance.user_id == library.DEFAULT_LIBRARY_OWNER
+    return instance.created_by_id == library.DEFAULT_LIBRARY_OWNER
+
+
+@receiver(post_save, sender=BasicChoice, dispatch_uid="basic_choice_saved")
+def basic_choice_saved(sender, instance, created, **kwargs):
+    """
+    Count new choices and invalidate the basic choice catalog, and the
+    default library snapshot for choices of the library.
+    """
+    if created:
+        library.choice_created(instance)
+    if _in_default_library(instance):
+        sampler.snapshot.invalidate()
+    versions.basic_choices_changed()
+
+
+@receiver(
+    pre_delete, sender=BasicChoice, dispatch_uid="basic_choice_deleting"
+)
+def basic_choice_deleting(sender, instance, **kwargs):
+    """Uncount a choice while its tags can still be read"""
+    library.choice_deleted(instance)
+
+
+@receiver(post_delete, sender=BasicChoice, dispatch_uid="basic_choice_deleted")
+def basic_choice_deleted(sender, instance, **kwargs):
+    """Invalidate the catalog, and the snapshot for library choices"""
+    if _in_default_library(instance):
+        sampler.snapshot.invalidate()
+    versions.basic_choices_changed()
+
+
+@receiver(
+    m2m_changed,
+    sender=BasicChoice.tags.through,
+    dispatch_uid="basic_choice_tags_changed",
+)
+def basic_choice_tags_changed(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """
+    Update the tag counters and invalidate the catalog when choice tags
+    change, and the default library snapshot for choices or tags of the
+    library.
+    """
+    library.tags_changed(instance, action, reverse, pk_set)
+    if action in ("post_add", "post_remove", "post_clear"):
+        if _in_default_library(instance):
+            sampler.snapshot.invalidate()
+        versions.basic_choices_changed()
+
+
+@receiver(post_save, sender=Tag, dispatch_uid="tag_saved")
+@receiver(post_delete, sender=Tag, dispatch_uid="tag_deleted")
+def tag_changed(sender, instance, **kwargs):
+    """
+    Invalidate the catalog, and for tags of the default library its
+    snapshot and tag index.
+    """
+    if _in_default_library(instance):
+        sampler.snapshot.invalidate()
+    versions.basic_choices_changed()
+
+
+@receiver(post_save, sender=Task, dispatch_uid="task_detail_task_saved")
+@receiver(post_delete, sender=Task, dispatch_uid="task_detail_task_deleted")
+def task_changed(sender, instance, **kwargs):
+    """Invalidate the cached payloads of the task and the task listing"""
+    versions.tasks_changed([instance.id])
+
+
+@receiver(post_save, sender=Task, dispatch_uid="random_task_saved")
+@receiver(post_delete, sender=Task, dispatch_uid="random_task_deleted")
+def default_task_changed(sender, instance, **kwargs):
+    """Invalidate the random task ids when a default task changes"""
+    if instance.created_by_id == library.DEFAULT_LIBRARY_OWNER:
+        picker.snapshot.invalidate()
+
+
+@receiver(post_save, sender=CustomQuestion,
+          dispatch_uid="task_detail_custom_question_saved")
+@receiver(post_delete, sender=CustomQuestion,
+          dispatch_uid="task_detail_custom_question_deleted")
+@receiver(post_save, sender=FourQuestion,
+          dispatch_uid="task_detail_four_question_saved")
+@receiver(post_delete, sender=FourQuestion,
+          dispatch_uid="task_detail_four_question_deleted")
+@receiver(post_save, sender=CustomChoice,
+          dispatch_uid="task_detail_custom_choice_saved")
+@receiver(post_delete, sender=CustomChoice,
+          dispatch_uid="task_detail_custom_choice_deleted")
+@receiver(post_save, sender=FourChoice,
+          dispatch_uid="task_detail_four_choice_saved")
+@receiver(post_delete, sender=FourChoice,
+          dispatch_uid="task_detail_four_choice_deleted")
+def task_content_changed(sender, instance, **kwargs):
+    """Invalidate the cached detail payloads of the task of the content"""
+    versions.task_content_changed([instance.assigned_to_id])
+
+
+@receiver(m2m_changed, sender=Task.tags.through,
+          dispatch_uid="task_detail_task_tags_changed")
+@receiver(m2m_changed, sender=CustomQuestion.choices.through,
+          dispatch_uid="task_detail_custom_question_choices_changed")
+@receiver(m2m_changed, sender=FourQuestion.choices.through,
+          dispatch_uid="task_detail_four_question_choices_changed")
+@receiver(m2m_changed, sender=CustomChoice.tags.through,
+          dispatch_uid="task_detail_custom_choice_tags_changed")
+def task_links_changed(sender, instance, action, reverse, pk_set,
+                       **kwargs):
+    """
+    Invalidate the cached detail payloads of the tasks whose questions,
+    choices or tags are linked or unlinked.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    attr, model, task_field, relation = TASK_RELATIONS[sender]
+    if not reverse:
+        task_ids = [getattr(instance, attr)]
+    elif pk_set is not None:
+        task_ids = model.objects.filter(pk__in=pk_set).values_list(
+            task_field, flat=True
+        )
+    else:
+        task_ids = model.objects.filter(**{relation: instance}).values_list(
+            task_field, flat=True
+        )
+    if sender is Task.tags.through:
+        versions.tasks_changed(task_ids)
+    else:
+        versions.task_content_changed(task_ids)
+
+
+@receiver(post_save, sender=Tag, dispatch_uid="task_detail_tag_saved")
+@receiver(pre_delete, sender=Tag, dispatch_uid="task_detail_tag_deleting")
+def task_tag_changed(sender, instance, created=False, **kwargs):
+    """
+    Invalidate the cached detail payloads of the tasks showing a renamed
+    or deleted tag, while its links can still be read.
+    """
+    if created:
+        return
+    versions.tasks_changed(
+        list(Task.objects.filter(tags=instance).values_list("id", flat=True))
+        + list(
+            CustomChoice.objects.filter(tags=instance).values_list(
+                "assigned_to", flat=True
+            )
+        )
+    )
+
+
+@receiver(post_save, sender=Task, dispatch_uid="search_task_saved")
+@receiver(post_save, sender=BasicChoice, dispatch_uid="search_choice_saved")
+def searched_saved(sender, instance, **kwargs):
+    """Refresh the search vector of a saved task or basic choice"""
+    search.update_vectors(sender, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Task.tags.through,
+          dispatch_uid="search_task_tags_changed")
+@receiver(m2m_changed, sender=BasicChoice.tags.through,
+          dispatch_uid="search_choice_tags_changed")
+def searched_tags_changed(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """
+    Refresh the search vectors of the tasks or basic choices whose tags
+    are linked or unlinked.
+    """
+    model = SEARCH_TAG_LINKS[sender]
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            search.update_vectors(model, [instance.pk])
+    elif action in ("post_add", "post_remove"):
+        search.update_vectors(model, pk_set)
+    elif action == "pre_clear":
+        instance._search_cleared = list(
+            model.objects.filter(tags=instance).values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        search.update_vectors(
+            model, instance.__dict__.pop("_search_cleared", ())
+        )
+
+
+def _tagged(tag):
+    """Return the ids of the tasks and basic choices carrying the tag"""
+    return {
+        model: list(
+            model.objects.filter(tags=tag).values_list("id", flat=True)
+        )
+        for model in SEARCH_TAG_LINKS.values()
+    }
+
+
+@receiver(post_save, sender=Tag, dispatch_uid="search_tag_saved")
+def searched_tag_saved(sender, instance, created, **kwargs):
+    """Refresh the search vectors showing the name of a renamed tag"""
+    if created:
+        return
+    for model, ids in _tagged(instance).items():
+        search.update_vectors(model, ids)
+
+
+@receiver(pre_delete, sender=Tag, dispatch_uid="search_tag_deleting")
+def searched_tag_deleting(sender, instance, **kwargs):
+    """Remember what carries a tag while its links can still be read"""
+    instance._search_tagged = _tagged(instance)
+
+
+@receiver(post_delete, sender=Tag, dispatch_uid="search_tag_deleted")
+def searched_tag_deleted(sender, instance, **kwargs):
+    """Refresh the search vectors that held the name of a deleted tag"""
+    for model, ids in instance.__dict__.pop("_search_tagged", {}).items():
+        search.update_vectors(model, ids)
+
+
+@receiver(post_delete, sender=TaskResult, dispatch_uid="latest_result_deleted")
+def latest_result_deleted(sender, instance, **kwargs):
+    """
+    Point the latest result of the user for the task at the last attempt
+    left when the latest one is deleted.
+    """
+    lookup = {
+        "answered_by_id": instance.answered_by_id,
+        "task_id": instance.task_id,
+    }
+    if LatestTaskResult.objects.filter(**lookup).exists():
+        return
+    last = TaskResult.objects.filter(**lookup).order_by("-attempt_no").first()
+    if last is not None:
+        LatestTaskResult.objects.create(result=last, **lookup)
+
+
+@receiver(
+    post_delete, sender=TaskResult, dispatch_uid="progress_result_deleted"
+)
+def progress_result_deleted(sender, instance, **kwargs):
+    """Uncount a deleted result from the progress rollups"""
+    progress.result_deleted(instance)
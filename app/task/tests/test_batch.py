@@ -0,0 +1,161 @@
+"""
+Tests for batch task generation
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from core.models import GenerationJob, Task
+from task import batch
+from task.tests.test_tasks_api import TaskApiTestCase
+
+GENERATE_BATCH_URL = reverse("task:task-generate-batch")
+DASHBOARD_URL = reverse("user:therapist-dashboard")
+
+
+def job_url(job_id):
+    """Create and return a generation job url"""
+    return reverse("task:generationjob-detail", args=[job_id])
+
+
+class GenerateBatchTests(TaskApiTestCase):
+    """Test generating tasks for many patients"""
+
+    def setUp(self):
+        super().setUp()
+        self.patients = [
+            get_user_model().objects.create_user(
+                f"patient{i}@example.com",
+                "testpass123",
+                assigned_to=self.user,
+                assignment_active=True,
+            )
+            for i in range(3)
+        ]
+        self.payload = {
+            "name": "Animals",
+            "type": "Four_Choices_Text-Images",
+            "difficulty": "Easy",
+            "tags": [{"name": "batch"}],
+            "patients": [patient.email for patient in self.patients],
+        }
+
+    @patch("task.batch.executor")
+    def test_generate_batch(self, mock_executor):
+        """Test a job is queued and generates one task per patient"""
+        self.create_library(40)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                GENERATE_BATCH_URL, self.payload, format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data["status"], GenerationJob.Status.PENDING)
+        mock_executor.submit.assert_called_once()
+
+        batch.run_job(res.data["id"])
+
+        res = self.client.get(job_url(res.data["id"]))
+        self.assertEqual(res.data["status"], GenerationJob.Status.DONE)
+        self.assertEqual(len(res.data["results"]), 3)
+        for patient, result in zip(self.patients, res.data["results"]):
+            task = Task.objects.get(id=result["task"])
+            self.assertEqual(result["patient"], patient.id)
+            self.assertIn(task, patient.assigned_tasks.all())
+            self.assertEqual(task.fourchoice_questions.count(), 10)
+            self.assertEqual(list(task.tags.values_list("name", flat=True)),
+                             ["batch"])
+
+    @patch("task.batch.executor")
+    def test_generate_batch_updates_dashboard(self, mock_executor):
+        """Test the cached dashboard counts the generated assignments"""
+        self.create_library(40)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                GENERATE_BATCH_URL, self.payload, format="json"
+            )
+        before = self.client.get(DASHBOARD_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            batch.run_job(res.data["id"])
+        after = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(
+            [row["pending_assignments"] for row in before.data], [0, 0, 0]
+        )
+        self.assertEqual(
+            [row["pending_assignments"] for row in after.data], [1, 1, 1]
+        )
+
+    def test_generate_batch_requires_linked_patients(self):
+        """Test tasks cannot be generated for patients of others"""
+        self.create_library(40)
+        stranger = get_user_model().objects.create_user(
+            "stranger@example.com", "testpass123"
+        )
+        self.payload["patients"].append(stranger.email)
+
+        res = self.client.post(GENERATE_BATCH_URL, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GenerationJob.objects.exists())
+
+    def test_generate_batch_requires_library(self):
+        """Test jobs are rejected when the library is too small"""
+        self.create_library(10)
+
+        res = self.client.post(GENERATE_BATCH_URL, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("task.batch.executor")
+    def test_recover_stale_jobs(self, mock_executor):
+        """Test jobs left by a stopped worker are run again or failed"""
+        self.create_library(40)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                GENERATE_BATCH_URL, self.payload, format="json"
+            )
+        started = timezone.now() - timedelta(hours=1)
+        GenerationJob.objects.update(
+            status=GenerationJob.Status.RUNNING,
+            attempts=1,
+            date_created=started,
+            date_started=started,
+        )
+        interrupted = GenerationJob.objects.create(
+            created_by=self.user,
+            template={},
+            patients=[],
+            status=GenerationJob.Status.RUNNING,
+            attempts=batch.MAX_ATTEMPTS,
+            date_started=started,
+        )
+        running = GenerationJob.objects.create(
+            created_by=self.user,
+            template={},
+            patients=[],
+            status=GenerationJob.Status.RUNNING,
+            attempts=1,
+            date_started=timezone.now(),
+        )
+        mock_executor.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(batch.recover(), 2)
+
+        mock_executor.submit.assert_called_once()
+        batch.run_job(res.data["id"])
+        job = GenerationJob.objects.get(id=res.data["id"])
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(len(job.results), 3)
+        interrupted.refresh_from_db()
+        self.assertEqual(interrupted.status, GenerationJob.Status.FAILED)
+        running.refresh_from_db()
+        self.assertEqual(running.status, GenerationJob.Status.RUNNING)
@@ -0,0 +1,165 @@
+"""
+Tests for the bulk question and result writers
+"""
+from datetime import timedelta
+from unittest.mock import Mock
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_save
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import (
+    CustomChoice,
+    CustomQuestion,
+    FourChoice,
+    FourQuestion,
+    Tag,
+    Task,
+    TaskResult,
+)
+from task.bulk import QuestionWriter, TagResolver, append_results
+
+
+class QuestionWriterTests(TestCase):
+    """Test writing questions in bulk"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_therapist_user(
+            "therapist@example.com", "testpass123"
+        )
+        self.task = Task.objects.create(
+            name="Task",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+        self.existing_tag = Tag.objects.create(name="words", user=self.user)
+
+    def write_connect_pairs(self, question_count):
+        """Write `question_count` tagged connect pairs questions"""
+        writer = QuestionWriter(
+            CustomQuestion, CustomChoice, self.user, created_by=self.user
+        )
+        for i in range(question_count):
+            writer.add_question(
+                self.task,
+                [{
+                    "data1": f"word{i}-{j}",
+                    "data2": f"pair{i}-{j}",
+                    "tags": [{"name": "words"}, {"name": f"q{i}"}],
+                    "tag_ids": [self.existing_tag.id],
+                } for j in range(3)],
+            )
+        return writer.write()
+
+    def test_query_count_is_constant(self):
+        """Test writing 1 or 25 questions takes the same queries"""
+        # savepoint, questions, choices, tag select, tag insert,
+        # choice tags, question choices, release savepoint
+        with self.assertNumQueries(8):
+            self.write_connect_pairs(1)
+        with self.assertNumQueries(8):
+            self.write_connect_pairs(25)
+
+    def test_rows_are_linked(self):
+        """Test questions, choices and tags are linked together"""
+        questions = self.write_connect_pairs(2)
+
+        self.assertEqual(self.task.custom_questions.count(), 2)
+        self.assertEqual(questions[0].choices.count(), 3)
+        choice = questions[1].choices.order_by("id").first()
+        self.assertEqual(choice.assigned_to, self.task)
+        self.assertEqual(choice.created_by, self.user)
+        self.assertEqual(
+            sorted(choice.tags.values_list("name", flat=True)),
+            ["q1", "words"],
+        )
+        self.assertEqual(Tag.objects.filter(name="words").count(), 1)
+
+    def test_four_choice_questions(self):
+        """Test writing four choice questions without tags"""
+        writer = QuestionWriter(FourQuestion, FourChoice, self.user)
+        writer.add_question(self.task, [{
+            "question_data": "dog",
+            "correct_option": "dog.png",
+            "incorrect_option1": "cat.png",
+            "incorrect_option2": "cow.png",
+            "incorrect_option3": "pig.png",
+        }])
+
+        with self.assertNumQueries(5):
+            questions = writer.write()
+
+        self.assertEqual(questions[0].choices.get().question_data, "dog")
+
+
+class TagResolverTests(TestCase):
+    """Test resolving tag names in bulk"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_therapist_user(
+            "therapist@example.com", "testpass123"
+        )
+        self.existing_tag = Tag.objects.create(name="words", user=self.user)
+
+    def test_resolve_creates_missing_tags(self):
+        """Test existing tags are reused and missing ones created once"""
+        resolver = TagResolver(self.user)
+
+        with self.assertNumQueries(2):
+            ids = resolver.resolve(["words", "animals", "animals"])
+
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(ids[0], self.existing_tag.id)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name="animals").count(), 1
+        )
+
+    def test_resolve_is_memoized(self):
+        """Test names already resolved do not query again"""
+        resolver = TagResolver(self.user)
+        resolver.resolve(["words", "animals"])
+
+        with self.assertNumQueries(0):
+            ids = resolver.resolve(["animals", "words"])
+
+        self.assertEqual(
+            ids,
+            [Tag.objects.get(name="animals").id, self.existing_tag.id],
+        )
+
+
+class AppendResultsTests(TestCase):
+    """Test appending results in bulk"""
+
+    def test_day_streak_counted_without_signals(self):
+        """Test the day streak is counted without sending pre_save"""
+        now = timezone.now()
+        therapist = get_user_model().objects.create_therapist_user(
+            "therapist@example.com", "testpass123"
+        )
+        patient = get_user_model().objects.create_user(
+            "patient@example.com",
+            "testpass123",
+            day_streak=2,
+            last_result_posted=now - timedelta(days=1),
+        )
+        task = Task.objects.create(
+            name="Task",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=therapist,
+        )
+        receiver = Mock()
+        pre_save.connect(receiver, sender=TaskResult)
+        self.addCleanup(pre_save.disconnect, receiver, sender=TaskResult)
+
+        append_results(
+            patient,
+            [TaskResult(answered_by=patient, task=task, date_created=now)],
+        )
+
+        receiver.assert_not_called()
+        patient.refresh_from_db()
+        self.assertEqual(patient.day_streak, 3)
@@ -0,0 +1,116 @@
+"""
+Tests for offline practice packs
+"""
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Task
+from task.tests.test_tasks_api import TaskApiTestCase, create_url
+
+OFFLINE_PACK_URL = reverse("task:task-offline-pack")
+
+
+class OfflinePackTests(TaskApiTestCase):
+    """Test exporting the assigned tasks of a patient"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for choice in self.create_library(30):
+            default_storage.save(
+                choice.data2.name, ContentFile(f"image {choice.id}".encode())
+            )
+        self.tasks = [
+            Task.objects.get(
+                id=self.client.post(
+                    create_url("Connect_Pairs_Text-Image"),
+                    {
+                        "name": f"Pack {i}",
+                        "type": "Connect_Pairs_Text-Image",
+                        "difficulty": "Easy",
+                    },
+                    format="json",
+                ).data["id"]
+            )
+            for i in range(2)
+        ]
+        self.patient = get_user_model().objects.create_user(
+            "patient@example.com", "testpass123"
+        )
+        self.patient.assigned_tasks.add(*self.tasks)
+        self.patient_client = APIClient()
+        self.patient_client.force_authenticate(self.patient)
+
+    def download(self, **params):
+        """Download a pack and return the opened archive"""
+        res = self.patient_client.get(OFFLINE_PACK_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(res.streaming_content)))
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(manifest["version"], res["X-Pack-Version"])
+        return archive, manifest
+
+    def task_entries(self, archive):
+        """Return the archive paths of the tasks in a pack"""
+        return sorted(
+            name for name in archive.namelist() if name.startswith("tasks/")
+        )
+
+    def test_full_pack(self):
+        """Test a pack holds every assigned task and its images"""
+        archive, manifest = self.download()
+
+        self.assertEqual(
+            self.task_entries(archive),
+            sorted(f"tasks/{task.id}.json" for task in self.tasks),
+        )
+        task = json.loads(archive.read(f"tasks/{self.tasks[0].id}.json"))
+        self.assertEqual(len(task["questions"]), 10)
+        url = task["questions"][0]["choices"][0]["data2"]
+        path = manifest["images"][url]
+        with default_storage.open(path[len("images/"):]) as image:
+            self.assertEqual(archive.read(path), image.read())
+        self.assertIsNone(manifest["since"])
+
+    def test_incremental_pack(self):
+        """Test a pack since an earlier one only holds changed tasks"""
+        _, first = self.download()
+
+        archive, manifest = self.download(since=first["version"])
+        self.assertEqual(self.task_entries(archive), [])
+        self.assertEqual(manifest["since"], first["version"])
+        self.assertEqual(
+            sorted(manifest["tasks"]), sorted(task.id for task in self.tasks)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tasks[1].name = "Renamed"
+            self.tasks[1].save()
+        archive, manifest = self.download(since=manifest["version"])
+        self.assertEqual(
+            self.task_entries(archive), [f"tasks/{self.tasks[1].id}.json"]
+        )
+
+    def test_unknown_since_sends_full_pack(self):
+        """Test an unknown earlier version falls back to a full pack"""
+        archive, manifest = self.download(since="unknown")
+
+        self.assertEqual(len(self.task_entries(archive)), 2)
+        self.assertIsNone(manifest["since"])
@@ -0,0 +1,162 @@
+"""
+Tests for the pool of pre-generated tasks
+"""
+import uuid
+
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from core.models import CustomChoice, Task, TaskResult
+from task import pool
+from task.tests.test_tasks_api import TASKS_URL, TaskApiTestCase, create_url
+
+
+@override_settings(TASK_POOL_WATERMARK=2)
+class TaskPoolTests(TaskApiTestCase):
+    """Test refilling and claiming pooled tasks"""
+
+    def test_refill_tops_up_to_watermark(self):
+        """Test every generated type and difficulty is filled"""
+        self.create_library(40)
+
+        pool.refill()
+        pool.refill()
+
+        pooled = Task.objects.filter(is_pooled=True)
+        self.assertEqual(pooled.count(), 3 * 2 * 2)
+        self.assertEqual(
+            pooled.filter(
+                type="Four_Choices_Image-Texts", difficulty="Hard"
+            ).count(),
+            2,
+        )
+
+    def test_refill_skipped_while_locked(self):
+        """Test a refill is skipped while another one holds the lock"""
+        self.create_library(40)
+        other = connections.create_connection("default")
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [pool.REFILL_LOCK])
+
+        pool.refill()
+
+        self.assertFalse(Task.objects.filter(is_pooled=True).exists())
+
+    def test_refill_skips_types_without_data(self):
+        """Test types the library cannot generate are not pooled"""
+        self.create_library(30)
+
+        pool.refill()
+
+        self.assertEqual(
+            set(
+                Task.objects.filter(is_pooled=True).values_list(
+                    "type", flat=True
+                )
+            ),
+            {"Connect_Pairs_Text-Image"},
+        )
+
+    def test_pooled_tasks_are_hidden(self):
+        """Test pooled tasks are not listed"""
+        self.create_library(40)
+        pool.refill()
+
+        res = self.client.get(TASKS_URL)
+
+        self.assertEqual(res.data["results"], [])
+
+    def test_pooled_tasks_are_not_answered(self):
+        """Test results of pooled tasks are rejected"""
+        self.create_library(40)
+        pool.refill()
+        task = Task.objects.filter(is_pooled=True).first()
+        answers = [{"answer": [{"data1": "a", "data2": "b"}]}]
+
+        res = self.client.post(
+            reverse("task:taskresult-list"),
+            {"task": task.id, "answers": answers},
+            format="json",
+        )
+        synced = self.client.post(
+            reverse("task:taskresult-sync"),
+            {
+                "results": [
+                    {
+                        "idempotency_key": str(uuid.uuid4()),
+                        "task": task.id,
+                        "answers": answers,
+                    }
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("task", res.data)
+        self.assertEqual(synced.data["results"][0]["status"], "invalid")
+        self.assertFalse(TaskResult.objects.exists())
+
+    def test_create_claims_pooled_task(self):
+        """Test creating a generated task claims one from the pool"""
+        self.create_library(40)
+        pool.refill()
+        total = Task.objects.count()
+        payload = {
+            "name": "My exercise",
+            "type": "Four_Choices_Text-Images",
+            "difficulty": "Easy",
+            "tags": [{"name": "claimed"}],
+        }
+
+        res = self.client.post(
+            create_url("Four_Choices_Text-Images"), payload, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.count(), total)
+        task = Task.objects.get(id=res.data["id"])
+        self.assertFalse(task.is_pooled)
+        self.assertEqual(task.name, "My exercise")
+        self.assertEqual(task.created_by, self.user)
+        self.assertTrue(task.is_custom)
+        self.assertEqual(task.fourchoice_questions.count(), 10)
+        self.assertEqual(
+            list(task.tags.values_list("name", flat=True)), ["claimed"]
+        )
+
+    def test_claimed_task_links_and_ownership(self):
+        """Test claimed tasks link images of the request and own choices"""
+        self.create_library(40)
+        pool.refill()
+        paths = CustomChoice.objects.filter(
+            assigned_to__is_pooled=True
+        ).values_list("data2", flat=True)
+        self.assertTrue(all(path.startswith("/") for path in paths))
+        payload = {
+            "name": "My exercise",
+            "type": "Connect_Pairs_Text-Image",
+            "difficulty": "Easy",
+        }
+
+        res = self.client.post(
+            create_url("Connect_Pairs_Text-Image"), payload, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        choices = CustomChoice.objects.filter(assigned_to=res.data["id"])
+        self.assertTrue(choices.exists())
+        for choice in choices:
+            self.assertTrue(choice.data2.startswith("http://testserver/"))
+            self.assertEqual(choice.created_by, self.user)
+
+    def test_claim_empty_pool(self):
+        """Test claiming from an empty pool returns nothing"""
+        self.assertIsNone(
+            pool.claim(
+                "Four_Choices_Text-Images", "Easy", "http://testserver/"
+            )
+        )
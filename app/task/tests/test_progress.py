@@ -0,0 +1,163 @@
+"""
+Tests for patient progress rollups and analytics
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from core.models import DailyProgress, Task, TaskResult
+from task import progress
+from task.tests.test_tasks_api import TaskApiTestCase
+
+RESULTS_URL = reverse("task:taskresult-list")
+ANALYTICS_URL = reverse("task:taskresult-analytics")
+
+
+class ProgressTests(TaskApiTestCase):
+    """Test rolling up the results of patients"""
+
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(
+            name="Connect",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+        self.patient = get_user_model().objects.create_user(
+            "patient@example.com",
+            "testpass123",
+            assigned_to=self.user,
+            assignment_active=True,
+        )
+        self.today = progress.day_of(timezone.now())
+
+    def submit(self, *correct):
+        """Submit a result as the patient, one answer per `correct` flag"""
+        self.client.force_authenticate(self.patient)
+        res = self.client.post(
+            RESULTS_URL,
+            {
+                "task": self.task.id,
+                "answers": [
+                    {
+                        "answer": [
+                            {"data1": "a", "data2": "b", "is_correct": flag}
+                            for flag in correct
+                        ]
+                    }
+                ],
+            },
+            format="json",
+        )
+        self.client.force_authenticate(self.user)
+        return res
+
+    def rollup(self):
+        """Return the counts of the rollup of the patient for today"""
+        return DailyProgress.objects.values_list(
+            "result_count", "correct_count", "total_count"
+        ).get(patient=self.patient, day=self.today)
+
+    def test_results_are_rolled_up(self):
+        """Test submitted results are counted in the rollup of the day"""
+        self.submit(True, False)
+        self.submit(True, True, True)
+
+        self.assertEqual(self.rollup(), (2, 4, 5))
+
+    def test_deleted_results_are_uncounted(self):
+        """Test deleting a result uncounts it"""
+        self.submit(True, False)
+        res = self.submit(True)
+
+        TaskResult.objects.get(id=res.data["id"]).delete()
+
+        self.assertEqual(self.rollup(), (1, 1, 2))
+
+    def test_reconcile_rebuilds_rollups(self):
+        """Test reconciling rebuilds drifted rollups of the last days"""
+        self.submit(True, False)
+        DailyProgress.objects.update(result_count=9, correct_count=9)
+        old = DailyProgress.objects.create(
+            patient=self.patient,
+            day=self.today - timedelta(days=30),
+            task_type=self.task.type,
+            difficulty=self.task.difficulty,
+            result_count=3,
+        )
+
+        self.assertEqual(progress.reconcile(days=7), 1)
+
+        self.assertEqual(self.rollup(), (1, 1, 2))
+        self.assertTrue(DailyProgress.objects.filter(id=old.id).exists())
+
+    def test_analytics(self):
+        """Test therapists read the progress of a patient from rollups"""
+        self.submit(True, False)
+        self.submit(True)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                ANALYTICS_URL,
+                {
+                    "patient": self.patient.id,
+                    "date_from": (self.today - timedelta(days=6)).isoformat(),
+                },
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rollup_queries = [
+            query for query in queries.captured_queries
+            if "core_dailyprogress" in query["sql"]
+        ]
+        self.assertEqual(len(rollup_queries), 1)
+        self.assertEqual(res.data["totals"]["result_count"], 2)
+        self.assertAlmostEqual(res.data["totals"]["accuracy"], 2 / 3)
+        self.assertEqual(len(res.data["days"]), 7)
+        self.assertEqual(
+            [day["result_count"] for day in res.data["days"]],
+            [0] * 6 + [2],
+        )
+        self.assertEqual(
+            [row["task_type"] for row in res.data["task_types"]],
+            [self.task.type],
+        )
+
+    def test_analytics_of_own_progress(self):
+        """Test patients read their own progress"""
+        self.submit(True)
+        self.client.force_authenticate(self.patient)
+
+        res = self.client.get(ANALYTICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["patient"], self.patient.id)
+        self.assertEqual(len(res.data["days"]), progress.DEFAULT_DAYS)
+
+    def test_analytics_of_unlinked_patient(self):
+        """Test therapists cannot read the progress of other patients"""
+        self.patient.assignment_active = False
+        self.patient.save()
+
+        res = self.client.get(ANALYTICS_URL, {"patient": self.patient.id})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_analytics_invalid_dates(self):
+        """Test invalid and too long date ranges are rejected"""
+        res = self.client.get(
+            ANALYTICS_URL, {"patient": self.patient.id, "date_to": "today"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(
+            ANALYTICS_URL,
+            {"patient": self.patient.id, "date_from": "2000-01-01"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,146 @@
+"""
+Tests for the generated exercise sampler
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import BasicChoice, Tag
+from task import library, sampler
+
+
+def create_library(user, count):
+    """Create `count` basic choices owned by `user`"""
+    return [
+        BasicChoice.objects.create(
+            data1=f"word{i}",
+            data2=f"uploads/choices/{i}.png",
+            created_by=user,
+        )
+        for i in range(count)
+    ]
+
+
+class SamplerTests(TestCase):
+    """Test sampling from the default library"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_therapist_user(
+            "default@example.com", "testpass123"
+        )
+        patcher = patch.object(library, "DEFAULT_LIBRARY_OWNER", self.user.id)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            sampler.snapshot.invalidate()
+
+    def create_library(self, count):
+        """Create `count` basic choices in the default library"""
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_library(self.user, count)
+
+    def test_sample_groups_are_distinct(self):
+        """Test all sampled choices of a task are different"""
+        self.create_library(40)
+
+        groups = sampler.sample_groups(10, 4)
+
+        ids = [choice.id for group in groups for choice in group]
+        self.assertEqual(len(groups), 10)
+        self.assertTrue(all(len(group) == 4 for group in groups))
+        self.assertEqual(len(set(ids)), 40)
+
+    def test_sample_does_not_query_after_load(self):
+        """Test the library is loaded once and then served from memory"""
+        self.create_library(30)
+        sampler.sample(3)
+
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                sampler.sample(3)
+
+    def test_library_invalidated_on_change(self):
+        """Test saving and deleting choices refreshes the snapshot"""
+        choices = self.create_library(3)
+        self.assertEqual(len(sampler.snapshot.get()), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(name="animals", user=self.user)
+            choices[0].tags.add(tag)
+        self.assertEqual(sampler.snapshot.get()[0].tags, (tag.id,))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            choices[1].delete()
+        self.assertEqual(len(sampler.snapshot.get()), 2)
+
+    def test_sample_too_large_raises(self):
+        """Test sampling more choices than available raises an error"""
+        self.create_library(5)
+
+        with self.assertRaises(ValueError):
+            sampler.sample(6)
+
+    def test_sample_tagged_choices(self):
+        """Test sampling only draws choices carrying all the tags"""
+        choices = self.create_library(6)
+        with self.captureOnCommitCallbacks(execute=True):
+            animals = Tag.objects.create(name="animals", user=self.user)
+            farm = Tag.objects.create(name="farm", user=self.user)
+            animals.basicchoice_set.add(*choices[:4])
+            farm.basicchoice_set.add(*choices[2:])
+
+        both = sampler.sample(2, tags=["animals", "farm"])
+
+        self.assertEqual(
+            sorted(choice.id for choice in both),
+            [choices[2].id, choices[3].id],
+        )
+        with self.assertRaises(ValueError):
+            sampler.sample(3, tags=["animals", "farm"])
+        with self.assertRaises(ValueError):
+            sampler.sample(1, tags=["unknown"])
+
+    def test_tag_index_follows_tag_changes(self):
+        """Test renaming a tag rebuilds the tag index"""
+        choices = self.create_library(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(name="animals", user=self.user)
+            tag.basicchoice_set.add(*choices)
+        self.assertEqual(len(sampler.tagged(["animals"])), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = "pets"
+            tag.save()
+
+        self.assertEqual(sampler.tagged(["animals"]), [])
+        self.assertEqual(len(sampler.tagged(["pets"])), 3)
+
+    def test_tag_index_reads_names_from_snapshot(self):
+        """Test the tag index is built from the snapshot alone"""
+        choices = self.create_library(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(name="animals", user=self.user)
+            tag.basicchoice_set.add(*choices)
+        sampler.snapshot.get()
+
+        with self.assertNumQueries(0):
+            index = sampler._load_tag_index()
+
+        self.assertEqual(len(index["animals"]), 3)
+
+    def test_library_kept_on_other_changes(self):
+        """Test choices and tags of other users keep the snapshot"""
+        self.create_library(3)
+        sampler.snapshot.get()
+        other = get_user_model().objects.create_therapist_user(
+            "other@example.com", "testpass123"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            choices = create_library(other, 2)
+            tag = Tag.objects.create(name="animals", user=other)
+            tag.basicchoice_set.add(*choices)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(sampler.snapshot.get()), 3)
@@ -0,0 +1,1460 @@
+"""
+Tests for the Task API
+"""
+import uuid
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.db.models.signals import pre_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Answer,
+    AnswerFourChoice,
+    BasicChoice,
+    CustomChoice,
+    FourChoice,
+    LatestTaskResult,
+    QuestionConnectImageAnswer,
+    Tag,
+    Task,
+    TaskResult,
+)
+from core.versions import get_version
+from task import (
+    detail_cache,
+    generation,
+    library,
+    picker,
+    sampler,
+    versions,
+)
+from task.serializers import TagSerializer
+from user.versions import profile_key
+
+TASKS_URL = reverse("task:task-list")
+CAN_GENERATE_URL = reverse("task:task-can-generate")
+RANDOM_TASK_URL = reverse("task:task-get-random-task")
+
+
+def create_url(task_type):
+    """Create and return a task creation url for the task type"""
+    return f"{TASKS_URL}?task_type={task_type}"
+
+
+def connect_pairs_payload(question_count, name="Pairs"):
+    """Return a connect pairs task payload with `question_count` questions"""
+    return {
+        "name": name,
+        "type": "Connect_Pairs_Text-Text",
+        "difficulty": "Easy",
+        "tags": [{"name": name}],
+        "questions": [
+            {
+                "choices": [
+                    {
+                        "data1": f"word{i}-{j}",
+                        "data2": f"pair{i}-{j}",
+                        "tags": [{"name": "words"}, {"name": f"q{i}"}],
+                    }
+                    for j in range(3)
+                ]
+            }
+            for i in range(question_count)
+        ],
+    }
+
+
+class TaskApiTestCase(TestCase):
+    """Base test case with an authenticated therapist and a library"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_therapist_user(
+            "therapist@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = patch.object(library, "DEFAULT_LIBRARY_OWNER", self.user.id)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            sampler.snapshot.invalidate()
+            picker.snapshot.invalidate()
+
+    def create_library(self, count):
+        """Create `count` default library choices"""
+        with self.captureOnCommitCallbacks(execute=True):
+            return [
+                BasicChoice.objects.create(
+                    data1=f"word{i}",
+                    data2=f"uploads/choices/{i}.png",
+                    created_by=self.user,
+                )
+                for i in range(count)
+            ]
+
+    def count_inserts(self, url, payload):
+        """Post the payload and return the number of INSERTs executed"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(url, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return sum(
+            query["sql"].startswith("INSERT")
+            for query in queries.captured_queries
+        )
+
+
+class TaskCreateTests(TaskApiTestCase):
+    """Test creating tasks"""
+
+    def test_create_connect_pairs_with_questions(self):
+        """Test submitted questions, choices and tags are stored"""
+        url = create_url("Connect_Pairs_Text-Text")
+        res = self.client.post(url, connect_pairs_payload(2), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        task = Task.objects.get(id=res.data["id"])
+        self.assertEqual(task.custom_questions.count(), 2)
+        question = task.custom_questions.order_by("id").first()
+        self.assertEqual(question.choices.count(), 3)
+        choice = question.choices.order_by("id").first()
+        self.assertEqual(
+            sorted(choice.tags.values_list("name", flat=True)),
+            ["q0", "words"],
+        )
+        self.assertEqual(self.user.tag_set.filter(name="words").count(), 1)
+
+    def test_create_questions_insert_count_is_constant(self):
+        """Test the number of INSERTs does not grow with questions"""
+        url = create_url("Connect_Pairs_Text-Text")
+
+        few = self.count_inserts(url, connect_pairs_payload(1, "few"))
+        many = self.count_inserts(url, connect_pairs_payload(10, "many"))
+
+        self.assertEqual(few, many)
+
+    def test_generate_connect_pairs(self):
+        """Test generating a connect pairs task from the library"""
+        self.create_library(30)
+        url = create_url("Connect_Pairs_Text-Image")
+        payload = {
+            "name": "Generated",
+            "type": "Connect_Pairs_Text-Image",
+            "difficulty": "Easy",
+        }
+
+        res = self.client.post(url, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        task = Task.objects.get(id=res.data["id"])
+        self.assertEqual(task.custom_questions.count(), 10)
+        self.assertEqual(
+            CustomChoice.objects.filter(assigned_to=task)
+            .values("data1").distinct().count(),
+            30,
+        )
+
+    def test_generate_four_choices(self):
+        """Test generating a four choices task from the library"""
+        self.create_library(40)
+        url = create_url("Four_Choices_Image-Texts")
+        payload = {
+            "name": "Generated",
+            "type": "Four_Choices_Image-Texts",
+            "difficulty": "Hard",
+        }
+
+        res = self.client.post(url, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        task = Task.objects.get(id=res.data["id"])
+        self.assertEqual(task.fourchoice_questions.count(), 10)
+        choice = FourChoice.objects.filter(assigned_to=task).first()
+        self.assertTrue(choice.question_data.endswith(".png"))
+        self.assertTrue(choice.correct_option.startswith("word"))
+
+    def test_generate_without_enough_data_writes_nothing(self):
+        """Test a failed generation does not leave a task behind"""
+        self.create_library(39)
+        url = create_url("Four_Choices_Text-Images")
+        payload = {
+            "name": "Generated",
+            "type": "Four_Choices_Text-Images",
+            "difficulty": "Easy",
+        }
+
+        res = self.client.post(url, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskListTests(TaskApiTestCase):
+    """Test listing tasks with the default, custom and generated filters"""
+
+    def setUp(self):
+        super().setUp()
+        other = get_user_model().objects.create_therapist_user(
+            "other@example.com", "testpass123"
+        )
+        self.tasks = {
+            name: Task.objects.create(
+                name=name,
+                type="Connect_Pairs_Text-Text",
+                difficulty="Easy",
+                created_by=created_by,
+                is_custom=is_custom,
+            ).id
+            for name, created_by, is_custom in [
+                ("default", self.user, False),
+                ("default_custom", self.user, True),
+                ("custom", other, True),
+                ("generated", other, False),
+            ]
+        }
+
+    def list_names(self, **params):
+        """List tasks with the filters and return their names"""
+        res = self.client.get(
+            TASKS_URL, {name: "true" for name in params}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [task["name"] for task in res.data["results"]]
+
+    def test_filters_select_tasks(self):
+        """Test every filter combination selects the matching tasks"""
+        expected = [
+            ({}, ["generated", "custom", "default_custom", "default"]),
+            ({"default": 1}, ["default_custom", "default"]),
+            ({"custom": 1}, ["custom", "default_custom"]),
+            ({"generated": 1}, ["generated"]),
+            ({"default": 1, "custom": 1},
+             ["custom", "default_custom", "default"]),
+            ({"default": 1, "generated": 1},
+             ["generated", "default_custom", "default"]),
+            ({"custom": 1, "generated": 1},
+             ["generated", "custom", "default_custom"]),
+            ({"default": 1, "custom": 1, "generated": 1},
+             ["generated", "custom", "default_custom", "default"]),
+        ]
+        for params, names in expected:
+            with self.subTest(params=params):
+                self.assertEqual(self.list_names(**params), names)
+
+    def test_list_is_a_single_predicate(self):
+        """Test filtered listings do not use DISTINCT or subqueries"""
+        with CaptureQueriesContext(connection) as queries:
+            self.list_names(default=1, generated=1)
+
+        task_queries = [
+            query["sql"] for query in queries.captured_queries
+            if 'FROM "core_task"' in query["sql"]
+        ]
+        self.assertEqual(len(task_queries), 1)
+        self.assertNotIn("DISTINCT", task_queries[0])
+
+
+class TaskQueryBudgetTests(TaskApiTestCase):
+    """Test reading tasks takes a constant number of queries"""
+
+    def detail_url(self, task_id, task_type):
+        """Return the detail url of a task read as the task type"""
+        url = reverse("task:task-detail", args=[task_id])
+        return f"{url}?task_type={task_type}"
+
+    def create_connect_pairs(self, question_count, name):
+        """Create a connect pairs task and return its id"""
+        res = self.client.post(
+            create_url("Connect_Pairs_Text-Text"),
+            connect_pairs_payload(question_count, name),
+            format="json",
+        )
+        return res.data["id"]
+
+    def test_connect_pairs_detail_query_budget(self):
+        """Test a connect pairs detail is read in six queries"""
+        for question_count in (1, 10):
+            task_id = self.create_connect_pairs(
+                question_count, f"task{question_count}"
+            )
+            with self.subTest(question_count=question_count):
+                with self.assertNumQueries(6):
+                    res = self.client.get(
+                        self.detail_url(task_id, "Connect_Pairs_Text-Text")
+                    )
+                self.assertEqual(len(res.data["questions"]), question_count)
+
+    def test_four_choices_detail_query_budget(self):
+        """Test a four choices detail is read in five queries"""
+        self.create_library(40)
+        payload = {
+            "name": "Generated",
+            "type": "Four_Choices_Image-Texts",
+            "difficulty": "Easy",
+            "tags": [{"name": "a"}, {"name": "b"}],
+        }
+        res = self.client.post(
+            create_url("Four_Choices_Image-Texts"), payload, format="json"
+        )
+
+        with self.assertNumQueries(5):
+            res = self.client.get(
+                self.detail_url(res.data["id"], "Four_Choices_Image-Texts")
+            )
+
+        self.assertEqual(len(res.data["questions"]), 10)
+
+    def test_list_query_budget(self):
+        """Test listing tasks does not query per task"""
+        for i in range(5):
+            self.create_connect_pairs(1, f"task{i}")
+
+        with self.assertNumQueries(3):
+            res = self.client.get(TASKS_URL)
+
+        self.assertEqual(len(res.data["results"]), 5)
+
+
+class TaskDetailCacheTests(TaskApiTestCase):
+    """Test serving task details from the detail cache"""
+
+    def setUp(self):
+        super().setUp()
+        res = self.client.post(
+            create_url("Connect_Pairs_Text-Text"),
+            connect_pairs_payload(3, "cached"),
+            format="json",
+        )
+        self.task = Task.objects.get(id=res.data["id"])
+        self.url = reverse("task:task-detail", args=[self.task.id])
+        self.url += "?task_type=Connect_Pairs_Text-Text"
+
+    def test_detail_served_from_cache(self):
+        """Test a second read only looks up the version of the task"""
+        first = self.client.get(self.url)
+        stats = detail_cache.stats()
+
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(detail_cache.stats()["hits"], stats["hits"] + 1)
+
+    def test_search_not_served_from_cache(self):
+        """Test a search excluding the task is not answered from cache"""
+        self.client.get(self.url)
+        stats = detail_cache.stats()
+
+        res = self.client.get(self.url + "&search=unrelated")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(detail_cache.stats(), stats)
+
+    def test_detail_invalidated_on_update(self):
+        """Test updating a task drops its cached payload"""
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {"name": "renamed"}, format="json")
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.data["name"], "renamed")
+
+    def test_detail_invalidated_in_the_transaction(self):
+        """Test a change is served before any cache token is dropped"""
+        self.client.get(self.url)
+
+        self.client.patch(self.url, {"name": "renamed"}, format="json")
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.data["name"], "renamed")
+
+    def test_detail_invalidated_on_content_change(self):
+        """Test changing a choice or a tag drops the cached payload"""
+        self.client.get(self.url)
+        choice = CustomChoice.objects.filter(assigned_to=self.task).first()
+        tag = choice.tags.get(name="words")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            choice.data1 = "changed"
+            choice.save()
+        res = self.client.get(self.url)
+        self.assertIn(
+            "changed",
+            [c["data1"] for q in res.data["questions"] for c in q["choices"]],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = "vocabulary"
+            tag.save()
+        res = self.client.get(self.url)
+        self.assertIn(
+            "vocabulary",
+            [t["name"] for q in res.data["questions"]
+             for c in q["choices"] for t in c["tags"]],
+        )
+
+    def test_stats_require_admin(self):
+        """Test only admins can read the cache counters"""
+        url = reverse("task:task-detail-cache-stats")
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {"hits", "misses"})
+
+
+class ConditionalGetTests(TaskApiTestCase):
+    """Test answering conditional GET requests with ETags"""
+
+    def setUp(self):
+        super().setUp()
+        res = self.client.post(
+            create_url("Connect_Pairs_Text-Text"),
+            connect_pairs_payload(2, "etag"),
+            format="json",
+        )
+        self.task = Task.objects.get(id=res.data["id"])
+        self.url = reverse("task:task-detail", args=[self.task.id])
+        self.url += "?task_type=Connect_Pairs_Text-Text"
+
+    def assertNotModified(self, url):
+        """
+        Assert a repeated GET of `url` is answered with a 304 after only
+        looking up the version of the response
+        """
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        return etag
+
+    def test_task_detail_not_modified(self):
+        """Test an unchanged task detail is answered with a 304"""
+        self.assertNotModified(self.url)
+
+    def test_task_detail_etag_changes_on_update(self):
+        """Test updating a task changes its ETag"""
+        etag = self.assertNotModified(self.url)
+
+        self.client.patch(self.url, {"name": "renamed"}, format="json")
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_task_list_etag_changes_on_create(self):
+        """
+        Test creating a task changes the ETag of the listing, once the
+        creating transaction commits
+        """
+        etag = self.assertNotModified(TASKS_URL)
+        token = get_version(versions.TASK_LIST_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                create_url("Connect_Pairs_Text-Text"),
+                connect_pairs_payload(1, "another"),
+                format="json",
+            )
+            self.assertEqual(get_version(versions.TASK_LIST_KEY), token)
+        res = self.client.get(TASKS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_basic_choices_etag_changes_on_create(self):
+        """Test adding a library choice changes the ETag of the library"""
+        url = reverse("task:basicchoice-list")
+        etag = self.assertNotModified(url)
+
+        self.create_library(1)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_profile_etag_changes_on_update(self):
+        """Test updating the profile changes its ETag"""
+        url = reverse("user:me-therapist")
+        etag = self.assertNotModified(url)
+
+        self.user.name = "Renamed"
+        self.user.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_profile_version_replaced_after_save(self):
+        """Test the profile version is replaced only once the row is"""
+        key = profile_key(self.user.id)
+        before = get_version(key)
+        seen = []
+
+        def saving(sender, instance, **kwargs):
+            seen.append(get_version(key))
+
+        pre_save.connect(saving, sender=get_user_model())
+        self.addCleanup(pre_save.disconnect, saving, get_user_model())
+        self.user.name = "Renamed"
+        self.user.save()
+
+        self.assertEqual(seen, [before])
+        self.assertNotEqual(get_version(key), before)
+
+
+class RandomTaskTests(TaskApiTestCase):
+    """Test picking a random default task"""
+
+    def setUp(self):
+        super().setUp()
+        other = get_user_model().objects.create_therapist_user(
+            "other@example.com", "testpass123"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tasks = {
+                (task_type, difficulty): Task.objects.create(
+                    name=f"{task_type} {difficulty}",
+                    type=task_type,
+                    difficulty=difficulty,
+                    created_by=self.user,
+                )
+                for task_type in Task.Type.values
+                for difficulty in Task.Difficulty.values
+            }
+            self.other_task = Task.objects.create(
+                name="Other",
+                type=Task.Type.connect_pairs_text_text,
+                difficulty=Task.Difficulty.EASY,
+                created_by=other,
+            )
+
+    def pick(self, **params):
+        """Pick a random task and return its id"""
+        res = self.client.get(RANDOM_TASK_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data["id"]
+
+    def test_pick_only_default_tasks(self):
+        """Test random tasks come from the default library"""
+        ids = {task.id for task in self.tasks.values()}
+
+        picked = {self.pick() for _ in range(20)}
+
+        self.assertLessEqual(picked, ids)
+
+    def test_pick_with_filters(self):
+        """Test the type and difficulty filters select the task"""
+        task = self.tasks[
+            (Task.Type.four_choices_text, Task.Difficulty.HARD)
+        ]
+
+        picked = self.pick(
+            type=Task.Type.four_choices_text,
+            difficulty=Task.Difficulty.HARD,
+        )
+
+        self.assertEqual(picked, task.id)
+
+    def test_pick_does_not_write(self):
+        """Test picking a random task only reads"""
+        self.pick()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.pick()
+
+        self.assertTrue(
+            all(
+                query["sql"].startswith("SELECT")
+                for query in queries.captured_queries
+            )
+        )
+
+    def test_exclude_recent(self):
+        """Test the tasks of recent results are skipped"""
+        task_type = Task.Type.connect_pairs_text_text
+        easy = self.tasks[(task_type, Task.Difficulty.EASY)]
+        hard = self.tasks[(task_type, Task.Difficulty.HARD)]
+        TaskResult.objects.create(
+            answered_by=self.user, task=easy, date_created=timezone.now()
+        )
+
+        picked = {
+            self.pick(type=task_type, exclude_recent=1) for _ in range(10)
+        }
+
+        self.assertEqual(picked, {hard.id})
+
+    def test_new_default_task_is_picked(self):
+        """Test a new default task can be picked right away"""
+        task_type = Task.Type.connect_pairs_text_text
+        self.pick(type=task_type)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(
+                type=task_type, created_by=self.user
+            ).delete()
+            task = Task.objects.create(
+                name="New", type=task_type, created_by=self.user
+            )
+
+        self.assertEqual(self.pick(type=task_type), task.id)
+
+    def test_no_matching_task(self):
+        """Test a 404 is returned when every task is excluded"""
+        Task.objects.filter(created_by=self.user).delete()
+
+        res = self.client.get(RANDOM_TASK_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_filters(self):
+        """Test invalid filters are rejected"""
+        res = self.client.get(
+            RANDOM_TASK_URL,
+            {"type": "Unknown", "difficulty": "Medium", "exclude_recent": -1},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            set(res.data), {"type", "difficulty", "exclude_recent"}
+        )
+
+
+class SparseFieldsTests(TaskApiTestCase):
+    """Test selecting fields with `?fields=` and `?expand=`"""
+
+    def setUp(self):
+        super().setUp()
+        res = self.client.post(
+            create_url("Connect_Pairs_Text-Text"),
+            connect_pairs_payload(2, "sparse"),
+            format="json",
+        )
+        self.task = Task.objects.get(id=res.data["id"])
+        self.url = reverse("task:task-detail", args=[self.task.id])
+
+    def get(self, url, **params):
+        """Get `url` with the task type and `params`"""
+        res = self.client.get(
+            url, {"task_type": "Connect_Pairs_Text-Text", **params}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_fields_limit_detail(self):
+        """Test only the requested fields are rendered and queried"""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(self.url, fields="id,name")
+
+        self.assertEqual(set(data), {"id", "name"})
+        self.assertEqual(len(queries.captured_queries), 2)
+
+    def test_nested_fields(self):
+        """Test dotted fields select inside nested serializers"""
+        data = self.get(self.url, fields="id,questions.choices.data1")
+
+        self.assertEqual(set(data), {"id", "questions"})
+        self.assertEqual(
+            [set(choice) for choice in data["questions"][0]["choices"]],
+            [{"data1"}] * 3,
+        )
+
+    def test_expand_limits_nested_relations(self):
+        """Test expandable relations are dropped unless expanded"""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(self.url, expand="questions")
+
+        self.assertNotIn("tags", data)
+        self.assertIn("tags", data["questions"][0]["choices"][0])
+        self.assertFalse(
+            any(
+                "core_task_tags" in query["sql"]
+                for query in queries.captured_queries
+            )
+        )
+
+    def test_default_renders_every_field(self):
+        """Test every field is rendered without parameters"""
+        data = self.get(self.url)
+
+        self.assertEqual(
+            set(data),
+            {"id", "name", "type", "difficulty", "created_by", "tags",
+             "questions"},
+        )
+
+    def test_sparse_detail_cached_per_fieldset(self):
+        """Test cached payloads of different fieldsets do not mix"""
+        full = self.get(self.url)
+        sparse = self.get(self.url, fields="id")
+
+        self.assertEqual(sparse, {"id": self.task.id})
+        self.assertEqual(self.get(self.url), full)
+
+    def test_writes_ignore_fields(self):
+        """Test `fields` does not restrict the fields of a write"""
+        res = self.client.patch(
+            f"{self.url}?task_type=Connect_Pairs_Text-Text&fields=id",
+            {"name": "renamed"},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["name"], "renamed")
+
+    def test_profile_without_expansions(self):
+        """Test the profile drops its tasks and meetings unless expanded"""
+        data = self.get(reverse("user:me-patient"), expand="")
+
+        self.assertNotIn("assigned_tasks", data)
+        self.assertNotIn("my_meetings", data)
+        self.assertIn("email", data)
+
+
+class SearchTests(TaskApiTestCase):
+    """Test full-text search and autocompletion"""
+
+    def setUp(self):
+        super().setUp()
+        self.animals = Task.objects.create(
+            name="Farm animals",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+        self.colours = Task.objects.create(
+            name="Colours",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+        self.tag = Tag.objects.create(name="animals", user=self.user)
+        self.colours.tags.add(self.tag)
+
+    def search(self, url, **params):
+        """Return the ids of the results of a search"""
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in res.data["results"]]
+
+    def test_search_ranks_names_before_tags(self):
+        """Test tasks match by name and tags, names ranking first"""
+        ids = self.search(TASKS_URL, search="animals")
+
+        self.assertEqual(ids, [self.animals.id, self.colours.id])
+
+    def test_search_follows_tag_changes(self):
+        """Test renaming and unlinking tags updates the search"""
+        self.tag.name = "paint"
+        self.tag.save()
+        self.assertEqual(
+            self.search(TASKS_URL, search="paint"), [self.colours.id]
+        )
+
+        self.colours.tags.clear()
+        self.assertEqual(self.search(TASKS_URL, search="paint"), [])
+
+    def test_search_basic_choices(self):
+        """Test searching the choice library by text and tags"""
+        choice, other = self.create_library(2)
+        choice.data1 = "Tractor"
+        choice.save()
+        other.tags.add(self.tag)
+        url = reverse("task:basicchoice-list")
+
+        self.assertEqual(self.search(url, search="tractor"), [choice.id])
+        self.assertEqual(self.search(url, search="animals"), [other.id])
+
+    def test_autocomplete_prefix(self):
+        """Test autocompletion matches word prefixes"""
+        url = reverse("task:task-autocomplete")
+
+        res = self.client.get(url, {"q": "farm ani"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, [{"id": self.animals.id, "name": "Farm animals"}]
+        )
+        self.assertEqual(self.client.get(url, {"q": "?!"}).data, [])
+
+
+class BundleTests(TaskApiTestCase):
+    """Test fetching the details of several tasks in one request"""
+
+    url = reverse("task:task-bundle")
+
+    def setUp(self):
+        super().setUp()
+        self.create_library(40)
+        self.pairs = [
+            self.client.post(
+                create_url("Connect_Pairs_Text-Text"),
+                connect_pairs_payload(2, f"pairs{i}"),
+                format="json",
+            ).data["id"]
+            for i in range(3)
+        ]
+        self.four = [
+            self.client.post(
+                create_url("Four_Choices_Image-Texts"),
+                {
+                    "name": f"four{i}",
+                    "type": "Four_Choices_Image-Texts",
+                    "difficulty": "Easy",
+                },
+                format="json",
+            ).data["id"]
+            for i in range(3)
+        ]
+
+    def bundle(self, ids):
+        """Return the bundle of the tasks with the ids"""
+        res = self.client.get(self.url, {"ids": ",".join(map(str, ids))})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_bundle_serializes_by_type(self):
+        """Test each task is rendered by the serializer of its type"""
+        ids = [self.four[0], self.pairs[0], 0]
+
+        data = self.bundle(ids)
+
+        self.assertEqual([task["id"] for task in data["tasks"]], ids[:2])
+        self.assertEqual(data["missing"], [0])
+        self.assertIn(
+            "question_data", data["tasks"][0]["questions"][0]["choices"][0]
+        )
+        self.assertIn("data1", data["tasks"][1]["questions"][0]["choices"][0])
+
+    def test_bundle_query_count_is_constant(self):
+        """Test more tasks of the same types take no more queries"""
+        with CaptureQueriesContext(connection) as few:
+            self.bundle(self.pairs[:1] + self.four[:1])
+        with CaptureQueriesContext(connection) as many:
+            self.bundle(self.pairs + self.four)
+
+        self.assertEqual(
+            len(many.captured_queries), len(few.captured_queries)
+        )
+
+    def test_invalid_ids(self):
+        """Test missing or malformed ids are rejected"""
+        for ids in ["", "1,a"]:
+            res = self.client.get(self.url, {"ids": ids})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ResultSubmissionTests(TaskApiTestCase):
+    """Test submitting task results"""
+
+    url = reverse("task:taskresult-list")
+
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(
+            name="Results",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+
+    def connect_payload(self, question_count):
+        """Return a connect pairs result payload"""
+        return {
+            "task": self.task.id,
+            "answers": [
+                {
+                    "answer": [
+                        {"data1": f"w{i}-{j}", "data2": f"p{i}-{j}"}
+                        for j in range(3)
+                    ]
+                }
+                for i in range(question_count)
+            ],
+        }
+
+    def test_result_insert_count_is_constant(self):
+        """Test a result is written with one insert per table"""
+        self.assertEqual(
+            self.count_inserts(self.url, self.connect_payload(10)), 7
+        )
+
+        result = TaskResult.objects.get(answered_by=self.user)
+        self.assertEqual(result.answers.count(), 10)
+        self.assertEqual(
+            Answer.objects.filter(
+                assigned_to_question__assigned_to=result
+            ).count(),
+            30,
+        )
+
+    def test_four_choice_result(self):
+        """Test four choice answers are linked to their questions"""
+        payload = {
+            "task": self.task.id,
+            "answers": [
+                {
+                    "answer": [
+                        {
+                            "question_data": f"q{i}",
+                            "correct_option": "a",
+                            "incorrect_option1": "b",
+                            "incorrect_option2": "c",
+                            "incorrect_option3": "d",
+                            "chosen_option": "a",
+                        }
+                    ]
+                }
+                for i in range(2)
+            ],
+        }
+
+        res = self.client.post(
+            f"{self.url}?task_type=Four_Choices_Image-Texts",
+            payload,
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(
+                AnswerFourChoice.objects.values_list(
+                    "question_data", flat=True
+                )
+            ),
+            ["q0", "q1"],
+        )
+
+    def test_failed_result_writes_nothing(self):
+        """Test a failing insert rolls the whole result back"""
+        with patch.object(
+            Answer.objects, "bulk_create", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                self.client.post(
+                    self.url, self.connect_payload(2), format="json"
+                )
+
+        self.assertFalse(TaskResult.objects.exists())
+
+    def test_result_score_is_stored(self):
+        """Test the score of a result is stored and listed"""
+        payload = self.connect_payload(2)
+        payload["answers"][0]["answer"][0]["is_correct"] = False
+
+        res = self.client.post(self.url, payload, format="json")
+
+        result = TaskResult.objects.get(id=res.data["id"])
+        self.assertEqual((result.correct_count, result.total_count), (5, 6))
+        self.assertAlmostEqual(result.accuracy, 5 / 6)
+        self.assertAlmostEqual(res.data["accuracy"], 5 / 6)
+
+    def test_results_are_appended_as_attempts(self):
+        """Test earlier attempts are kept and the latest is pointed at"""
+        first = self.client.post(
+            self.url, self.connect_payload(1), format="json"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.post(
+                self.url, self.connect_payload(1), format="json"
+            )
+
+        self.assertEqual(first.data["attempt_no"], 1)
+        self.assertEqual(second.data["attempt_no"], 2)
+        self.assertFalse(
+            any(
+                query["sql"].startswith("DELETE")
+                for query in queries.captured_queries
+            )
+        )
+        self.assertEqual(QuestionConnectImageAnswer.objects.count(), 2)
+        latest = LatestTaskResult.objects.get(
+            answered_by=self.user, task=self.task
+        )
+        self.assertEqual(latest.result_id, second.data["id"])
+
+    def test_list_latest_attempts(self):
+        """Test listing only the latest attempt at each task"""
+        patient = get_user_model().objects.create_user(
+            "patient@example.com", "testpass123"
+        )
+        self.client.force_authenticate(patient)
+        for _ in range(3):
+            res = self.client.post(
+                self.url, self.connect_payload(1), format="json"
+            )
+
+        listed = self.client.get(self.url, {"latest": 1})
+
+        self.assertEqual(
+            [result["id"] for result in listed.data["results"]],
+            [res.data["id"]],
+        )
+
+    def test_deleting_latest_attempt_points_at_previous(self):
+        """Test the latest pointer moves back when the latest is deleted"""
+        first = self.client.post(
+            self.url, self.connect_payload(1), format="json"
+        )
+        second = self.client.post(
+            self.url, self.connect_payload(1), format="json"
+        )
+
+        TaskResult.objects.get(id=second.data["id"]).delete()
+
+        latest = LatestTaskResult.objects.get(
+            answered_by=self.user, task=self.task
+        )
+        self.assertEqual(latest.result_id, first.data["id"])
+
+
+class ResultListTests(TaskApiTestCase):
+    """Test listing task results"""
+
+    url = reverse("task:taskresult-list")
+
+    def setUp(self):
+        super().setUp()
+        self.connect = Task.objects.create(
+            name="Connect",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+        self.four = Task.objects.create(
+            name="Four",
+            type=Task.Type.four_choices_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+        self.patient = self.create_patient("patient@example.com")
+        self.now = timezone.now()
+
+    def create_patient(self, email, active=True):
+        """Create a patient linked to the therapist"""
+        return get_user_model().objects.create_user(
+            email,
+            "testpass123",
+            assigned_to=self.user,
+            assignment_active=active,
+        )
+
+    def create_result(self, patient, task, days_ago=0):
+        """Create a result of the patient `days_ago` days ago"""
+        return TaskResult.objects.create(
+            answered_by=patient,
+            task=task,
+            date_created=self.now - timedelta(days=days_ago),
+        )
+
+    def list_ids(self, **params):
+        """Return the ids of the listed results"""
+        res = self.client.get(self.url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [result["id"] for result in res.data["results"]]
+
+    def test_therapist_lists_active_patients(self):
+        """Test therapists only list results of actively linked patients"""
+        inactive = self.create_patient("inactive@example.com", active=False)
+        stranger = get_user_model().objects.create_user(
+            "stranger@example.com", "testpass123"
+        )
+        older = self.create_result(self.patient, self.connect, days_ago=1)
+        newer = self.create_result(self.patient, self.four)
+        self.create_result(inactive, self.connect)
+        self.create_result(stranger, self.connect)
+
+        self.assertEqual(self.list_ids(), [newer.id, older.id])
+
+    def test_patient_lists_own_results(self):
+        """Test patients only list their own results"""
+        other = self.create_patient("other@example.com")
+        own = self.create_result(self.patient, self.connect)
+        self.create_result(other, self.connect)
+
+        self.client.force_authenticate(self.patient)
+
+        self.assertEqual(self.list_ids(), [own.id])
+
+    def test_filters(self):
+        """Test filtering results by patient, task, type and date"""
+        other = self.create_patient("other@example.com")
+        old = self.create_result(self.patient, self.connect, days_ago=10)
+        four = self.create_result(self.patient, self.four, days_ago=2)
+        recent = self.create_result(other, self.connect)
+
+        self.assertEqual(
+            self.list_ids(patient=self.patient.id), [four.id, old.id]
+        )
+        self.assertEqual(
+            self.list_ids(task=self.connect.id), [recent.id, old.id]
+        )
+        self.assertEqual(self.list_ids(type=self.four.type), [four.id])
+        self.assertEqual(
+            self.list_ids(
+                date_from=(self.now - timedelta(days=3)).date().isoformat(),
+                date_to=(self.now - timedelta(days=1)).isoformat(),
+            ),
+            [four.id],
+        )
+
+    def test_invalid_filters(self):
+        """Test invalid filters are rejected"""
+        res = self.client.get(
+            self.url, {"patient": "me", "type": "x", "date_to": "soon"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {"patient", "type", "date_to"})
+
+
+class ResultSyncTests(TaskApiTestCase):
+    """Test syncing results recorded offline"""
+
+    url = reverse("task:taskresult-sync")
+
+    def setUp(self):
+        super().setUp()
+        self.connect = Task.objects.create(
+            name="Connect",
+            type=Task.Type.connect_pairs_text_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+        self.four = Task.objects.create(
+            name="Four",
+            type=Task.Type.four_choices_text,
+            difficulty=Task.Difficulty.EASY,
+            created_by=self.user,
+        )
+
+    def connect_result(self, key):
+        """Return a synced connect pairs result"""
+        return {
+            "idempotency_key": key,
+            "task": self.connect.id,
+            "answers": [{"answer": [{"data1": "a", "data2": "b"}]}],
+        }
+
+    def four_result(self, key):
+        """Return a synced four choice result"""
+        return {
+            "idempotency_key": key,
+            "task": self.four.id,
+            "answers": [
+                {
+                    "answer": [
+                        {
+                            "question_data": "q",
+                            "correct_option": "a",
+                            "incorrect_option1": "b",
+                            "incorrect_option2": "c",
+                            "incorrect_option3": "d",
+                            "chosen_option": "a",
+                        }
+                    ]
+                }
+            ],
+        }
+
+    def sync(self, *results):
+        """Sync the results and return the statuses"""
+        res = self.client.post(
+            self.url, {"results": list(results)}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item["status"] for item in res.data["results"]]
+
+    def test_sync_mixed_task_types(self):
+        """Test results of every type are written with one bulk path"""
+        keys = [str(uuid.uuid4()) for _ in range(4)]
+        results = [
+            self.connect_result(keys[0]),
+            self.four_result(keys[1]),
+            self.connect_result(keys[2]),
+            self.four_result(keys[3]),
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.sync(*results), ["created"] * 4)
+
+        inserts = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith("INSERT")
+        ]
+        self.assertEqual(len(inserts), 8)
+        self.assertEqual(TaskResult.objects.count(), 4)
+        self.assertEqual(Answer.objects.count(), 2)
+        self.assertEqual(AnswerFourChoice.objects.count(), 2)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_result_posted)
+
+    def test_replayed_results_are_duplicates(self):
+        """Test replaying a batch writes nothing"""
+        key = str(uuid.uuid4())
+        self.assertEqual(self.sync(self.connect_result(key)), ["created"])
+
+        statuses = self.sync(
+            self.connect_result(key), self.four_result(key)
+        )
+
+        self.assertEqual(statuses, ["duplicate", "duplicate"])
+        self.assertEqual(TaskResult.objects.count(), 1)
+        self.assertEqual(QuestionConnectImageAnswer.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        """Test the same key of another user is stored"""
+        key = str(uuid.uuid4())
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        TaskResult.objects.create(
+            answered_by=other,
+            task=self.connect,
+            date_created=timezone.now(),
+            idempotency_key=key,
+        )
+
+        self.assertEqual(self.sync(self.connect_result(key)), ["created"])
+
+    def test_invalid_results_are_reported(self):
+        """Test invalid results are reported and the others written"""
+        missing = self.connect_result(str(uuid.uuid4()))
+        missing["task"] = 0
+        wrong_answers = self.four_result(str(uuid.uuid4()))
+        wrong_answers["task"] = self.connect.id
+
+        res = self.client.post(
+            self.url,
+            {
+                "results": [
+                    missing,
+                    wrong_answers,
+                    self.connect_result("not-a-key"),
+                    self.four_result(str(uuid.uuid4())),
+                ]
+            },
+            format="json",
+        )
+
+        statuses = res.data["results"]
+        self.assertEqual(
+            [item["status"] for item in statuses],
+            ["invalid", "invalid", "invalid", "created"],
+        )
+        self.assertIn("task", statuses[0]["errors"])
+        self.assertIn("answers", statuses[1]["errors"])
+        self.assertIn("idempotency_key", statuses[2]["errors"])
+        self.assertEqual(TaskResult.objects.get().id, statuses[3]["id"])
+
+    def test_batch_must_be_a_list(self):
+        """Test a batch without results is rejected"""
+        res = self.client.post(self.url, {"results": []}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TagTests(TaskApiTestCase):
+    """Test tags shared by tasks and choices"""
+
+    def test_update_task_tags_reuses_tags(self):
+        """Test updating task tags reuses the tags of the user"""
+        url = create_url("Connect_Pairs_Text-Text")
+        res = self.client.post(url, connect_pairs_payload(1), format="json")
+        detail = reverse("task:task-detail", args=[res.data["id"]])
+
+        res = self.client.patch(
+            f"{detail}?task_type=Connect_Pairs_Text-Text",
+            {"tags": [{"name": "words"}, {"name": "new"}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        task = Task.objects.get(id=res.data["id"])
+        self.assertEqual(
+            sorted(task.tags.values_list("name", flat=True)),
+            ["new", "words"],
+        )
+        self.assertEqual(self.user.tag_set.filter(name="words").count(), 1)
+
+    def test_rename_tag_to_existing_name(self):
+        """Test a tag cannot be renamed to another tag's name"""
+        Tag.objects.create(name="animals", user=self.user)
+        tag = Tag.objects.create(name="pets", user=self.user)
+
+        serializer = TagSerializer(tag, data={"name": "animals"})
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("name", serializer.errors)
+
+
+class ThemedGenerationTests(TaskApiTestCase):
+    """Test generating tasks from tagged library choices"""
+
+    def setUp(self):
+        super().setUp()
+        choices = self.create_library(40)
+        tag = Tag.objects.create(name="animals", user=self.user)
+        tag.basicchoice_set.add(*choices[:30])
+        self.animals = {choice.data1 for choice in choices[:30]}
+
+    def test_generate_from_tagged_choices(self):
+        """Test a themed task only uses choices with the tags"""
+        payload = {
+            "name": "Animals",
+            "type": "Connect_Pairs_Text-Image",
+            "difficulty": "Easy",
+            "choice_tags": ["animals"],
+        }
+
+        res = self.client.post(
+            create_url("Connect_Pairs_Text-Image"), payload, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        words = set(
+            CustomChoice.objects.filter(assigned_to=res.data["id"])
+            .values_list("data1", flat=True)
+        )
+        self.assertEqual(words, self.animals)
+
+    def test_generate_without_enough_tagged_choices(self):
+        """Test a theme with too few choices is rejected"""
+        payload = {
+            "name": "Animals",
+            "type": "Four_Choices_Image-Texts",
+            "difficulty": "Easy",
+            "choice_tags": ["animals"],
+        }
+
+        res = self.client.post(
+            create_url("Four_Choices_Image-Texts"), payload, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.exists())
+
+
+class CanGenerateTests(TaskApiTestCase):
+    """Test the library counters and the can generate endpoint"""
+
+    def test_counters_follow_choices_and_tags(self):
+        """Test counters are updated when choices and tags change"""
+        choices = self.create_library(3)
+        tag = Tag.objects.create(name="animals", user=self.user)
+        choices[0].tags.add(tag)
+        tag.basicchoice_set.add(choices[1])
+        self.assertEqual(library.available_choices(), 3)
+        self.assertEqual(library.available_choices(tag=tag), 2)
+
+        choices[1].tags.remove(tag)
+        self.assertEqual(library.available_choices(tag=tag), 1)
+
+        choices[0].delete()
+        self.assertEqual(library.available_choices(), 2)
+        self.assertEqual(library.available_choices(tag=tag), 0)
+
+    def test_can_generate(self):
+        """Test the endpoint answers from the counters"""
+        self.create_library(30)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                CAN_GENERATE_URL, {"type": "Connect_Pairs_Text-Image"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["can_generate"])
+        self.assertEqual(res.data["available"], 30)
+
+        res = self.client.get(
+            CAN_GENERATE_URL, {"type": "Four_Choices_Text-Images"}
+        )
+        self.assertFalse(res.data["can_generate"])
+        self.assertEqual(res.data["required"], 40)
+
+    def test_can_generate_from_choice_tags(self):
+        """Test tagged choices are counted as generation draws them"""
+        choices = self.create_library(40)
+        with self.captureOnCommitCallbacks(execute=True):
+            animals = Tag.objects.create(name="animals", user=self.user)
+            farm = Tag.objects.create(name="farm", user=self.user)
+            animals.basicchoice_set.add(*choices[:35])
+            farm.basicchoice_set.add(*choices[:25])
+
+        res = self.client.get(
+            CAN_GENERATE_URL,
+            {
+                "type": "Connect_Pairs_Text-Image",
+                "choice_tags": ["animals", "farm"],
+            },
+        )
+
+        self.assertEqual(res.data["available"], 25)
+        self.assertFalse(res.data["can_generate"])
+        res = self.client.get(
+            CAN_GENERATE_URL,
+            {"type": "Connect_Pairs_Text-Image", "choice_tags": ["animals"]},
+        )
+        self.assertTrue(res.data["can_generate"])
+
+
+class SeededGenerationTests(TaskApiTestCase):
+    """Test reproducible generation of tasks from a seed"""
+
+    def generate(self, seed):
+        """Generate a seeded connect pairs task and return its words"""
+        payload = {
+            "name": "Seeded",
+            "type": "Connect_Pairs_Text-Image",
+            "difficulty": "Easy",
+            "seed": seed,
+        }
+        res = self.client.post(
+            create_url("Connect_Pairs_Text-Image"), payload, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return [
+            list(question.choices.order_by("id").values_list(
+                "data1", flat=True
+            ))
+            for question in Task.objects.get(id=res.data["id"])
+            .custom_questions.order_by("id")
+        ]
+
+    def test_same_seed_generates_same_questions(self):
+        """Test a seed always generates the same questions"""
+        self.create_library(40)
+
+        first = self.generate(7)
+        with patch.object(sampler, "sample_groups") as sample_groups:
+            second = self.generate(7)
+
+        self.assertEqual(first, second)
+        sample_groups.assert_not_called()
+        self.assertNotEqual(first, self.generate(8))
+
+    def test_seed_is_reproducible_without_cache(self):
+        """Test a seed reproduces the questions after a cache miss"""
+        self.create_library(40)
+        first = self.generate(7)
+
+        with patch.object(generation.cache, "get", return_value=None):
+            second = self.generate(7)
+
+        self.assertEqual(first, second)
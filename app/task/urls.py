@@ -11,6 +11,7 @@ router.register("tasks", views.TaskViewSet)
 router.register("basic_choices", views.BasicChoiceViewSet)
 router.register("tags", views.TagViewSet)
 router.register("results", views.TaskResultViewSet)
+router.register("generation_jobs", views.GenerationJobViewSet)
 
 app_name = "task"
 
@@ -0,0 +1,44 @@
+"""
+Version tokens of Task API payloads.
+Tokens are stored in the database and replaced in the transaction
+changing the data behind a payload. They key the task detail cache and
+the ETags of conditional GET requests. The tokens of the task listing
+and of the basic choice catalog are replaced once the change commits.
+"""
+from core.versions import bump_versions, bump_versions_on_commit, get_versions
+
+TASK_LIST_KEY = "task:list:version"
+BASIC_CHOICES_KEY = "task:basic_choices:version"
+
+
+def task_key(task_id):
+    """Return the cache key of the version token of a task"""
+    return f"task:detail:version:{task_id}"
+
+
+def task_versions(task_ids):
+    """Return a dict of the version tokens of the tasks with the ids"""
+    keys = {task_key(task_id): task_id for task_id in task_ids}
+    found = get_versions(keys)
+    return {task_id: found[key] for key, task_id in keys.items()}
+
+
+def _task_keys(task_ids):
+    """Return the version keys of the tasks with the ids"""
+    return [task_key(task_id) for task_id in task_ids if task_id is not None]
+
+
+def task_content_changed(task_ids):
+    """Replace the versions of tasks whose questions or choices changed"""
+    bump_versions(_task_keys(task_ids))
+
+
+def tasks_changed(task_ids):
+    """Replace the versions of changed tasks and of the task listing"""
+    bump_versions(_task_keys(task_ids))
+    bump_versions_on_commit([TASK_LIST_KEY])
+
+
+def basic_choices_changed():
+    """Replace the version of the basic choice catalog"""
+    bump_versions_on_commit([BASIC_CHOICES_KEY])
@@ -1,27 +1,48 @@
 """
 Views for the Task API
 """
+from datetime import timedelta
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
     OpenApiParameter,
     OpenApiTypes,
+    inline_serializer,
 )
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 from core.permissions import (
     IsTherapist,
     IsOwnerOfObject,
     IsTaskResultMyPatient,
 )
-from core.models import Task, BasicChoice, Tag, TaskResult
-from task import serializers
+from core.etags import ConditionalGetMixin
+from core.sparse import SparseFieldsViewMixin
+from core.models import Task, BasicChoice, Tag, TaskResult, GenerationJob
+from task import (
+    batch,
+    bulk,
+    detail_cache,
+    filters,
+    library,
+    offline,
+    picker,
+    progress,
+    search,
+    serializers,
+    versions,
+)
 
 
 def str_to_bool(s):
@@ -53,6 +74,29 @@ def check_permissions(self):
         return [composed_perm()]
 
 
+# Relations walked by each task serializer, prefetched by `TaskViewSet`
+PREFETCH_PLANS = {
+    serializers.TaskSerializer: ["tags"],
+    serializers.RandomTaskSerializer: ["tags"],
+    serializers.ConnectPairsTaskDetailSerializer: [
+        "tags",
+        "custom_questions__choices__tags",
+    ],
+    serializers.FourChoicesTaskDetailSerializer: [
+        "tags",
+        "fourchoice_questions__choices",
+    ],
+}
+
+# Relations walked by each task result serializer
+RESULT_PREFETCH_PLANS = {
+    serializers.TaskDetailResultSerializer: ["answers__answer"],
+    serializers.TaskDetailFourChoiceResultSerializer: [
+        "answers__answer_fourchoice"
+    ],
+}
+
+
 @extend_schema_view(
     list=extend_schema(
         parameters=[
@@ -74,6 +118,44 @@ def check_permissions(self):
                 enum=[True, False],
                 description="Filter to show only generated tasks",
             ),
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description=(
+                    "Full-text search over task names and tag names, "
+                    "ordering the tasks by rank"
+                ),
+            ),
+        ]
+    ),
+    autocomplete=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                description="Words of task or tag names, the last a prefix",
+            ),
+        ]
+    ),
+    offline_pack=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "since",
+                OpenApiTypes.STR,
+                description=(
+                    "Version of an earlier pack, to only include the tasks "
+                    "changed since"
+                ),
+            ),
+        ]
+    ),
+    bundle=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "ids",
+                OpenApiTypes.STR,
+                description="Comma separated ids of the tasks to return",
+            ),
         ]
     ),
     retrieve=extend_schema(
@@ -121,12 +203,65 @@ def check_permissions(self):
             )
         ]
     ),
+    get_random_task=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "type",
+                OpenApiTypes.STR,
+                enum=[
+                    "Connect_Pairs_Text-Image",
+                    "Connect_Pairs_Text-Text",
+                    "Four_Choices_Image-Texts",
+                    "Four_Choices_Text-Images",
+                ],
+                description="Only pick a task of this type",
+            ),
+            OpenApiParameter(
+                "difficulty",
+                OpenApiTypes.STR,
+                enum=["Easy", "Hard"],
+                description="Only pick a task of this difficulty",
+            ),
+            OpenApiParameter(
+                "exclude_recent",
+                OpenApiTypes.INT,
+                description=(
+                    "Skip the tasks of this many latest results of the user"
+                ),
+            ),
+        ]
+    ),
+    can_generate=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "type",
+                OpenApiTypes.STR,
+                enum=[
+                    "Connect_Pairs_Text-Image",
+                    "Four_Choices_Image-Texts",
+                    "Four_Choices_Text-Images",
+                ],
+                description="Task type to generate",
+            ),
+            OpenApiParameter(
+                "choice_tags",
+                OpenApiTypes.STR,
+                many=True,
+                description=(
+                    "Only count library choices carrying all of these tag "
+                    "names, as generation does"
+                ),
+            ),
+        ]
+    ),
 )
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(
+    SparseFieldsViewMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     """View for manage Task APIs"""
 
     serializer_class = serializers.ConnectPairsTaskDetailSerializer
-    queryset = Task.objects.all()
+    queryset = Task.objects.filter(is_pooled=False)
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
     model = Task
@@ -144,36 +279,30 @@ class TaskViewSet(viewsets.ModelViewSet):
             default user and are not marked as custom
             will be included in the queryset.
         If no query parameters are provided, the queryset will not be
-        filtered and will be ordered by the task id in descending order.
-        """
-        queryset = self.queryset.none()
-        queryset1 = self.queryset
-        queryset2 = self.queryset
-        queryset3 = self.queryset
-        default_param = str_to_bool(
-            self.request.query_params.get("default", False)
-        )
-        custom_param = str_to_bool(
-            self.request.query_params.get("custom", False)
-        )
-        generated_param = str_to_bool(
-            self.request.query_params.get("generated", False)
-        )
-        if default_param:
-            queryset1 = self.queryset.filter(created_by=1)
-            queryset = queryset | queryset1
-
-        if custom_param:
-            queryset2 = self.queryset.filter(is_custom=1)
-            queryset = queryset | queryset2
-
-        if generated_param:
-            queryset3 = self.queryset.exclude(created_by=1).filter(is_custom=0)
-            queryset = queryset | queryset3
+        filtered. The selected filters are combined into a single
+        predicate and the tasks are ordered by id in descending order.
+        With the `search` query parameter, only the tasks matching it are
+        kept, ordered by rank.
+        """
+        names = [
+            name for name in filters.TASK_FILTERS
+            if str_to_bool(self.request.query_params.get(name, False))
+        ]
+        queryset = self.queryset.filter(filters.task_filter(names))
+        text = self.request.query_params.get("search")
+        if text:
+            return self.prefetch(search.search(queryset, text))
+        return self.prefetch(queryset).order_by("-id")
 
-        if not default_param and not custom_param and not generated_param:
-            return self.queryset.order_by("-id").distinct()
-        return queryset.order_by("-id").distinct()
+    def prefetch(self, queryset):
+        """
+        Prefetch the relations walked by the serializer of the request,
+        so serializing a task takes the same number of queries no matter
+        how many questions, choices and tags it has. Relations left out
+        by `?fields=` or `?expand=` are not prefetched.
+        """
+        plan = PREFETCH_PLANS.get(self.get_serializer_class(), ())
+        return self.sparse_prefetch(queryset, plan)
 
     def get_permissions(self):
         """
@@ -205,17 +334,11 @@ class TaskViewSet(viewsets.ModelViewSet):
             return serializers.AssignTaskSerializer
         elif self.action == "get_random_task":
             return serializers.RandomTaskSerializer
-        elif (
-            task_param == "Connect_Pairs_Text-Text"
-            or task_param == "Connect_Pairs_Text-Image"
-        ):
-            return serializers.ConnectPairsTaskDetailSerializer
-        elif (
-            task_param == "Four_Choices_Image-Texts"
-            or task_param == "Four_Choices_Text-Images"
-        ):
-            return serializers.FourChoicesTaskDetailSerializer
-        return self.serializer_class
+        elif self.action == "generate_batch":
+            return serializers.GenerateBatchSerializer
+        return serializers.TYPE_SERIALIZERS.get(
+            task_param, self.serializer_class
+        )
 
     def perform_create(self, serializer):
         """
@@ -235,6 +358,61 @@ class TaskViewSet(viewsets.ModelViewSet):
         else:
             serializer.save(created_by=self.request.user)
 
+    def get_version_key(self):
+        """
+        Return the version of the task listing, or of the retrieved task,
+        used to answer conditional requests.
+        """
+        if self.action == "list":
+            return versions.TASK_LIST_KEY
+        pk = self.kwargs.get(self.lookup_field, "")
+        if self.action == "retrieve" and pk.isdigit():
+            return versions.task_key(int(pk))
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve a task.
+        Conditional requests for an unchanged task are answered with 304.
+        The rendered payload is cached per task and serializer, and served
+        from the cache until the task or its content changes.
+        """
+        return self.conditional(self._retrieve_payload, request, *args,
+                                **kwargs)
+
+    def _retrieve_payload(self, request, *args, **kwargs):
+        """
+        Return the task payload, from the detail cache when possible,
+        under the version of the task read for its ETag. Requests with
+        filter or search parameters are not cached, as they may exclude
+        the task.
+        """
+        pk = kwargs[self.lookup_field]
+        params = [*filters.TASK_FILTERS, "search"]
+        if not pk.isdigit() or any(
+            name in request.query_params for name in params
+        ):
+            return Response(self.get_serializer(self.get_object()).data)
+        variant = self.get_serializer_class().__name__ + self.sparse_key()
+        key = detail_cache.payload_key(
+            int(pk), variant, self.version_token
+        )
+        payload = detail_cache.get_payload(key)
+        if payload is None:
+            payload = self.get_serializer(self.get_object()).data
+            detail_cache.set_payload(key, payload)
+        return Response(payload)
+
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="detail_cache_stats",
+        permission_classes=[IsAdminUser],
+    )
+    def detail_cache_stats(self, request, pk=None):
+        """Return the hit and miss counters of the task detail cache"""
+        return Response(detail_cache.stats(), status=status.HTTP_200_OK)
+
     @action(
         methods=["PATCH"],
         detail=True,
@@ -254,20 +432,253 @@ class TaskViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="generate_batch",
+        permission_classes=[IsAuthenticated, IsTherapist],
+    )
+    def generate_batch(self, request, pk=None):
+        """
+        Start generating one task per patient from a task template.
+        The tasks are generated in the background and assigned to the
+        patients. Returns the job, which can be polled for its status.
+        """
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+        job = serializer.save(base_url=request.build_absolute_uri("/"))
+        batch.submit(job.id)
+        return Response(
+            serializers.GenerationJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(methods=["GET"], detail=False, url_path="can_generate")
+    def can_generate(self, request, pk=None):
+        """
+        Return whether the default library holds enough choices to
+        generate a task of the given type, from the choices carrying all
+        of the `choice_tags` names if given.
+        """
+        task_type = request.query_params.get("type")
+        choice_tags = request.query_params.getlist("choice_tags")
+        available = serializers.available_choices(choice_tags)
+        required = library.required_choices(task_type)
+        return Response(
+            {
+                "type": task_type,
+                "available": available,
+                "required": required,
+                "can_generate": required is not None and available >= required,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    def autocomplete(self, request, pk=None):
+        """
+        Return the ids and names of the best tasks whose name or tags
+        start with the words of the `q` query parameter.
+        """
+        tasks = search.autocomplete(
+            self.queryset, request.query_params.get("q", "")
+        )
+        return Response(list(tasks.values("id", "name")))
+
+    @action(methods=["GET"], detail=False, url_path="bundle")
+    def bundle(self, request, pk=None):
+        """
+        Return the full details of the tasks listed in the `ids` query
+        parameter, in the same order, along with the ids that do not
+        exist. Every task is serialized with the serializer of its type
+        and the tasks of each serializer are prefetched together.
+        """
+        values = request.query_params.get("ids", "").split(",")
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in values if pk.strip()))
+        except ValueError:
+            ids = None
+        if not ids or len(ids) > settings.API_MAX_PAGE_SIZE:
+            return Response(
+                {
+                    "ids": "Must be between 1 and "
+                    f"{settings.API_MAX_PAGE_SIZE} comma separated task ids"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        groups = {}
+        for task in self.queryset.filter(pk__in=ids):
+            serializer_class = serializers.TYPE_SERIALIZERS.get(
+                task.type, self.serializer_class
+            )
+            groups.setdefault(serializer_class, []).append(task)
+        payloads = {}
+        for serializer_class, tasks in groups.items():
+            serializer = serializer_class(
+                tasks,
+                many=True,
+                context=self.get_serializer_context(),
+                **self.sparse_kwargs(serializer_class),
+            )
+            prefetch_related_objects(
+                tasks,
+                *self.sparse_lookups(
+                    PREFETCH_PLANS[serializer_class], serializer
+                ),
+            )
+            payloads.update(zip((task.id for task in tasks), serializer.data))
+        return Response(
+            {
+                "tasks": [payloads[pk] for pk in ids if pk in payloads],
+                "missing": [pk for pk in ids if pk not in payloads],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(methods=["GET"], detail=False, url_path="offline_pack")
+    def offline_pack(self, request, pk=None):
+        """
+        Stream a ZIP archive of the tasks assigned to the user and the
+        choice images they reference. With the `since` query parameter
+        holding the version of an earlier pack, only the tasks changed
+        since are included. The version of the pack is returned in the
+        `X-Pack-Version` header and in `manifest.json`.
+        """
+        since = request.query_params.get("since")
+        version, task_ids, changed, incremental = offline.plan(
+            request.user, since
+        )
+        lookups = dict.fromkeys(
+            lookup
+            for serializer_class in serializers.TYPE_SERIALIZERS.values()
+            for lookup in PREFETCH_PLANS[serializer_class]
+        )
+        tasks = (
+            Task.objects.filter(pk__in=changed)
+            .order_by("id")
+            .prefetch_related(*lookups)
+            .iterator(chunk_size=offline.CURSOR_CHUNK_SIZE)
+        )
+        context = self.get_serializer_context()
+
+        def serialize(task):
+            serializer_class = serializers.TYPE_SERIALIZERS.get(
+                task.type, self.serializer_class
+            )
+            return serializer_class(task, context=context).data
+
+        manifest = {
+            "version": version,
+            "since": since if incremental else None,
+            "tasks": task_ids,
+            "changed": changed,
+        }
+        response = StreamingHttpResponse(
+            offline.stream(tasks, serialize, manifest),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="practice-pack-{version}.zip"'
+        )
+        response["X-Pack-Version"] = version
+        return response
+
     @action(methods=["GET"], detail=False, url_path="get_random_task")
     def get_random_task(self, request, pk=None):
         """
-        Return a random Task created by the default user.
+        Return a random Task created by the default user, optionally of
+        the given type and difficulty and not among the tasks of the last
+        `exclude_recent` results of the user.
         """
-        task = Task.objects.filter(created_by=1).order_by("?").first()
-        serializer = self.get_serializer(task, data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        task_type = request.query_params.get("type")
+        difficulty = request.query_params.get("difficulty")
+        exclude_recent = request.query_params.get("exclude_recent", "0")
+        errors = {}
+        if task_type is not None and task_type not in Task.Type.values:
+            errors["type"] = "Invalid task type"
+        if difficulty is not None and difficulty not in Task.Difficulty.values:
+            errors["difficulty"] = "Invalid difficulty"
+        if (
+            not exclude_recent.isdigit()
+            or int(exclude_recent) > picker.RECENT_LIMIT
+        ):
+            errors["exclude_recent"] = (
+                f"Must be a number between 0 and {picker.RECENT_LIMIT}"
+            )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        exclude = (
+            picker.recent_task_ids(request.user, int(exclude_recent))
+            if int(exclude_recent) else ()
+        )
+        task_id = picker.pick(task_type, difficulty, exclude)
+        task = (
+            self.prefetch(self.queryset).filter(pk=task_id).first()
+            if task_id is not None else None
+        )
+        if task is None:
+            return Response(
+                {"detail": "No task matches the filters"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        serializer = self.get_serializer(task)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class BasicChoiceViewSet(viewsets.ModelViewSet):
+class GenerationJobViewSet(
+    SparseFieldsViewMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """View for polling batch generation jobs"""
+
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated, IsTherapist]
+    serializer_class = serializers.GenerationJobSerializer
+    queryset = GenerationJob.objects.all()
+
+    def get_queryset(self):
+        """
+        Retrieve the generation jobs of the authenticated user, ordered by
+        the id in descending order.
+        """
+        return self.queryset.filter(
+            created_by=self.request.user
+        ).order_by("-id")
+
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description=(
+                    "Full-text search over choice texts and tag names, "
+                    "ordering the choices by rank"
+                ),
+            ),
+        ]
+    ),
+    autocomplete=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                description="Words of choice texts or tags, the last a prefix",
+            ),
+        ]
+    ),
+)
+class BasicChoiceViewSet(
+    SparseFieldsViewMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     """View for managing Basic Choices APIs"""
 
     authentication_classes = [TokenAuthentication]
@@ -278,9 +689,19 @@ class BasicChoiceViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         Retrieve the BasicChoices in the database, ordered by the id
-        in descending order.
+        in descending order, or only those matching the `search` query
+        parameter ordered by rank.
         """
-        return self.queryset.order_by("-id").distinct()
+        text = self.request.query_params.get("search")
+        if text:
+            queryset = search.search(self.queryset, text)
+        else:
+            queryset = self.queryset.order_by("-id").distinct()
+        return self.sparse_prefetch(queryset, ["tags"])
+
+    def get_version_key(self):
+        """Return the version of the catalog, for conditional requests"""
+        return versions.BASIC_CHOICES_KEY
 
     def get_permissions(self):
         """
@@ -300,8 +721,20 @@ class BasicChoiceViewSet(viewsets.ModelViewSet):
         """
         serializer.save(created_by=self.request.user)
 
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    def autocomplete(self, request, pk=None):
+        """
+        Return the ids and texts of the best choices whose text or tags
+        start with the words of the `q` query parameter.
+        """
+        choices = search.autocomplete(
+            self.queryset, request.query_params.get("q", "")
+        )
+        return Response(list(choices.values("id", "data1")))
+
 
 class TagViewSet(
+    SparseFieldsViewMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
@@ -335,6 +768,48 @@ class TagViewSet(
 
 
 @extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "latest",
+                OpenApiTypes.INT,
+                enum=[0, 1],
+                description="Only list the latest attempt at each task",
+            ),
+            OpenApiParameter(
+                "patient",
+                OpenApiTypes.INT,
+                description="Only list the results of this patient",
+            ),
+            OpenApiParameter(
+                "task",
+                OpenApiTypes.INT,
+                description="Only list the results of this task",
+            ),
+            OpenApiParameter(
+                "type",
+                OpenApiTypes.STR,
+                enum=Task.Type.values,
+                description="Only list the results of tasks of this type",
+            ),
+            OpenApiParameter(
+                "date_from",
+                OpenApiTypes.STR,
+                description=(
+                    "Only list the results created from this ISO 8601 "
+                    "date or datetime"
+                ),
+            ),
+            OpenApiParameter(
+                "date_to",
+                OpenApiTypes.STR,
+                description=(
+                    "Only list the results created until this ISO 8601 "
+                    "date or datetime, inclusive"
+                ),
+            ),
+        ]
+    ),
     retrieve=extend_schema(
         parameters=[
             OpenApiParameter(
@@ -365,8 +840,36 @@ class TagViewSet(
             )
         ]
     ),
+    analytics=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "patient",
+                OpenApiTypes.INT,
+                description="Id of the linked patient, for therapists",
+            ),
+            OpenApiParameter(
+                "date_from",
+                OpenApiTypes.DATE,
+                description="First day, by default 30 days before date_to",
+            ),
+            OpenApiParameter(
+                "date_to",
+                OpenApiTypes.DATE,
+                description="Last day, by default today",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    ),
+    sync=extend_schema(
+        request=inline_serializer(
+            "TaskResultSyncBatch",
+            {"results": serializers.TaskResultSyncSerializer(many=True)},
+        ),
+        responses=OpenApiTypes.OBJECT,
+    ),
 )
 class TaskResultViewSet(
+    SparseFieldsViewMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -394,13 +897,11 @@ class TaskResultViewSet(
         task_param = self.request.query_params.get("task_type", "invalid")
         if self.action == "list":
             return serializers.TaskResultSerializer
-        if (
-            task_param == "Four_Choices_Image-Texts"
-            or task_param == "Four_Choices_Text-Images"
-        ):
-            return serializers.TaskDetailFourChoiceResultSerializer
-        else:
-            return self.serializer_class
+        if self.action == "sync":
+            return serializers.TaskResultSyncSerializer
+        return serializers.RESULT_SERIALIZERS.get(
+            task_param, self.serializer_class
+        )
 
     def get_permissions(self):
         """
@@ -418,11 +919,29 @@ class TaskResultViewSet(
 
     def get_queryset(self):
         """
-        Retrieve the TaskResults in the database, ordered by the id in
-        descending order.
+        Retrieve the TaskResults of the authenticated patient, or of the
+        patients actively linked to the authenticated therapist, newest
+        first.
+        The results can be filtered with the `patient`, `task`, `type`,
+        `date_from` and `date_to` query parameters. With the `latest`
+        query parameter set to 1, only the latest attempt of each user at
+        each task is returned.
         """
-        queryset = self.queryset
-        return queryset.order_by("-id").distinct()
+        user = self.request.user
+        if user.is_therapist:
+            queryset = self.queryset.filter(
+                answered_by__assigned_to=user,
+                answered_by__assignment_active=True,
+            )
+        else:
+            queryset = self.queryset.filter(answered_by=user)
+        queryset = queryset.filter(
+            filters.result_filter(self.request.query_params)
+        ).order_by("-date_created", "-id")
+        if self.request.query_params.get("latest") == "1":
+            queryset = queryset.filter(latest__isnull=False)
+        plan = RESULT_PREFETCH_PLANS.get(self.get_serializer_class(), ())
+        return self.sparse_prefetch(queryset, plan)
 
     def perform_create(self, serializer):
         """
@@ -440,3 +959,131 @@ class TaskResultViewSet(
         )
         self.request.user.last_result_posted = timezone.now()
         self.request.user.save()
+
+    @action(methods=["POST"], detail=False, url_path="sync")
+    def sync(self, request):
+        """
+        Store a batch of results recorded offline, of any task types,
+        under `results`. Every result carries an `idempotency_key`
+        generated by the client, and a result whose key is already stored
+        is reported as a duplicate instead of being written again. The
+        valid results are written together and the status of every result
+        is returned in order.
+        """
+        items = (
+            request.data.get("results")
+            if isinstance(request.data, dict) else None
+        )
+        if (
+            not isinstance(items, list)
+            or not 1 <= len(items) <= settings.API_MAX_PAGE_SIZE
+        ):
+            return Response(
+                {
+                    "results": "Must be a list of between 1 and "
+                    f"{settings.API_MAX_PAGE_SIZE} results"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        task_ids = set()
+        for item in items:
+            try:
+                task_ids.add(int(item["task"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        context = {
+            **self.get_serializer_context(),
+            "tasks": Task.objects.filter(is_pooled=False)
+            .only("id", "type", "difficulty")
+            .in_bulk(task_ids),
+        }
+        checked = [
+            self.get_serializer(data=item, context=context) for item in items
+        ]
+        valid = [
+            serializer.validated_data
+            for serializer in checked
+            if serializer.is_valid()
+        ]
+        written = iter(
+            bulk.write_results(request.user, valid) if valid else ()
+        )
+        statuses = []
+        for item, serializer in zip(items, checked):
+            if serializer.errors:
+                statuses.append(
+                    {
+                        "idempotency_key": item.get("idempotency_key")
+                        if isinstance(item, dict) else None,
+                        "status": "invalid",
+                        "errors": serializer.errors,
+                    }
+                )
+                continue
+            result_id, created = next(written)
+            statuses.append(
+                {
+                    "idempotency_key": str(
+                        serializer.validated_data["idempotency_key"]
+                    ),
+                    "status": "created" if created else "duplicate",
+                    "id": result_id,
+                }
+            )
+        if any(item.get("status") == "created" for item in statuses):
+            request.user.last_result_posted = timezone.now()
+            request.user.save()
+        return Response({"results": statuses})
+
+    @action(methods=["GET"], detail=False, url_path="analytics")
+    def analytics(self, request):
+        """
+        Return the progress of a patient between `date_from` and
+        `date_to`, by default over the last 30 days, read from the
+        progress rollups. Therapists pick one of their actively linked
+        patients with `patient`, patients get their own progress.
+        """
+        user = request.user
+        errors = {}
+        patient = request.query_params.get("patient")
+        if user.is_therapist:
+            if patient is None or not patient.isdigit():
+                errors["patient"] = "Must be the id of a linked patient"
+        elif patient is not None and patient != str(user.id):
+            errors["patient"] = "Must be your own id"
+        dates = {}
+        for name in ("date_from", "date_to"):
+            value = request.query_params.get(name)
+            if value is None:
+                continue
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                errors[name] = "Must be an ISO 8601 date"
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        date_to = dates.get("date_to") or progress.day_of(timezone.now())
+        date_from = dates.get("date_from") or date_to - timedelta(
+            days=progress.DEFAULT_DAYS - 1
+        )
+        if not 0 <= (date_to - date_from).days < progress.MAX_DAYS:
+            return Response(
+                {
+                    "date_from": "Must be at most "
+                    f"{progress.MAX_DAYS} days before date_to"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if user.is_therapist and not user.patients.filter(
+            pk=patient, assignment_active=True
+        ).exists():
+            return Response(
+                {"detail": "No linked patient matches the id"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        patient_id = int(patient) if user.is_therapist else user.id
+        return Response(progress.summary(patient_id, date_from, date_to))
@@ -0,0 +1,116 @@
+"""
+Caseload dashboards of therapists.
+A dashboard lists every patient actively linked to a therapist with their
+day streak, last activity, results and accuracy over the last days,
+pending assignments and next meeting, each computed by a subquery of one
+SQL statement. Rendered dashboards are cached per therapist and day under
+a version token that is dropped whenever results, meetings, assignments
+or links of the patients change.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    Count,
+    Exists,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Cast, Coalesce, JSONObject, NullIf
+from django.utils import timezone
+
+from core.cache import get_cache_version
+from core.models import (
+    DailyProgress,
+    LatestTaskResult,
+    Meeting,
+    TaskResult,
+    User,
+)
+from task.progress import day_of
+from user import versions
+
+RECENT_DAYS = 7
+
+
+def patients(therapist):
+    """
+    Return the patients actively linked to the therapist, annotated with
+    their dashboard figures.
+    """
+    since = day_of(timezone.now()) - timedelta(days=RECENT_DAYS - 1)
+    recent = DailyProgress.objects.filter(
+        patient=OuterRef("pk"), day__gte=since
+    ).values("patient")
+    pending = (
+        User.assigned_tasks.through.objects.filter(user=OuterRef("pk"))
+        .filter(
+            ~Exists(
+                LatestTaskResult.objects.filter(
+                    answered_by=OuterRef("user"), task=OuterRef("task")
+                )
+            )
+        )
+        .values("user")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    next_meeting = (
+        Meeting.objects.filter(
+            assigned_patient=OuterRef("pk"), start_time__gte=timezone.now()
+        )
+        .order_by("start_time", "id")
+        .values(
+            data=JSONObject(
+                id="id",
+                name="name",
+                start_time="start_time",
+                end_time="end_time",
+            )
+        )[:1]
+    )
+    return (
+        User.objects.filter(assigned_to=therapist, assignment_active=True)
+        .annotate(
+            last_activity=Subquery(
+                TaskResult.objects.filter(answered_by=OuterRef("pk"))
+                .order_by("-date_created")
+                .values("date_created")[:1]
+            ),
+            results_7d=Coalesce(
+                Subquery(
+                    recent.annotate(count=Sum("result_count")).values(
+                        "count"
+                    )
+                ),
+                0,
+            ),
+            accuracy_7d=Subquery(
+                recent.annotate(
+                    accuracy=Cast(Sum("correct_count"), FloatField())
+                    / NullIf(Cast(Sum("total_count"), FloatField()), 0.0)
+                ).values("accuracy")
+            ),
+            pending_assignments=Coalesce(Subquery(pending), 0),
+            next_meeting=Subquery(next_meeting),
+        )
+        .order_by("name", "id")
+    )
+
+
+def cached(therapist, variant, render):
+    """
+    Return the dashboard of the therapist rendered by `render` for the
+    variant, from the cache when it is still current.
+    """
+    version = get_cache_version(versions.dashboard_key(therapist.id))
+    today = day_of(timezone.now())
+    key = f"user:dashboard:{therapist.id}:{today}:{variant}:{version}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = render()
+        cache.set(key, payload, settings.THERAPIST_DASHBOARD_CACHE_TIMEOUT)
+    return payload
@@ -8,6 +8,7 @@ from django.contrib.auth import (
 from django.utils.translation import gettext as _
 from rest_framework import serializers
 from core.models import Task
+from core.sparse import SparseFieldsMixin
 from core.exceptions import CodeDoesntExistException
 from django.core.exceptions import ObjectDoesNotExist
 
@@ -15,7 +16,7 @@ from string import ascii_lowercase
 from random import choice
 
 
-class TaskSerializerForUser(serializers.ModelSerializer):
+class TaskSerializerForUser(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for representing tasks assigned to users.
     """
@@ -26,7 +27,7 @@ class TaskSerializerForUser(serializers.ModelSerializer):
         read_only_fields = ["id", "created_by"]
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for representing users.
     """
@@ -73,6 +74,7 @@ class UserSerializer(serializers.ModelSerializer):
             "assignment_active",
             "day_streak",
         ]
+        expandable_fields = ["assigned_tasks", "my_meetings"]
 
     def validate(self, data):
         """
@@ -186,7 +188,9 @@ class AuthTokenSerializer(serializers.Serializer):
         return attrs
 
 
-class AssignTherapistSerializer(serializers.ModelSerializer):
+class AssignTherapistSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     """
     Serializer for assigning patients to therapists based on therapist codes.
     """
@@ -213,16 +217,13 @@ class AssignTherapistSerializer(serializers.ModelSerializer):
             raise CodeDoesntExistException(
                 detail={"therapist_code": "This code doesnt exist"}
             )
-        user_id = self.context["request"].user.id
-        get_user_model().objects.filter(id=user_id).update(
-            assigned_to=therapist, assignment_active=False
-        )
         instance.assigned_to = therapist
         instance.assignment_active = False
+        instance.save(update_fields=["assigned_to", "assignment_active"])
         return instance
 
 
-class WaitingToLinkSerializer(serializers.ModelSerializer):
+class WaitingToLinkSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for representing a user who is waiting to be linked to an therapist.
     """
@@ -249,7 +250,39 @@ class WaitingToLinkSerializer(serializers.ModelSerializer):
         ]
 
 
-class UpdateUserFieldSerializer(serializers.ModelSerializer):
+class DashboardPatientSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
+    """
+    Serializer for a patient on the caseload dashboard of their therapist.
+    """
+
+    last_activity = serializers.DateTimeField(read_only=True)
+    results_7d = serializers.IntegerField(read_only=True)
+    accuracy_7d = serializers.FloatField(read_only=True, allow_null=True)
+    pending_assignments = serializers.IntegerField(read_only=True)
+    next_meeting = serializers.JSONField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = get_user_model()
+        fields = [
+            "id",
+            "email",
+            "name",
+            "image",
+            "day_streak",
+            "last_activity",
+            "results_7d",
+            "accuracy_7d",
+            "pending_assignments",
+            "next_meeting",
+        ]
+        read_only_fields = fields
+
+
+class UpdateUserFieldSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     """
     Serializer for updating fields on a user model.
     """
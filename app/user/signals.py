@@ -0,0 +1,143 @@
+"""
+Signal handlers keeping user profile and therapist dashboard versions in
+sync with the database
+"""
+from django.db.models.signals import (
+    post_save,
+    pre_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from core.models import Meeting, Task, TaskResult, User
+from user import versions
+
+
+@receiver(pre_save, sender=User, dispatch_uid="user_profile_saving")
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    """
+    Record the therapist the user is linked to before it is saved, whose
+    profile and dashboard are invalidated once it is.
+    """
+    if instance.pk and (
+        update_fields is None
+        or {"assigned_to", "assignment_active"} & set(update_fields)
+    ):
+        instance._previous_therapist = (
+            User.objects.filter(pk=instance.pk)
+            .values_list("assigned_to", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=User, dispatch_uid="user_profile_saved")
+def user_saved(sender, instance, **kwargs):
+    """
+    Invalidate the profile of the user, and the profiles and dashboards of
+    the therapists it was and is linked to, which count and list their
+    patients.
+    """
+    therapists = [
+        instance.assigned_to_id,
+        instance.__dict__.pop("_previous_therapist", None),
+    ]
+    versions.profiles_changed([instance.pk] + therapists)
+    versions.dashboards_changed(therapists)
+
+
+@receiver(
+    m2m_changed,
+    sender=User.assigned_tasks.through,
+    dispatch_uid="user_profile_assigned_tasks_changed",
+)
+def assigned_tasks_changed(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """
+    Invalidate the profiles of users whose assigned tasks change, and the
+    dashboards of their therapists.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        user_ids = [instance.id]
+    elif pk_set is not None:
+        user_ids = list(pk_set)
+    else:
+        user_ids = list(
+            User.objects.filter(assigned_tasks=instance).values_list(
+                "id", flat=True
+            )
+        )
+    versions.profiles_changed(user_ids)
+    versions.patients_changed(user_ids)
+
+
+@receiver(post_save, sender=Task, dispatch_uid="user_profile_task_saved")
+@receiver(pre_delete, sender=Task, dispatch_uid="user_profile_task_deleting")
+def task_changed(sender, instance, created=False, **kwargs):
+    """
+    Invalidate the profiles of the users the task is assigned to, and the
+    dashboards of their therapists.
+    """
+    if created:
+        return
+    user_ids = list(
+        User.objects.filter(assigned_tasks=instance).values_list(
+            "id", flat=True
+        )
+    )
+    versions.profiles_changed(user_ids)
+    versions.patients_changed(user_ids)
+
+
+@receiver(pre_save, sender=Meeting, dispatch_uid="user_profile_meeting_saving")
+def meeting_saving(sender, instance, **kwargs):
+    """
+    Record the patient of the meeting before it is saved, whose profile
+    is invalidated once it is.
+    """
+    if instance.pk:
+        instance._previous_patient = (
+            Meeting.objects.filter(pk=instance.pk)
+            .values_list("assigned_patient", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Meeting, dispatch_uid="user_profile_meeting_saved")
+def meeting_saved(sender, instance, **kwargs):
+    """
+    Invalidate the profiles of the patients the meeting was and is
+    assigned to, and the dashboards of their therapists and of the
+    creator of the meeting.
+    """
+    patients = [
+        instance.__dict__.pop("_previous_patient", None),
+        instance.assigned_patient_id,
+    ]
+    versions.profiles_changed(patients)
+    versions.patients_changed(patients)
+    versions.dashboards_changed([instance.created_by_id])
+
+
+@receiver(
+    post_delete, sender=Meeting, dispatch_uid="user_profile_meeting_deleted"
+)
+def meeting_deleted(sender, instance, **kwargs):
+    """
+    Invalidate the profile of the patient of the meeting, and the
+    dashboards of their therapist and of the creator of the meeting.
+    """
+    versions.profiles_changed([instance.assigned_patient_id])
+    versions.patients_changed([instance.assigned_patient_id])
+    versions.dashboards_changed([instance.created_by_id])
+
+
+@receiver(
+    post_delete, sender=TaskResult, dispatch_uid="dashboard_result_deleted"
+)
+def result_deleted(sender, instance, **kwargs):
+    """Invalidate the dashboard of the therapist of the patient"""
+    versions.patients_changed([instance.answered_by_id])
@@ -0,0 +1,161 @@
+"""
+Tests for the therapist caseload dashboard
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Meeting, Task
+
+DASHBOARD_URL = reverse("user:therapist-dashboard")
+RESULTS_URL = reverse("task:taskresult-list")
+
+
+class DashboardTests(TestCase):
+    """Test the caseload dashboard of therapists"""
+
+    def setUp(self):
+        cache.clear()
+        self.therapist = get_user_model().objects.create_therapist_user(
+            "therapist@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.therapist)
+        self.first = self.create_patient("first@example.com", "A")
+        self.second = self.create_patient("second@example.com", "B")
+        self.create_patient("inactive@example.com", "C", active=False)
+        self.tasks = [
+            Task.objects.create(
+                name=f"Task {i}",
+                type=Task.Type.connect_pairs_text_text,
+                difficulty=Task.Difficulty.EASY,
+                created_by=self.therapist,
+            )
+            for i in range(2)
+        ]
+        self.now = timezone.now()
+
+    def create_patient(self, email, name, active=True):
+        """Create a patient linked to the therapist"""
+        return get_user_model().objects.create_user(
+            email,
+            "testpass123",
+            name=name,
+            assigned_to=self.therapist,
+            assignment_active=active,
+        )
+
+    def create_meeting(self, patient, days):
+        """Create a meeting with the patient in `days` days"""
+        return Meeting.objects.create(
+            name=f"In {days} days",
+            created_by=self.therapist,
+            assigned_patient=patient,
+            start_time=self.now + timedelta(days=days),
+            end_time=self.now + timedelta(days=days, hours=1),
+        )
+
+    def submit(self, patient, task, *correct):
+        """Submit a result of the patient, one answer per `correct` flag"""
+        self.client.force_authenticate(patient)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                RESULTS_URL,
+                {
+                    "task": task.id,
+                    "answers": [
+                        {
+                            "answer": [
+                                {"data1": "a", "data2": "b", "is_correct": c}
+                                for c in correct
+                            ]
+                        }
+                    ],
+                },
+                format="json",
+            )
+        self.client.force_authenticate(self.therapist)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def get_dashboard(self):
+        """Return the dashboard rows by patient email"""
+        res = self.client.get(DASHBOARD_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {row["email"]: row for row in res.data}
+
+    def test_dashboard_figures(self):
+        """Test every linked patient is listed with their figures"""
+        self.first.assigned_tasks.set(self.tasks)
+        self.submit(self.first, self.tasks[0], True, False)
+        self.create_meeting(self.first, -1)
+        self.create_meeting(self.first, 2)
+        sooner = self.create_meeting(self.first, 1)
+
+        rows = self.get_dashboard()
+
+        self.assertEqual(
+            list(rows), ["first@example.com", "second@example.com"]
+        )
+        first = rows["first@example.com"]
+        self.assertEqual(first["results_7d"], 1)
+        self.assertEqual(first["accuracy_7d"], 0.5)
+        self.assertEqual(first["pending_assignments"], 1)
+        self.assertIsNotNone(first["last_activity"])
+        self.assertEqual(first["next_meeting"]["id"], sooner.id)
+        second = rows["second@example.com"]
+        self.assertEqual(second["results_7d"], 0)
+        self.assertIsNone(second["accuracy_7d"])
+        self.assertEqual(second["pending_assignments"], 0)
+        self.assertIsNone(second["last_activity"])
+        self.assertIsNone(second["next_meeting"])
+
+    def test_dashboard_is_one_query(self):
+        """Test the dashboard is read with one query"""
+        self.first.assigned_tasks.set(self.tasks)
+        self.submit(self.first, self.tasks[0], True)
+        self.submit(self.second, self.tasks[1], False)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get_dashboard()
+
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_dashboard_is_cached_until_results_change(self):
+        """Test the cached dashboard is dropped by new results"""
+        self.get_dashboard()
+        with self.assertNumQueries(0):
+            self.get_dashboard()
+
+        self.submit(self.first, self.tasks[0], True)
+
+        self.assertEqual(
+            self.get_dashboard()["first@example.com"]["results_7d"], 1
+        )
+
+    def test_dashboard_is_cached_until_meetings_change(self):
+        """Test the cached dashboard is dropped by meeting changes"""
+        self.get_dashboard()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting = self.create_meeting(self.second, 1)
+
+        self.assertEqual(
+            self.get_dashboard()["second@example.com"]["next_meeting"]["id"],
+            meeting.id,
+        )
+
+    def test_dashboard_requires_therapist(self):
+        """Test patients cannot read a dashboard"""
+        self.client.force_authenticate(self.first)
+
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
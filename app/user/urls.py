@@ -22,6 +22,11 @@ urlpatterns = [
         name="me-therapist",
     ),
     path("list/patients/", views.ListPatientUserView.as_view(), name="list-patients"),
+    path(
+        "therapist/dashboard/",
+        views.TherapistDashboardView.as_view(),
+        name="therapist-dashboard",
+    ),
     path(
         "list/therapists/",
         views.ListTherapistUserView.as_view(),
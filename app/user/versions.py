@@ -0,0 +1,45 @@
+"""
+Version tokens of user profiles, stored in the database for the ETags of
+conditional GET requests, and of therapist dashboards, used to key their
+cache
+"""
+from core.cache import drop_cache_versions
+from core.versions import bump_versions
+from core.models import User
+
+
+def profile_key(user_id):
+    """Return the cache key of the version token of a user profile"""
+    return f"user:profile:version:{user_id}"
+
+
+def profiles_changed(user_ids):
+    """Replace the versions of the profiles of the users"""
+    bump_versions(
+        profile_key(user_id) for user_id in user_ids if user_id is not None
+    )
+
+
+def dashboard_key(therapist_id):
+    """Return the cache key of the version token of a therapist dashboard"""
+    return f"user:dashboard:version:{therapist_id}"
+
+
+def dashboards_changed(therapist_ids):
+    """Drop the versions of the dashboards of the therapists"""
+    drop_cache_versions(
+        dashboard_key(therapist_id)
+        for therapist_id in therapist_ids
+        if therapist_id is not None
+    )
+
+
+def patients_changed(patient_ids):
+    """Drop the versions of the dashboards of the therapists of patients"""
+    patient_ids = [pk for pk in patient_ids if pk is not None]
+    if patient_ids:
+        dashboards_changed(
+            User.objects.filter(pk__in=patient_ids).values_list(
+                "assigned_to", flat=True
+            )
+        )
@@ -2,6 +2,7 @@
 Views for the user api
 """
 from rest_framework import generics, authentication, permissions
+from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
@@ -13,10 +14,14 @@ from user.serializers import (
     UpdateNoteSerializer,
     PatientViewSerializer,
     UpdateDiagnosisSerializer,
+    DashboardPatientSerializer,
 )
 from user.serializers import AuthTokenSerializer
+from core.etags import ConditionalGetMixin
+from core.sparse import SparseFieldsViewMixin
 from core.models import User, Meeting
 from core.permissions import IsTherapist, IsPatientAssignedToTherapist
+from user import dashboard, versions
 
 from drf_spectacular.utils import (
     extend_schema_view,
@@ -45,7 +50,9 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManagerUserView(generics.RetrieveUpdateAPIView):
+class ManagerUserView(
+    SparseFieldsViewMixin, ConditionalGetMixin, generics.RetrieveUpdateAPIView
+):
     """Manage authenticated user"""
 
     serializer_class = UserSerializer
@@ -56,18 +63,17 @@ class ManagerUserView(generics.RetrieveUpdateAPIView):
         """Retrieve and return the authenticated user"""
         return self.request.user
 
+    def get_version_key(self):
+        """Return the version of the profile, for conditional requests"""
+        return versions.profile_key(self.request.user.id)
 
-class ManagerUserTherapistView(generics.RetrieveUpdateAPIView):
+
+class ManagerUserTherapistView(ManagerUserView):
     """Manage authenticated therapist user"""
 
     serializer_class = UserTherapistSerializer
-    authentication_classes = [authentication.TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsTherapist]
 
-    def get_object(self):
-        """Retrieve and return the authenticated user"""
-        return self.request.user
-
 
 @extend_schema_view(
     get=extend_schema(
@@ -81,7 +87,7 @@ class ManagerUserTherapistView(generics.RetrieveUpdateAPIView):
         ]
     )
 )
-class ListPatientUserView(generics.ListAPIView):
+class ListPatientUserView(SparseFieldsViewMixin, generics.ListAPIView):
     """
     View for listing patient users.
     """
@@ -102,10 +108,38 @@ class ListPatientUserView(generics.ListAPIView):
             queryset = queryset.filter(
                 assigned_to=self.request.user, assignment_active=True
             )
-        return queryset
+        return self.sparse_prefetch(queryset, ["assigned_tasks"])
+
+
+class TherapistDashboardView(SparseFieldsViewMixin, generics.GenericAPIView):
+    """
+    View for the caseload dashboard of the authenticated therapist.
+    """
+
+    serializer_class = DashboardPatientSerializer
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated & IsTherapist]
+    pagination_class = None
+
+    @extend_schema(responses=DashboardPatientSerializer(many=True))
+    def get(self, request):
+        """
+        Return every patient actively linked to the therapist with their
+        day streak, last activity, results and accuracy over the last 7
+        days, pending assignments and next meeting. The dashboard is read
+        with one query and cached until any of it changes.
+        """
+
+        def render():
+            patients = dashboard.patients(request.user)
+            return self.get_serializer(patients, many=True).data
+
+        return Response(
+            dashboard.cached(request.user, self.sparse_key(), render)
+        )
 
 
-class ListTherapistUserView(generics.ListAPIView):
+class ListTherapistUserView(SparseFieldsViewMixin, generics.ListAPIView):
     """
     View for listing therapist users.
     """
@@ -122,7 +156,7 @@ class ListTherapistUserView(generics.ListAPIView):
         return queryset
 
 
-class GetPatientUserView(generics.RetrieveAPIView):
+class GetPatientUserView(SparseFieldsViewMixin, generics.RetrieveAPIView):
     """
     View for retrieving a patient user.
     """
@@ -135,7 +169,7 @@ class GetPatientUserView(generics.RetrieveAPIView):
     serializer_class = PatientViewSerializer
 
 
-class GetTherapistUserView(generics.RetrieveAPIView):
+class GetTherapistUserView(SparseFieldsViewMixin, generics.RetrieveAPIView):
     """
     View for retrieving a therapist user.
     """
@@ -160,7 +194,7 @@ class AssignTherapistView(generics.UpdateAPIView):
         return self.request.user
 
 
-class PatientsWaitingToLinkView(generics.ListAPIView):
+class PatientsWaitingToLinkView(SparseFieldsViewMixin, generics.ListAPIView):
     """View for listing patients that are waiting to be linked"""
 
     authentication_classes = [authentication.TokenAuthentication]